@@ -0,0 +1,182 @@
+import threading
+import tkinter as tk
+from tkinter import messagebox
+import serial.tools.list_ports
+from Gui.RibbonFunctions.Programmer import TkDispatcher, get_connection_status
+from Gui.Programmer.programming import get_project_device
+from core.compiler.rom_image import RomImage
+from core.programmer import STANDIN_NAME, find_ecf_programmer, run_gang
+
+gang_thread = None  # Thread running the gang's event loop while a run is in progress
+
+
+def load_project_image():
+    """
+    Load the open project's .ecfROM image.
+    Shows the problem and returns None when there is no project or the ROM file is missing or invalid.
+    Returns (image, rom_file_path).
+    """
+    import os
+    import sys
+    ecf_module = sys.modules.get('__main__')
+    current_project_dir = getattr(ecf_module, 'current_project_dir', None)
+    current_project_name = getattr(ecf_module, 'current_project_name', None)
+
+    if current_project_dir is None or current_project_name is None:
+        messagebox.showerror("No Project", "Please open or create a project first.")
+        return None
+
+    rom_file_path = os.path.join(current_project_dir, "Output", f"{current_project_name}.ecfROM")
+    if not os.path.exists(rom_file_path):
+        messagebox.showerror("File Not Found",
+                             f"Could not find ROM file:\n{rom_file_path}\n\nPlease compile the project first.")
+        return None
+
+    try:
+        image = RomImage.from_output(os.path.dirname(rom_file_path), current_project_name)
+    except ValueError as e:
+        messagebox.showerror("Data Error", f"Invalid data in ROM file: {str(e)}")
+        return None
+    return image, rom_file_path
+
+
+def show_gang_dialog(response_label):
+    """
+    Show the gang programming dialog.
+    Programs and validates the project's image on every selected programmer at once,
+    with a progress line per programmer and a pass/fail summary at the end.
+    """
+    dialog = tk.Toplevel()
+    dialog.title("Gang Programming")
+    dialog.geometry("560x480")
+
+    main_frame = tk.Frame(dialog, padx=20, pady=20)
+    main_frame.pack(fill='both', expand=True)
+
+    title_label = tk.Label(main_frame, text="Program Several Programmers at Once", font=('Arial', 12, 'bold'))
+    title_label.pack(pady=(0, 10))
+
+    # Port selection, detected programmers are preselected
+    select_frame = tk.LabelFrame(main_frame, text="Programmers", padx=10, pady=10)
+    select_frame.pack(fill='both', expand=True, pady=(0, 10))
+
+    port_list = tk.Listbox(select_frame, selectmode='multiple', height=6, exportselection=False)
+    port_list.pack(fill='both', expand=True)
+
+    def refresh_ports():
+        port_list.delete(0, tk.END)
+        detected = {port_info['port'] for port_info in find_ecf_programmer()}
+        for port in serial.tools.list_ports.comports():
+            port_list.insert(tk.END, f"{port.device} - {port.description}")
+            if port.device in detected:
+                port_list.selection_set(tk.END)
+        # Firmware emulation for trying a gang run without boards, each entry is its own device
+        port_list.insert(tk.END, f"{STANDIN_NAME} - ECF_PRG stand-in (no hardware)")
+
+    refresh_btn = tk.Button(select_frame, text="Scan", command=refresh_ports, padx=10, pady=3)
+    refresh_btn.pack(pady=(5, 0))
+    refresh_ports()
+
+    # One status line per programmer while running
+    status_frame = tk.LabelFrame(main_frame, text="Progress", padx=10, pady=10)
+    status_frame.pack(fill='both', expand=True, pady=(0, 10))
+
+    status_text = tk.Text(status_frame, height=8, font=('Consolas', 10), state='disabled')
+    status_text.pack(fill='both', expand=True)
+
+    def show_lines(lines):
+        status_text.config(state='normal')
+        status_text.delete('1.0', tk.END)
+        status_text.insert(tk.END, "\n".join(lines))
+        status_text.config(state='disabled')
+
+    def start():
+        global gang_thread
+        if gang_thread is not None and gang_thread.is_alive():
+            messagebox.showwarning("Gang Running", "A gang run is already in progress.", parent=dialog)
+            return
+
+        port_names = [port_list.get(index).split(' - ')[0] for index in port_list.curselection()]
+        if not port_names:
+            messagebox.showwarning("No Selection", "Please select at least one programmer.", parent=dialog)
+            return
+
+        # A port can only be open once, the single-programmer connection would hold it
+        is_connected, connected_port, _ = get_connection_status()
+        if is_connected and connected_port in port_names:
+            messagebox.showerror("Port In Use", f"{connected_port} is connected as the main programmer.\n\n"
+                                                f"Disconnect it first.", parent=dialog)
+            return
+
+        try:
+            device = get_project_device()
+        except ValueError as e:
+            messagebox.showerror("Unknown Device", str(e), parent=dialog)
+            return
+
+        loaded = load_project_image()
+        if loaded is None:
+            return
+        image, rom_file_path = loaded
+
+        result = messagebox.askyesno(
+            "Gang Programming",
+            f"Program {len(port_names)} devices from:\n{rom_file_path}\n\n⚠ This will overwrite their memory!\n\n"
+            f"Continue?",
+            icon='warning', parent=dialog
+        )
+        if not result:
+            return
+
+        print(f"Gang programming {len(port_names)} programmers with {rom_file_path} ({device.name})")
+        response_label.config(text=f"Gang programming {len(port_names)} devices...")
+        dispatcher = TkDispatcher(dialog)
+        lines = {}  # Latest status line per port, shown in selection order
+        show_lines([f"{name}: waiting" for name in port_names])
+        start_btn.config(state='disabled')
+
+        def show_update(port_name, line):
+            lines[port_name] = line
+            show_lines([lines.get(name, f"{name}: waiting") for name in port_names])
+
+        def on_update(gang_result):
+            # Runs on the gang's event loop thread, the line is built there and shown on the Tk thread
+            port_name, line = gang_result.port_name, gang_result.describe()
+            dispatcher(lambda: show_update(port_name, line))
+
+        def show_report(report):
+            dispatcher.stop()
+            start_btn.config(state='normal')
+            show_lines(report.summary().splitlines())
+            print(report.summary())
+            if report.ok:
+                response_label.config(text=f"✓ Gang run passed: {len(report.results)} devices")
+                messagebox.showinfo("Gang Programming Passed", report.summary(), parent=dialog)
+            else:
+                response_label.config(text=f"Gang run failed: {len(report.failed)} of {len(report.results)} devices")
+                messagebox.showerror("Gang Programming Failed", report.summary(), parent=dialog)
+
+        def run():
+            report = run_gang(port_names, image, device, on_update=on_update)
+            dispatcher(lambda: show_report(report))
+
+        gang_thread = threading.Thread(target=run, name="gang-programming", daemon=True)
+        gang_thread.start()
+
+    button_frame = tk.Frame(main_frame)
+    button_frame.pack(fill='x')
+
+    start_btn = tk.Button(button_frame, text="Program All", command=start,
+                          bg='#28a745', fg='white', padx=30, pady=8, font=('Arial', 10, 'bold'))
+    start_btn.pack(side='left', padx=(0, 5))
+
+    def close():
+        # The run's callbacks need the dialog, so it stays open until every programmer finished
+        if gang_thread is not None and gang_thread.is_alive():
+            messagebox.showwarning("Gang Running", "Wait for the gang run to finish.", parent=dialog)
+            return
+        dialog.destroy()
+
+    close_btn = tk.Button(button_frame, text="Close", command=close, padx=30, pady=8)
+    close_btn.pack(side='left')
+    dialog.protocol("WM_DELETE_WINDOW", close)
@@ -1,7 +1,14 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from Gui.RibbonFunctions.Programmer import get_connection_status
-import time
+from Gui.RibbonFunctions.Programmer import (get_connection_status, get_programmer_id, reconnect_programmer,
+                                            run_programmer_job, send_programmer_command)
+from core.compiler.rom_image import RomImage
+from core.programmer import ProgrammerError, ProgrammingSession, JobCancelled
+from core.programmer.differential import program_differential, MODE_FULL
+from core.programmer.block_writer import configure_device
+from core.devices import get_device_profile, device_for_project
+
+active_job = None  # Future of the whole-device programming running on the I/O thread
 
 
 def create_programming_interface(parent, colors):
@@ -130,6 +137,32 @@ def create_programming_interface(parent, colors):
     )
     prog_whole_button.pack(side='left', padx=10)
 
+    # Cancel Button, stops whole-device programming at the next page
+    cancel_button = tk.Button(
+        prog_button_frame,
+        text="Cancel",
+        command=lambda: cancel_job(response_label),
+        bg=colors['bg'],
+        fg=colors['fg'],
+        font=('Arial', 11),
+        padx=25,
+        pady=12
+    )
+    cancel_button.pack(side='left', padx=10)
+
+    # Gang Programming Button, the same image on several programmers at once
+    gang_button = tk.Button(
+        prog_button_frame,
+        text="Gang Program...",
+        command=lambda: open_gang_dialog(response_label),
+        bg=colors['bg'],
+        fg=colors['fg'],
+        font=('Arial', 11),
+        padx=25,
+        pady=12
+    )
+    gang_button.pack(side='left', padx=10)
+
     return main_frame
 
 
@@ -156,27 +189,22 @@ def set_mode(mode_code, response_label):
             response_label.config(text="Programming mode cancelled by user")
             return
 
-    try:
-        # Send command with newline
-        command = f"{mode_code}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {mode_code}")
-
-        # Read response (with timeout handled by serial settings)
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=f"Response: {response}")
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(mode_code, show_response)
+    print(f"Sent: {mode_code}")
 
 
 def read_bus(bus_command, response_label):
@@ -193,27 +221,43 @@ def read_bus(bus_command, response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
-    try:
-        # Send command with newline
-        command = f"{bus_command}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {bus_command}")
-
-        # Read response
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=response)
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(bus_command, show_response)
+    print(f"Sent: {bus_command}")
+
+
+def get_project_device():
+    """
+    Return the EEPROM profile selected by the open project's Device setting.
+    Falls back to the default part when no project is open.
+    Raises ValueError if the project names an unknown part.
+    """
+    import os
+    import sys
+    ecf_module = sys.modules.get('__main__')
+    current_project_dir = getattr(ecf_module, 'current_project_dir', None)
+    current_project_name = getattr(ecf_module, 'current_project_name', None)
+
+    if current_project_dir is None or current_project_name is None:
+        return get_device_profile()
+
+    proj_file_path = os.path.join(current_project_dir, f"{current_project_name}.ecfproj")
+    if not os.path.exists(proj_file_path):
+        return get_device_profile()
+    return device_for_project(proj_file_path)
 
 
 def program_single_address(response_label):
@@ -228,6 +272,14 @@ def program_single_address(response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
+    try:
+        device = get_project_device()
+    except ValueError as e:
+        messagebox.showerror("Unknown Device", str(e))
+        response_label.config(text=f"ERROR: {e}")
+        return
+    last_address = device.size - 1
+
     # Create custom dialog for address and byte input
     dialog = tk.Toplevel()
     dialog.title("Program Single Address")
@@ -237,7 +289,7 @@ def program_single_address(response_label):
     dialog.grab_set()
 
     # Address input
-    tk.Label(dialog, text="Address (0-8191):", font=('Arial', 10)).pack(pady=(20, 5))
+    tk.Label(dialog, text=f"Address (0-{last_address}):", font=('Arial', 10)).pack(pady=(20, 5))
     address_entry = tk.Entry(dialog, font=('Arial', 11), width=20)
     address_entry.pack(pady=5)
     address_entry.focus()
@@ -255,8 +307,9 @@ def program_single_address(response_label):
             byte_val = int(byte_entry.get())
 
             # Validate inputs
-            if address < 0 or address > 8191:
-                messagebox.showerror("Invalid Address", "Address must be between 0 and 8191")
+            if address < 0 or address > last_address:
+                messagebox.showerror("Invalid Address",
+                                     f"Address must be between 0 and {last_address} for the {device.name}")
                 return
 
             if byte_val < 0 or byte_val > 255:
@@ -297,43 +350,47 @@ def program_single_address(response_label):
     address = result['address']
     byte_val = result['byte']
 
-    try:
-        # Send PA;Address;Byte
-        command = f"PA;{address};{byte_val}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: PA;{address};{byte_val}")
-        response_label.config(text=f"Programming address {address} with byte {byte_val}...")
+    def program_byte(context):
+        # Select the part so the programmer waits (or polls) for its write cycle
+        configure_device(context.port, device)
 
-        # Read response
-        response = ser.readline().decode('ascii').strip()
+        # Send PA;Address;Byte
+        context.port.write(f"PA;{address};{byte_val}\n".encode('ascii'))
+        response = context.port.readline().decode('ascii').strip()
         print(f"Received: {response}")
 
-        # Send SNF
-        ser.write(b"SNF\n")
-        print("Sent: SNF")
-        snf_response = ser.readline().decode('ascii').strip()
-        print(f"Received: {snf_response}")
-
-        # Send PRG
-        ser.write(b"PRG\n")
-        print("Sent: PRG")
-        prg_response = ser.readline().decode('ascii').strip()
-        print(f"Received: {prg_response}")
+        # Reset programmer FSM
+        for mode_code in ("SNF", "PRG"):
+            context.port.write(f"{mode_code}\n".encode('ascii'))
+            print(f"Sent: {mode_code}")
+            print(f"Received: {context.port.readline().decode('ascii').strip()}")
+        return response
 
+    def show_result(future):
+        try:
+            response = future.result()
+        except Exception as e:
+            error_msg = f"Communication error: {str(e)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {e}")
+            return
         response_label.config(text=f"Complete: {response} | Reset to PRG mode")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the result is shown when it finishes
+    run_programmer_job(program_byte, show_result)
+    print(f"Sent: PA;{address};{byte_val}")
+    response_label.config(text=f"Programming address {address} with byte {byte_val}...")
 
 
 def program_whole_device(response_label):
     """
     Program the entire device from the .ecfROM file.
-    Reads the file line by line and programs each address sequentially.
+    Only the pages that differ from the last image validated on this programmer are written,
+    the whole image when there is no trustworthy record. Written pages are read back.
+    Runs on the programmer's I/O thread; progress and the result are shown as they arrive.
     """
+    global active_job
     is_connected, port, ser = get_connection_status()
 
     # Check if programmer is connected
@@ -342,6 +399,10 @@ def program_whole_device(response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
+    if active_job is not None:
+        messagebox.showwarning("Programming Running", "The device is already being programmed.")
+        return
+
     # Get current project info
     import sys
     ecf_module = sys.modules.get('__main__')
@@ -382,71 +443,103 @@ def program_whole_device(response_label):
         return
 
     try:
-        # Read ROM file
-        with open(rom_file_path, 'r') as f:
-            rom_data = f.readlines()
-
-        total_bytes = len(rom_data)
-        print(f"Programming {total_bytes} bytes from {rom_file_path}")
-        response_label.config(text=f"Programming {total_bytes} bytes...")
-
-        # Program each address
-        for address, line in enumerate(rom_data):
-            byte_val = int(line.strip())
-
-            # Validate byte
-            if byte_val < 0 or byte_val > 255:
-                error_msg = f"Invalid byte value {byte_val} at address {address}"
-                messagebox.showerror("Invalid Data", error_msg)
-                response_label.config(text=error_msg)
-                return
-
-            # Send PA command
-            command = f"PA;{address};{byte_val}\n"
-            ser.write(command.encode('ascii'))
-
-            # Wait for response
-            response = ser.readline().decode('ascii').strip()
-            time.sleep(0.01)  # 100 microseconds = 0.0001 seconds
-
-            # Update progress every 100 bytes
-            if address % 100 == 0:
-                response_label.config(
-                    text=f"Programming... {address}/{total_bytes} ({int(address / total_bytes * 100)}%)")
-                response_label.update()
-
-            print(f"Address {address}: {byte_val} -> {response}")
-
-        # Reset programmer FSM
-        response_label.config(text="Programming complete, resetting programmer...")
-
-        # Send SNF
-        ser.write(b"SNF\n")
-        snf_response = ser.readline().decode('ascii').strip()
-        print(f"SNF Response: {snf_response}")
-
-        # Send PRG
-        ser.write(b"PRG\n")
-        prg_response = ser.readline().decode('ascii').strip()
-        print(f"PRG Response: {prg_response}")
-
-        # Success message
-        response_label.config(text=f"✓ Successfully programmed {total_bytes} bytes")
-        messagebox.showinfo("Success", f"Device programmed successfully!\n\nProgrammed {total_bytes} bytes")
-        print(f"Programming complete: {total_bytes} bytes")
+        device = get_project_device()
+    except ValueError as e:
+        messagebox.showerror("Unknown Device", str(e))
+        response_label.config(text=f"ERROR: {e}")
+        return
 
+    try:
+        # Read ROM file and its used ranges (invalid values raise ValueError)
+        image = RomImage.from_output(os.path.dirname(rom_file_path), current_project_name)
     except FileNotFoundError:
         error_msg = f"ROM file not found: {rom_file_path}"
         response_label.config(text=error_msg)
         messagebox.showerror("File Error", error_msg)
-
+        return
     except ValueError as e:
         error_msg = f"Invalid data in ROM file: {str(e)}"
         response_label.config(text=error_msg)
         messagebox.showerror("Data Error", error_msg)
+        return
 
-    except Exception as e:
-        error_msg = f"Programming error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Programming Error", error_msg)
-        print(f"Error: {e}")
+    total_bytes = sum(end - start for start, end in image.used_ranges())
+    programmer_id = get_programmer_id(port)
+    print(f"Programming {total_bytes} bytes from {rom_file_path} into {device.name}")
+    response_label.config(text=f"Programming {total_bytes} bytes...")
+
+    def show_progress(done, total):
+        response_label.config(text=f"Programming... {done}/{total} ({int(done / total * 100)}%)")
+
+    def program_image(context):
+        def show_reconnect(error, attempt):
+            print(f"Programmer link lost ({error}), reconnecting (attempt {attempt})")
+            context.dispatch(lambda: response_label.config(text=f"Link lost, reconnecting (attempt {attempt})..."))
+
+        # One PB command and acknowledgement per changed EEPROM page, timed for the project's part;
+        # sent as binary frames when the firmware supports them. A USB glitch reopens the port and
+        # resumes after the last acknowledged page instead of starting over
+        with ProgrammingSession(context.port, reconnect_programmer, device, on_reconnect=show_reconnect) as session:
+            report = program_differential(session.port, image, device, programmer_id,
+                                          progress=context.progress, session=session)
+        if session.reconnections:
+            print(f"Resumed after {session.reconnections} reconnect(s)")
+        if report.mode == MODE_FULL:
+            print(f"Full write: {report.reason}")
+        print(f"Programming ({report.mode}): wrote {report.bytes_written} bytes in {len(report.blocks)} blocks")
+
+        # Reset programmer FSM
+        context.dispatch(lambda: response_label.config(text="Programming complete, resetting programmer..."))
+        for mode_code in ("SNF", "PRG"):
+            session.serial.write(f"{mode_code}\n".encode('ascii'))
+            print(f"{mode_code} Response: {session.serial.readline().decode('ascii').strip()}")
+        return report
+
+    def show_result(future):
+        global active_job
+        active_job = None
+        try:
+            report = future.result()
+        except JobCancelled:
+            response_label.config(text="Programming cancelled, device contents are incomplete")
+            print("Programming cancelled")
+            return
+        except ProgrammerError as e:
+            error_msg = f"Programmer error: {str(e)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Programming Error", error_msg)
+            print(f"Error: {e}")
+            return
+        except Exception as e:
+            error_msg = f"Programming error: {str(e)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Programming Error", error_msg)
+            print(f"Error: {e}")
+            return
+
+        # Success message
+        response_label.config(
+            text=f"✓ Successfully programmed {total_bytes} bytes ({report.bytes_written} written, {report.mode})")
+        messagebox.showinfo("Success", f"Device programmed successfully!\n\n"
+                                       f"Image: {total_bytes} bytes\n"
+                                       f"Written and verified: {report.bytes_written} bytes ({report.mode})")
+        print(f"Programming complete: {total_bytes} bytes")
+
+    # Runs on the programmer's I/O thread, the window stays responsive and Cancel can stop it
+    active_job = run_programmer_job(program_image, show_result, show_progress)
+
+
+def cancel_job(response_label):
+    """
+    Stop the running whole-device programming at its next page.
+    """
+    if active_job is not None and active_job.cancel():
+        response_label.config(text="Cancelling...")
+
+
+def open_gang_dialog(response_label):
+    """
+    Open the gang programming dialog, which uses its own connections to the selected programmers.
+    """
+    from Gui.Programmer.gang import show_gang_dialog
+    show_gang_dialog(response_label)
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-from Gui.RibbonFunctions.Programmer import get_connection_status
+from Gui.RibbonFunctions.Programmer import get_connection_status, send_programmer_command
 
 
 def create_sniffer_interface(parent, colors):
@@ -112,27 +112,22 @@ def set_mode(mode_code, response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
-    try:
-        # Send command with newline
-        command = f"{mode_code}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {mode_code}")
-
-        # Read response (with timeout handled by serial settings)
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=f"Response: {response}")
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(mode_code, show_response)
+    print(f"Sent: {mode_code}")
 
 
 def read_bus(bus_command, response_label):
@@ -149,24 +144,19 @@ def read_bus(bus_command, response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
-    try:
-        # Send command with newline
-        command = f"{bus_command}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {bus_command}")
-
-        # Read response
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=response)
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
\ No newline at end of file
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(bus_command, show_response)
+    print(f"Sent: {bus_command}")
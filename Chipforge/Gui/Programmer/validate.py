@@ -1,7 +1,15 @@
 import tkinter as tk
 from tkinter import messagebox
-from Gui.RibbonFunctions.Programmer import get_connection_status
-import time
+from Gui.RibbonFunctions.Programmer import (get_connection_status, get_programmer_id, run_programmer_job,
+                                            send_programmer_command)
+from Gui.Programmer.programming import get_project_device
+from core.compiler.rom_image import RomImage
+from core.programmer.differential import DeviceRecord, DeviceRecordStore
+from core.programmer import (ProgrammerError, verify_ranges, group_addresses, format_ranges,
+                             repair_mismatches, framed_session)
+from core.programmer import set_mode as set_programmer_mode  # set_mode below is the GUI's mode button
+
+MAX_LISTED_RANGES = 20  # Ranges named in the failure dialog, the console gets every address
 
 
 def create_validate_interface(parent, colors):
@@ -143,27 +151,22 @@ def set_mode(mode_code, response_label):
             response_label.config(text="Validation mode cancelled by user")
             return
 
-    try:
-        # Send command with newline
-        command = f"{mode_code}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {mode_code}")
-
-        # Read response (with timeout handled by serial settings)
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=f"Response: {response}")
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(mode_code, show_response)
+    print(f"Sent: {mode_code}")
 
 
 def read_bus(bus_command, response_label):
@@ -180,34 +183,29 @@ def read_bus(bus_command, response_label):
         response_label.config(text="ERROR: Not connected to programmer")
         return
 
-    try:
-        # Send command with newline
-        command = f"{bus_command}\n"
-        ser.write(command.encode('ascii'))
-        print(f"Sent: {bus_command}")
-
-        # Read response
-        response = ser.readline().decode('ascii').strip()
-
-        if response:
+    def show_response(response, error):
+        if error is not None:
+            error_msg = f"Communication error: {str(error)}"
+            response_label.config(text=error_msg)
+            messagebox.showerror("Communication Error", error_msg)
+            print(f"Error: {error}")
+        elif response:
             response_label.config(text=response)
             print(f"Received: {response}")
         else:
             response_label.config(text="No response received (timeout)")
             print("No response received")
 
-    except Exception as e:
-        error_msg = f"Communication error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Communication Error", error_msg)
-        print(f"Error: {e}")
+    # Sent from the programmer's I/O thread, the reply is shown when it arrives
+    send_programmer_command(bus_command, show_response)
+    print(f"Sent: {bus_command}")
 
 
 def validate_whole_device(response_label):
     """
     Validate the entire device against the .ecfROM file.
-    Reads each address from the device using VA command and compares with the ROM file.
-    Stops on first mismatch and reports the error.
+    Compares a CRC of each used range with the ROM file and bisects mismatching ranges,
+    then summarizes every differing range and offers to re-program and re-verify only those.
     """
     is_connected, port, ser = get_connection_status()
 
@@ -257,76 +255,116 @@ def validate_whole_device(response_label):
         return
 
     try:
-        # Read ROM file
-        with open(rom_file_path, 'r') as f:
-            rom_data = f.readlines()
+        # Read ROM file and its used ranges (invalid values raise ValueError)
+        image = RomImage.from_output(os.path.dirname(rom_file_path), current_project_name)
+    except FileNotFoundError:
+        error_msg = f"ROM file not found: {rom_file_path}"
+        response_label.config(text=error_msg)
+        messagebox.showerror("File Error", error_msg)
+        return
+    except ValueError as e:
+        error_msg = f"Invalid data in ROM file: {str(e)}"
+        response_label.config(text=error_msg)
+        messagebox.showerror("Data Error", error_msg)
+        return
+
+    rom_data = image.data
+    programmer_id = get_programmer_id(port)
+
+    # ORG gaps are never programmed, only the used addresses are compared
+    used_ranges = image.used_ranges()
+    total_bytes = sum(end - start for start, end in used_ranges)
+    print(f"Validating {total_bytes} bytes from {rom_file_path}")
+    response_label.config(text=f"Validating {total_bytes} bytes...")
 
-        total_bytes = len(rom_data)
-        print(f"Validating {total_bytes} bytes from {rom_file_path}")
-        response_label.config(text=f"Validating {total_bytes} bytes...")
+    def show_error(e):
+        if isinstance(e, ProgrammerError):
+            error_msg = f"Programmer error: {str(e)}"
+        else:
+            error_msg = f"Validation error: {str(e)}"
+        response_label.config(text=error_msg)
+        messagebox.showerror("Validation Error", error_msg)
+        print(f"Error: {e}")
 
-        mismatches = []
+    def verify(context):
+        # One CRC command per range, only mismatching halves are bisected down to the bytes
+        with framed_session(context.port) as link:
+            set_programmer_mode(link, "VAL")
+            return verify_ranges(link, image, used_ranges)
+
+    def show_mismatches(future):
+        try:
+            mismatches = future.result()
+        except Exception as e:
+            show_error(e)
+            return
+        if not mismatches:
+            show_success("")
+            return
 
-        # Validate each address
-        for address, line in enumerate(rom_data):
-            expected_byte = int(line.strip())
+        # The device no longer holds what its record says
+        DeviceRecordStore().forget(programmer_id)
+
+        mismatch_ranges = group_addresses(mismatches)
+        print(f"{len(mismatches)} mismatching addresses in {len(mismatch_ranges)} ranges:")
+        for address in mismatches:
+            print(f"MISMATCH at address {address}: Expected {rom_data[address]}")
+        response_label.config(text=f"MISMATCH at {len(mismatches)} of {total_bytes} addresses")
+
+        repair = messagebox.askyesno(
+            "Validation Failed",
+            f"Memory validation failed!\n\n"
+            f"{len(mismatches)} of {total_bytes} bytes differ from the ROM file "
+            f"in {len(mismatch_ranges)} ranges:\n"
+            f"{format_ranges(mismatch_ranges, MAX_LISTED_RANGES)}\n\n"
+            f"Re-program and re-verify only these ranges?",
+            icon='error'
+        )
+        if not repair:
+            return
 
-            # Validate expected byte
-            if expected_byte < 0 or expected_byte > 255:
-                error_msg = f"Invalid byte value {expected_byte} in ROM file at address {address}"
-                messagebox.showerror("Invalid Data", error_msg)
-                response_label.config(text=error_msg)
-                return
+        try:
+            device = get_project_device()
+        except ValueError as e:
+            print(f"Repairing with the programmer's current device setup: {e}")
+            device = None
 
-            # Send VA command to read address
-            command = f"VA;{address}\n"
-            ser.write(command.encode('ascii'))
+        def show_progress(done, total):
+            response_label.config(text=f"Repairing... {done}/{total} bytes")
 
-            # Wait for response
-            response = ser.readline().decode('ascii').strip()
-            time.sleep(0.01)  # Small delay between reads
+        def repair_job(context):
+            with framed_session(context.port) as link:
+                return repair_mismatches(link, image, mismatches, device, progress=context.progress)
 
-            # Parse the response - format: "VA: Addr=2 Data=255 (0xFF)"
+        def show_repair(repair_future):
             try:
-                # Extract the Data value from the response
-                if "Data=" in response:
-                    # Split by "Data=" and take the part after it
-                    data_part = response.split("Data=")[1]
-                    # Split by space and take first part (the decimal value)
-                    actual_byte = int(data_part.split()[0])
-                else:
-                    raise ValueError(f"Unexpected response format: {response}")
-            except (ValueError, IndexError) as e:
-                error_msg = f"Invalid response at address {address}: {response}"
-                messagebox.showerror("Validation Error", error_msg)
-                response_label.config(text=error_msg)
-                print(f"Parse error: {e}")
+                report = repair_future.result()
+            except Exception as e:
+                show_error(e)
                 return
-
-            # Compare values
-            if actual_byte != expected_byte:
-                mismatch_msg = f"MISMATCH at address {address}: Expected {expected_byte}, Got {actual_byte}"
-                print(mismatch_msg)
-                response_label.config(text=mismatch_msg)
-
-                # Show detailed error and stop validation
+            if not report.repaired:
+                remaining_ranges = group_addresses(report.remaining)
+                response_label.config(text=f"Repair failed: {len(report.remaining)} bytes still differ")
                 messagebox.showerror(
-                    "Validation Failed",
-                    f"Memory validation failed!\n\n"
-                    f"Address: {address}\n"
-                    f"Expected: {expected_byte} (0x{expected_byte:02X})\n"
-                    f"Actual: {actual_byte} (0x{actual_byte:02X})\n\n"
-                    f"Validation stopped at first mismatch."
+                    "Repair Failed",
+                    f"{len(report.remaining)} bytes still differ after {report.attempts} attempts:\n"
+                    f"{format_ranges(remaining_ranges, MAX_LISTED_RANGES)}"
                 )
                 return
+            print(f"Repaired {len(mismatches)} bytes ({report.bytes_written} written in {report.attempts} attempts)")
+            show_success(f"\nRepaired {len(mismatches)} bytes in {len(mismatch_ranges)} ranges.")
 
-            # Update progress every 100 bytes
-            if address % 100 == 0:
-                response_label.config(
-                    text=f"Validating... {address}/{total_bytes} ({int(address / total_bytes * 100)}%)")
-                response_label.update()
+        run_programmer_job(repair_job, show_repair, show_progress)
 
-            print(f"Address {address}: Expected {expected_byte}, Got {actual_byte} ✓")
+    def show_success(repair_note):
+        # All addresses matched - remember the contents so the next programming run can be differential
+        try:
+            device = get_project_device()
+            DeviceRecordStore().save(DeviceRecord(programmer_id, device.name,
+                                                  bytes(rom_data[:len(image)]), validated=True,
+                                                  known=used_ranges))
+        except ValueError as e:
+            print(f"Device record not updated: {e}")
 
         # All addresses matched - success!
         response_label.config(text=f"✓ Validation successful! All {total_bytes} bytes verified")
@@ -334,22 +372,9 @@ def validate_whole_device(response_label):
             "Validation Successful",
             f"Device validation completed successfully!\n\n"
             f"Verified {total_bytes} bytes\n"
-            f"All values match the ROM file."
+            f"All values match the ROM file.{repair_note}"
         )
         print(f"Validation complete: {total_bytes} bytes verified successfully")
 
-    except FileNotFoundError:
-        error_msg = f"ROM file not found: {rom_file_path}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("File Error", error_msg)
-
-    except ValueError as e:
-        error_msg = f"Invalid data in ROM file: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Data Error", error_msg)
-
-    except Exception as e:
-        error_msg = f"Validation error: {str(e)}"
-        response_label.config(text=error_msg)
-        messagebox.showerror("Validation Error", error_msg)
-        print(f"Error: {e}")
\ No newline at end of file
+    # Runs on the programmer's I/O thread, the result is shown when it arrives
+    run_programmer_job(verify, show_mismatches)
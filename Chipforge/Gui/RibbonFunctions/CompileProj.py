@@ -36,7 +36,8 @@ def on_compile_project():
         compiler = ECFCompiler()
 
         # Try to load and compile the project
-        if compiler.load_project(project_path):
+        result = compiler.compile_project(project_path)
+        if result is not None:
             # Success - show success message
             details = (f"Project: {compiler.project_settings.get('ProjectName', 'Unknown')}\n"
                        f"Loaded:\n"
@@ -52,14 +53,12 @@ def on_compile_project():
                     for file in debug_files:
                         details += f"• {file.name}\n"
 
-            # Generate output files from _IMPLEMENTED.txt
-            implemented_file = os.path.join(current_project_dir, "Debug", f"{current_project_name}_IMPLEMENTED.txt")
-            if os.path.exists(implemented_file):
-                if generate_output_files(implemented_file, current_project_name, current_project_dir):
-                    details += "\nOutput files generated:\n"
-                    details += "• rom_data.h\n"
-                    details += f"• {current_project_name}.ecfROM\n"
-                    details += "• rom_data.mat\n"
+            # Generate output files straight from the compile result
+            if generate_output_files(result, current_project_dir, compiler.profiler):
+                details += "\nOutput files generated:\n"
+                details += "• rom_data.h\n"
+                details += f"• {current_project_name}.ecfROM\n"
+                details += "• rom_data.mat\n"
 
             messagebox.showinfo("Compile Success",
                                 f"ECF Project compiled successfully!\n\n{details}")
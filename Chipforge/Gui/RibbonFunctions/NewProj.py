@@ -78,6 +78,7 @@ def create_empty_project(project_dir, project_name):
         f.write("InstructionSpace=false\n")
         f.write("ProgramCounterSize=13\n")
         f.write("BusWidth=8\n")
+        f.write("Device=AT28C64B\n")
 
     # Create .ecfASM file
     ecfasm_path = os.path.join(project_dir, f"{project_name}.ecfASM")
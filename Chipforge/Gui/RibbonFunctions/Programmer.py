@@ -1,12 +1,53 @@
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
 import serial
 import serial.tools.list_ports
+from core.programmer import ProgrammerError, ProgrammerWorker, open_transport, find_ecf_programmer, STANDIN_NAME
 
 # Connection state
 is_connected = False
 current_port = None
 serial_connection = None
+programmer_worker = None  # I/O thread owning serial_connection while connected
+programmer_dispatcher = None  # Runs the I/O thread's callbacks on the Tk thread
+
+DISPATCH_POLL_MS = 20  # How often the Tk thread runs callbacks queued by the I/O thread
+
+
+class TkDispatcher:
+    """
+    Runs callbacks from the programmer's I/O thread on the Tk thread.
+    Tk must only be touched from its own thread, so callbacks are queued and polled with after().
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.callbacks = queue.SimpleQueue()
+        self.after_id = widget.after(DISPATCH_POLL_MS, self.poll)
+
+    def __call__(self, callback):
+        self.callbacks.put(callback)
+
+    def poll(self):
+        self.run_pending()
+        self.after_id = self.widget.after(DISPATCH_POLL_MS, self.poll)
+
+    def run_pending(self):
+        while True:
+            try:
+                callback = self.callbacks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback()
+            except Exception as e:
+                print(f"Programmer callback failed: {e}")
+
+    def stop(self):
+        """Stop polling, callbacks queued later are dropped"""
+        self.widget.after_cancel(self.after_id)
+        self.run_pending()
 
 
 def on_programmer_click():
@@ -67,7 +108,7 @@ def show_connection_dialog():
         #     print(f"  Serial Number: {port.serial_number}")
         # print("========================\n")
 
-        ecf_ports = find_ecf_programmer()
+        ecf_ports = find_ecf_programmer(verbose=True)
 
         if ecf_ports:
             port_list.delete(0, tk.END)
@@ -111,8 +152,9 @@ def show_connection_dialog():
         ports = serial.tools.list_ports.comports()
         for port in ports:
             port_list.insert(tk.END, f"{port.device} - {port.description}")
-        if ports:
-            port_list.selection_set(0)
+        # Firmware emulation for working without the board
+        port_list.insert(tk.END, f"{STANDIN_NAME} - ECF_PRG stand-in (no hardware)")
+        port_list.selection_set(0)
 
     refresh_btn = tk.Button(manual_frame, text="Refresh List", command=refresh_ports, padx=10, pady=3)
     refresh_btn.pack(pady=(5, 0))
@@ -130,7 +172,7 @@ def show_connection_dialog():
         port_text = port_list.get(selection[0])
         port_name = port_text.split(' - ')[0]
 
-        if connect_programmer(port_name):
+        if connect_programmer(port_name, dialog.master):
             dialog.destroy()
 
     button_frame = tk.Frame(main_frame)
@@ -145,71 +187,19 @@ def show_connection_dialog():
     cancel_btn.pack(side='left')
 
 
-def find_ecf_programmer():
-    """
-    Scan for COM ports with 'ECF_PRG' in the product string, or STM32 by VID/PID.
-    VID: 0x0483 (1155 decimal) - STMicroelectronics
-    PID: 0x5740 (22336 decimal) - STM32 Virtual COM Port
-    Returns list of matching ports.
-    """
-    ecf_ports = []
-    ports = serial.tools.list_ports.comports()
-
-    # STM32 identifiers
-    STM32_VID = 0x0483  # 1155 decimal
-    STM32_PID = 0x5740  # 22336 decimal
-
-    print("\n=== Searching for ECF_PRG / STM32 Programmer ===")
-    for port in ports:
-        print(f"Checking {port.device}:")
-        print(f"  VID: {port.vid} (0x{port.vid:04X} if port.vid else 'None')")
-        print(f"  PID: {port.pid} (0x{port.pid:04X} if port.pid else 'None')")
-        print(f"  Product: '{port.product}'")
-        print(f"  Description: '{port.description}'")
-
-        match_found = False
-        match_reason = ""
-
-        # Check for ECF_PRG in product string
-        if port.product and 'ECF_PRG' in port.product.upper():
-            match_found = True
-            match_reason = "Product string contains ECF_PRG"
-        # Check for ECF_PRG in description
-        elif 'ECF_PRG' in port.description.upper():
-            match_found = True
-            match_reason = "Description contains ECF_PRG"
-        # Check for STM32 VID/PID
-        elif port.vid == STM32_VID and port.pid == STM32_PID:
-            match_found = True
-            match_reason = "STM32 VID/PID match (0x0483:0x5740)"
-
-        if match_found:
-            print(f"  -> MATCH: {match_reason}")
-            ecf_ports.append({
-                'port': port.device,
-                'description': f"{port.description} [{match_reason}]",
-                'product': port.product if port.product else 'STM32 Device'
-            })
-        else:
-            print(f"  -> No match")
-
-    print(f"=== Found {len(ecf_ports)} programmer device(s) ===\n")
-    return ecf_ports
-
-
-def connect_programmer(port_name):
+def connect_programmer(port_name, root):
     """
     Attempt to connect to the programmer on the specified port.
+    'standin' connects to the in-process firmware stand-in instead of a serial port.
+    root is the Tk widget whose after() runs the I/O thread's callbacks.
     """
-    global is_connected, current_port, serial_connection
+    global is_connected, current_port, serial_connection, programmer_worker, programmer_dispatcher
 
     try:
-        # Attempt to open serial connection
-        serial_connection = serial.Serial(
-            port=port_name,
-            baudrate=115200,
-            timeout=1
-        )
+        # Attempt to open the programmer transport, then hand it to its I/O thread
+        serial_connection = open_transport(port_name)
+        programmer_dispatcher = TkDispatcher(root)
+        programmer_worker = ProgrammerWorker(serial_connection, programmer_dispatcher)
 
         # Connection successful
         is_connected = True
@@ -222,17 +212,42 @@ def connect_programmer(port_name):
         print(f"Connected to programmer: {port_name}")
         return True
 
-    except serial.SerialException as e:
+    except (OSError, ProgrammerError) as e:
         messagebox.showerror("Connection Failed", f"Failed to connect to {port_name}\n\n{str(e)}")
         print(f"Connection failed: {e}")
         return False
 
 
+def reconnect_programmer():
+    """
+    Reopen the programmer's port after a link failure, e.g. when the USB device re-enumerated.
+    Returns the reopened transport; raises OSError if the port is still missing.
+    """
+    global is_connected
+
+    if current_port is None or serial_connection is None:
+        raise OSError("No programmer port to reconnect to")
+
+    is_connected = False
+    serial_connection.reopen()
+    is_connected = True
+    print(f"Reconnected to programmer: {current_port}")
+    return serial_connection
+
+
 def disconnect_programmer():
     """
     Disconnect from the programmer.
     """
-    global is_connected, current_port, serial_connection
+    global is_connected, current_port, serial_connection, programmer_worker, programmer_dispatcher
+
+    # Closing the port ends a running job with an error, queued ones are cancelled
+    if programmer_worker:
+        programmer_worker.stop(wait=False)
+        programmer_worker = None
+    if programmer_dispatcher:
+        programmer_dispatcher.stop()
+        programmer_dispatcher = None
 
     if serial_connection and serial_connection.is_open:
         serial_connection.close()
@@ -269,9 +284,55 @@ def update_programmer_button():
                           activebackground=colors['tab_selected'], activeforeground=colors['fg'])
 
 
+def get_programmer_id(port_name=None):
+    """
+    Get a stable identity for the connected programmer.
+    Uses the USB serial number when the port reports one, otherwise the port name.
+    """
+    port_name = port_name or current_port
+    if port_name is None:
+        return None
+
+    for port in serial.tools.list_ports.comports():
+        if port.device == port_name and port.serial_number:
+            return f"usb:{port.serial_number}"
+    return f"port:{port_name}"
+
+
+def run_programmer_job(job, on_done, on_progress=None):
+    """
+    Queue job(context) on the programmer's I/O thread, jobs from every tab run one at a time.
+    on_done(future) and on_progress(done, total) run on the Tk thread.
+    Returns the job's future (cancel() stops it at its next progress report), None when not connected.
+    """
+    if programmer_worker is None:
+        return None
+    return programmer_worker.submit(job, on_progress, on_done)
+
+
+def send_programmer_command(command, on_reply):
+    """
+    Send one ASCII command line on the programmer's I/O thread.
+    on_reply(response, error) runs on the Tk thread with the stripped reply ('' on a timeout) or the exception.
+    """
+    def exchange(context):
+        context.port.write(f"{command}\n".encode('ascii'))
+        return context.port.readline().decode('ascii').strip()
+
+    def done(future):
+        try:
+            response = future.result()
+        except Exception as e:
+            on_reply(None, e)
+            return
+        on_reply(response, None)
+
+    return run_programmer_job(exchange, done)
+
+
 def get_connection_status():
     """
     Get current connection status.
-    Returns: (is_connected, port_name, serial_connection)
+    Returns: (is_connected, port_name, transport), the transport offers the pyserial write/readline subset
     """
     return is_connected, current_port, serial_connection
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+ECF assembler benchmark suite
+
+This package contains:
+- synth: Synthetic ECF projects of any size (every INST format, dense labels, many ORGs, DB tables)
+- runner: Per-stage and end-to-end timing, JSON results, baseline comparison and scaling checks
+- protocol: Programmer throughput over ASCII lines vs binary frames, on the firmware stand-in
+
+Run from the Chipforge folder:
+    python -m benchmarks [--sizes 1000,4000,16000,64000] [--projects ../Design/Code] [--save-baseline]
+    python -m benchmarks.protocol [--size 8192] [--latency 0.001] [--link-rate 1000000] [--reply-loss 0.05]
+"""
@@ -0,0 +1,95 @@
+import argparse
+import contextlib
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from core.programmer import (ProgrammerStandIn, get_device_profile, framed_session, set_mode, configure_device,
+                             program_ranges, read_range, verify_ranges)
+
+DEFAULT_SIZE = 8192
+DEFAULT_LATENCY = 0.001  # One USB full-speed frame each way
+DEFAULT_LINK_RATE = 1_000_000  # Bytes per second a full-speed CDC link carries in practice
+DEFAULT_WRITE_CYCLE = 0.0002  # Short enough that the link, not the EEPROM, sets the pace
+PROTOCOLS = ("ascii", "framed")
+
+
+def run_protocol(protocol: str, size: int, latency: float, link_rate: float, write_cycle: float,
+                 reply_loss: float, seed: int) -> Dict[str, Any]:
+    """
+    Program, read back and CRC-verify a random image over one protocol on the stand-in
+
+    Args:
+        protocol: "ascii" or "framed"
+        size: Image size in bytes
+        latency: Stand-in round-trip latency in seconds
+        link_rate: Stand-in link bytes per second
+        write_cycle: Stand-in EEPROM write cycle in seconds
+        reply_loss: Fraction of replies the stand-in drops
+        seed: Seed for the image contents
+
+    Returns:
+        Per-phase seconds and payload bytes/s, plus the wire bytes per payload byte
+    """
+    data = bytes(random.Random(seed).getrandbits(8) for _ in range(size))
+    standin = ProgrammerStandIn(size=size, latency=latency, write_cycle=write_cycle, reply_loss=reply_loss,
+                                link_rate=link_rate)
+    device = get_device_profile("AT28C64B")
+    phases = {}
+    session = framed_session(standin) if protocol == "framed" else contextlib.nullcontext(standin)
+    with session as port:
+        start = time.perf_counter()
+        set_mode(port, "PRG")
+        configure_device(port, device)
+        program_ranges(port, data, [(0, size)], device)
+        phases["program"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        set_mode(port, "VAL")
+        read_back = read_range(port, 0, size)
+        phases["read"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mismatches = verify_ranges(port, data, [(0, size)])
+        phases["verify"] = time.perf_counter() - start
+
+    if read_back != data or mismatches:
+        raise RuntimeError(f"{protocol}: read-back differs from the programmed image")
+    wire_bytes = standin.bytes_received + standin.bytes_sent
+    return {
+        "seconds": {phase: round(seconds, 4) for phase, seconds in phases.items()},
+        "bytes_per_second": {phase: round(size / seconds) for phase, seconds in phases.items()},
+        # Program sends the image once and reads it back once, so two payload bytes per address
+        "wire_per_payload_byte": round(wire_bytes / (2 * size), 2),
+        "lost_replies": standin.lost_replies,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point, compares the ASCII and framed protocols on the programmer stand-in"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.protocol",
+                                     description="ECF programmer protocol benchmark (stand-in)")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="image size in bytes")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="round-trip latency in seconds")
+    parser.add_argument("--link-rate", type=float, default=DEFAULT_LINK_RATE, help="link bytes per second")
+    parser.add_argument("--write-cycle", type=float, default=DEFAULT_WRITE_CYCLE,
+                        help="EEPROM write cycle in seconds")
+    parser.add_argument("--reply-loss", type=float, default=0.0, help="fraction of replies dropped")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the image")
+    args = parser.parse_args(argv)
+
+    print(f"{args.size} bytes, latency {args.latency * 1000:.1f} ms, link {args.link_rate / 1000:.0f} kB/s, "
+          f"write cycle {args.write_cycle * 1000:.2f} ms, reply loss {args.reply_loss:.0%}")
+    print(f"{'protocol':<8} {'program B/s':>12} {'read B/s':>12} {'verify B/s':>12} {'wire/byte':>10}")
+    for protocol in PROTOCOLS:
+        result = run_protocol(protocol, args.size, args.latency, args.link_rate, args.write_cycle,
+                              args.reply_loss, args.seed)
+        rates = result["bytes_per_second"]
+        print(f"{protocol:<8} {rates['program']:>12} {rates['read']:>12} {rates['verify']:>12} "
+              f"{result['wire_per_payload_byte']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+
+from core.compiler import (ECFFileLoader, ECFInstructionSet, ECFParser, ECFSpacer, ECFAddresser,
+                           ECFImplementation, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA)
+from core.compiler.ir import render_lines, render_spaced, render_addressed, render_implemented
+from core.compiler.rom_image import DEFAULT_PROGRAM_COUNTER_SIZE
+from core.compiler_main import ECFCompiler
+from core.output_generator import generate_output_files
+from .synth import write_project
+
+DEFAULT_SIZES = [1000, 4000, 16000, 64000]
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_PROJECTS = Path(__file__).resolve().parents[2] / "Design" / "Code"
+SUPERLINEAR_SLOPE = 1.25  # log-log slope above which a stage counts as super-linear
+REGRESSION_MIN_MS = 0.5  # Differences below this are noise whatever the ratio
+
+
+def _quiet():
+    """Swallow the compiler's console output so it doesn't distort timings or the report"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _time(run: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Time a callable several times
+
+    Args:
+        run: Callable to time, given setup()'s value if setup is provided
+        repeat: Number of timed runs
+        setup: Untimed callable preparing fresh input for each run
+
+    Returns:
+        {"min_ms", "median_ms"} over the runs
+    """
+    times = []
+    for _ in range(repeat):
+        value = setup() if setup is not None else None
+        with _quiet():
+            start = time.perf_counter()
+            run(value) if setup is not None else run()
+            times.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3)}
+
+
+class ProjectBench:
+    """Runs each compiler stage of one project in isolation, then end to end"""
+
+    def __init__(self, proj_file: Path, repeat: int):
+        self.proj_file = proj_file
+        self.repeat = repeat
+        self.base_name = proj_file.stem
+        self.proj_dir = proj_file.parent
+        self.asm_file = self.proj_dir / f"{self.base_name}.ecfASM"
+        self.source_dir = self.proj_dir / "source"
+
+        # One full compile up front gives the settings and checks the project builds at all
+        compiler = ECFCompiler(debug_output=False, use_cache=False)
+        with _quiet():
+            self.result = compiler.compile_project(str(proj_file))
+        self.errors = compiler.get_errors()
+        self.settings = compiler.project_settings
+        self.instruction_set = compiler.instruction_set
+
+    def memory_size(self) -> int:
+        return 2 ** self.settings.get('ProgramCounterSize', DEFAULT_PROGRAM_COUNTER_SIZE)
+
+    def _load_tables(self):
+        loader = ECFFileLoader()
+        write = loader.load_tabbed_file(self.source_dir / f"{self.base_name}.ecfADDW", ADDW_SCHEMA)
+        read = loader.load_tabbed_file(self.source_dir / f"{self.base_name}.ecfADDR", ADDR_SCHEMA)
+        inst = loader.load_tabbed_file(self.source_dir / f"{self.base_name}.ecfINST", INST_SCHEMA)
+        return ECFInstructionSet(inst, write, read)
+
+    def _parse(self):
+        return ECFParser().parse_asm_file(str(self.asm_file))
+
+    def _space(self, statements):
+        return ECFSpacer(self.instruction_set).space_code(statements)
+
+    def _address(self, spaced_words):
+        return ECFAddresser(self.instruction_set, self.memory_size()).address_code(spaced_words)
+
+    def _implement(self, addressed):
+        return ECFImplementation(self.instruction_set).implement_code(addressed)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Benchmark every stage
+
+        Returns:
+            Stage name -> timing, plus "lines" and "rom_size"
+        """
+        if self.result is None:
+            return {"error": self.errors[:5]}
+
+        with _quiet():
+            statements = self._parse()
+            spaced_once = self._space(statements)
+            addressed_once = self._implement(self._address(self._space(statements)))
+
+        def fresh_spaced():
+            # The addresser resolves operands in place, so each run needs its own spaced words
+            with _quiet():
+                return self._space(statements)
+
+        def fresh_addressed():
+            with _quiet():
+                return self._address(self._space(statements))
+
+        output_dir = Path(tempfile.mkdtemp(prefix="ecf_bench_emit_"))
+        try:
+            stages = {
+                "load_tables": _time(self._load_tables, self.repeat),
+                "parse": _time(self._parse, self.repeat),
+                "space": _time(self._space, self.repeat, lambda: statements),
+                "address": _time(self._address, self.repeat, fresh_spaced),
+                "implement": _time(self._implement, self.repeat, fresh_addressed),
+                "render_dumps": _time(lambda: (render_lines(statements), render_spaced(spaced_once),
+                                               render_addressed(addressed_once),
+                                               render_implemented(addressed_once)), self.repeat),
+                "emit": _time(lambda: generate_output_files(self.result, str(output_dir)), self.repeat),
+                "end_to_end": _time(lambda: ECFCompiler(use_cache=False).compile_project(str(self.proj_file)),
+                                    self.repeat),
+                "end_to_end_release": _time(lambda: ECFCompiler(debug_output=False, use_cache=False)
+                                            .compile_project(str(self.proj_file)), self.repeat),
+            }
+            # Prime the cache once, then time unchanged rebuilds
+            with _quiet():
+                ECFCompiler().compile_project(str(self.proj_file))
+            stages["end_to_end_cached"] = _time(lambda: ECFCompiler().compile_project(str(self.proj_file)),
+                                                self.repeat)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        with open(self.asm_file, 'r', encoding='utf-8') as f:
+            lines = sum(1 for _ in f)
+        return {"lines": lines, "rom_size": self.result.stats["rom_size"], "stages": stages}
+
+
+def copy_real_projects(projects_dir: Path, work_dir: Path) -> List[Path]:
+    """
+    Copy the real projects so benchmarking never writes into the source tree
+
+    Args:
+        projects_dir: Folder holding one folder per project (e.g. Design/Code)
+        work_dir: Scratch folder to copy them into
+
+    Returns:
+        Paths of the copied .ecfproj files
+    """
+    projects = []
+    for proj_file in sorted(projects_dir.rglob("*")):
+        if proj_file.suffix.lower() != ".ecfproj":
+            continue
+        target = work_dir / "real" / proj_file.parent.name.replace(" ", "_")
+        shutil.copytree(proj_file.parent, target, ignore=shutil.ignore_patterns("Debug", "Output"))
+        # The compiler looks for a lowercase source folder
+        if not (target / "source").exists() and (target / "Source").exists():
+            (target / "Source").rename(target / "source")
+        projects.append(target / proj_file.name)
+    return projects
+
+
+def scaling_slopes(synthetic: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Fit time ~ lines^k per stage over the synthetic cases (least squares on log-log)
+
+    Returns:
+        Stage name -> slope k (1.0 is linear)
+    """
+    cases = [case for case in synthetic.values() if "stages" in case]
+    if len(cases) < 2:
+        return {}
+
+    slopes = {}
+    for stage in cases[0]["stages"]:
+        points = [(math.log(case["lines"]), math.log(max(case["stages"][stage]["min_ms"], 1e-3)))
+                  for case in cases]
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        if var_x == 0:
+            continue
+        slopes[stage] = round(sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x, 3)
+    return slopes
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare median stage times with a stored baseline
+
+    Args:
+        results: Results from this run
+        baseline: Results stored earlier
+        tolerance: Allowed slowdown ratio, e.g. 0.25 for 25%
+
+    Returns:
+        One message per regressed case/stage
+    """
+    regressions = []
+    for group in ("synthetic", "projects"):
+        for case_name, case in results.get(group, {}).items():
+            base_case = baseline.get(group, {}).get(case_name, {})
+            for stage, timing in case.get("stages", {}).items():
+                base_timing = base_case.get("stages", {}).get(stage)
+                if base_timing is None:
+                    continue
+                new_ms, old_ms = timing["median_ms"], base_timing["median_ms"]
+                if new_ms > old_ms * (1 + tolerance) and new_ms - old_ms > REGRESSION_MIN_MS:
+                    regressions.append(f"{group}/{case_name}/{stage}: {old_ms:.3f} ms -> {new_ms:.3f} ms "
+                                       f"(+{(new_ms / old_ms - 1) * 100:.0f}%)")
+    return regressions
+
+
+def run_suite(sizes: List[int], projects_dir: Optional[Path], repeat: int, seed: int) -> Dict[str, Any]:
+    """Run the synthetic and real-project benchmarks and return the results document"""
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "synthetic": {},
+        "projects": {},
+    }
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ecf_bench_"))
+    try:
+        for lines in sizes:
+            name = f"synth_{lines}"
+            proj_file = write_project(work_dir / name, name, lines, seed)
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            results["synthetic"][name] = ProjectBench(proj_file, repeat).run()
+
+        if projects_dir is not None and projects_dir.exists():
+            for proj_file in copy_real_projects(projects_dir, work_dir):
+                name = proj_file.parent.name
+                print(f"Benchmarking {name}...", file=sys.stderr)
+                results["projects"][name] = ProjectBench(proj_file, repeat).run()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results["scaling"] = scaling_slopes(results["synthetic"])
+    return results
+
+
+def print_report(results: Dict[str, Any], stream) -> None:
+    """Print a per-case table of median stage times"""
+    for group in ("synthetic", "projects"):
+        for case_name, case in results[group].items():
+            if "stages" not in case:
+                print(f"{case_name}: FAILED {case.get('error')}", file=stream)
+                continue
+            print(f"{case_name} ({case['lines']} lines, {case['rom_size']} bytes)", file=stream)
+            for stage, timing in case["stages"].items():
+                print(f"  {stage:<20} {timing['median_ms']:>10.3f} ms", file=stream)
+
+    if results["scaling"]:
+        print("Scaling (time ~ lines^k):", file=stream)
+        for stage, slope in results["scaling"].items():
+            flag = "  SUPER-LINEAR" if slope > SUPERLINEAR_SLOPE else ""
+            print(f"  {stage:<20} k={slope:.2f}{flag}", file=stream)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point
+
+    Returns:
+        0 if no regression or super-linear stage was found, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ECF assembler benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated synthetic program sizes in lines")
+    parser.add_argument("--projects", type=Path, default=DEFAULT_PROJECTS,
+                        help="folder of real projects to benchmark (default: Design/Code)")
+    parser.add_argument("--no-projects", action="store_true", help="only run the synthetic programs")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic programs")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="results JSON file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run_suite(sizes, None if args.no_projects else args.projects, args.repeat, args.seed)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print_report(results, sys.stdout)
+    print(f"Results written to {args.output}")
+
+    failed = False
+    superlinear = [stage for stage, slope in results["scaling"].items() if slope > SUPERLINEAR_SLOPE]
+    if superlinear:
+        print(f"Super-linear stages: {', '.join(superlinear)}")
+        failed = True
+
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            failed = True
+        else:
+            print(f"No regressions against {args.baseline}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if failed else 0
@@ -0,0 +1,152 @@
+import math
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+# Synthetic ISA covering every parameter format the compiler understands
+# (address, name, length, leading_nops, format)
+SYNTH_INSTRUCTIONS = [
+    (1, "RETI", 1, 1, "INS"),
+    (16, "JMPF", 2, 1, "INS_NUM"),
+    (17, "JMPB", 2, 1, "INS_NUM"),
+    (18, "SETB", 2, 0, "INS_WRT"),
+    (19, "PUSH", 2, 0, "INS_READ"),
+    (32, "JMPA", 3, 1, "INS_16ADD"),
+    (33, "MOV", 3, 0, "INS_WRT_READ"),
+    (34, "MOVD", 3, 0, "INS_WRT_NUM"),
+    (48, "CJNZ", 3, 1, "INS_NUM_READ"),
+]
+SYNTH_WRITE_REGISTERS = 32
+SYNTH_READ_REGISTERS = 32
+
+_SIZES = {name: length + nops for _, name, length, nops, _ in SYNTH_INSTRUCTIONS}
+
+BLOCK_INSTRUCTIONS = 4  # Instructions between labels (dense labels)
+ORG_EVERY = 25  # Blocks between ORG commands
+DB_EVERY = 10  # Blocks between DB tables
+DB_TABLE_LINES = 4  # Lines per DB table
+DB_LINE_BYTES = 32  # Values per DB line
+
+
+def generate_asm(lines: int, seed: int = 1) -> Tuple[str, int]:
+    """
+    Generate an ECF ASM program of about the requested number of lines
+
+    Args:
+        lines: Number of source lines to generate (labels, ORGs and DB lines count)
+        seed: Random seed, the same seed always gives the same program
+
+    Returns:
+        (program text, one past the highest address it uses)
+    """
+    rng = random.Random(seed)
+    out = ["ORG 0:"]
+    address = 0
+    block = 0
+    labels = []  # Labels defined so far
+    next_org = False
+
+    while len(out) < lines:
+        label = f"L{block}"
+        out.append(f"{label}:")
+        labels.append(label)
+
+        # Decide now whether this block ends with an ORG, forward offsets must stay in the region
+        next_org = (block + 1) % ORG_EVERY == 0
+        next_label = None if next_org else f"L{block + 1}"
+
+        for _ in range(BLOCK_INSTRUCTIONS):
+            name, params = _random_instruction(rng, labels, next_label)
+            out.append(f"    {name} {' '.join(params)}".rstrip() + (" // synthetic" if rng.random() < 0.1 else ""))
+            address += _SIZES[name]
+
+        if block % DB_EVERY == DB_EVERY - 1:
+            for _ in range(DB_TABLE_LINES):
+                out.append("DB " + " ".join(_random_number(rng, 255) for _ in range(DB_LINE_BYTES)))
+                address += DB_LINE_BYTES
+
+        if next_org:
+            # Leave a gap so regions never overlap
+            address = (address + 64) // 32 * 32
+            out.append(f"ORG {address}:")
+
+        block += 1
+
+    # A final label so the last forward reference resolves
+    out.append(f"L{block}:")
+    out.append("    RETI")
+    address += _SIZES["RETI"]
+    return "\n".join(out) + "\n", address
+
+
+def _random_number(rng: random.Random, limit: int) -> str:
+    value = rng.randint(0, limit)
+    style = rng.random()
+    if style < 0.2:
+        return f"0x{value:02X}"
+    if style < 0.3:
+        return f"0b{value:b}"
+    return str(value)
+
+
+def _random_instruction(rng: random.Random, labels: List[str], next_label: str) -> Tuple[str, List[str]]:
+    """Pick an instruction and parameters that are valid at this point of the program"""
+    write = f"W{rng.randint(1, SYNTH_WRITE_REGISTERS)}"
+    read = f"R{rng.randint(1, SYNTH_READ_REGISTERS)}"
+    current = labels[-1]  # Defined at most a few instructions back, so offsets stay small
+    choice = rng.randrange(9)
+
+    if choice == 0:
+        return "RETI", []
+    if choice == 1 and next_label is not None:
+        return "JMPF", [next_label]
+    if choice in (1, 2):
+        return "JMPB", [current]
+    if choice == 3:
+        return "SETB", [write]
+    if choice == 4:
+        return "PUSH", [read]
+    if choice == 5:
+        return "JMPA", [rng.choice(labels)]
+    if choice == 6:
+        return "MOV", [write, read]
+    if choice == 7:
+        kind = rng.random()
+        if kind < 0.3:
+            return "MOVD", [write, f"{rng.choice('TB')}@{rng.choice(labels)}"]
+        return "MOVD", [write, _random_number(rng, 255)]
+    return "CJNZ", [current, read]
+
+
+def write_project(project_dir: Path, name: str, lines: int, seed: int = 1) -> Path:
+    """
+    Write a complete synthetic project (ecfproj, ecfASM and ISA tables)
+
+    Args:
+        project_dir: Folder to create the project in
+        name: Project base name
+        lines: Number of ASM source lines
+        seed: Random seed for the program
+
+    Returns:
+        Path to the .ecfproj file
+    """
+    asm, end_address = generate_asm(lines, seed)
+    program_counter_size = max(13, math.ceil(math.log2(end_address + 1)))
+
+    source_dir = project_dir / "source"
+    source_dir.mkdir(parents=True, exist_ok=True)
+
+    (project_dir / f"{name}.ecfASM").write_text(asm)
+    (project_dir / f"{name}.ecfproj").write_text(
+        f"ProjectName={name}\nReadSpace=false\nWriteSpace=false\nInstructionSpace=false\n"
+        f"ProgramCounterSize={program_counter_size}\nBusWidth=8\n")
+    (source_dir / f"{name}.ecfINST").write_text("".join(
+        f"{address}\t{inst}\t{length}\t{nops}\t{fmt}\tSynthetic {fmt}\n"
+        for address, inst, length, nops, fmt in SYNTH_INSTRUCTIONS))
+    (source_dir / f"{name}.ecfADDW").write_text("".join(
+        f"{i}\tW{i}\tWrite register {i}\n" for i in range(1, SYNTH_WRITE_REGISTERS + 1)))
+    (source_dir / f"{name}.ecfADDR").write_text("".join(
+        f"{i}\tR{i}\tRead register {i}\n" for i in range(1, SYNTH_READ_REGISTERS + 1)))
+
+    return project_dir / f"{name}.ecfproj"
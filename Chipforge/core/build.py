@@ -0,0 +1,335 @@
+"""
+Headless ECF project builder and flasher
+
+Usage (from the Chipforge folder):
+    python -m core build PATH [PATH ...] [-j JOBS] [--format text|json] [--release] [--no-cache] [--no-output]
+                         [--profile]
+    python -m core flash PROJECT [-p PORT ...] [--all] [--device PART] [--no-compile] [--full] [--no-verify]
+                         [--fill BYTE] [--records DIR] [--format text|json]
+
+PATH is an .ecfproj file or a folder searched recursively for them.
+Independent projects are built in a process pool. The exit code is 0 when
+every project compiled, 1 when any failed and 2 when no project was found.
+
+flash compiles one project, programs the changed pages of its image into every
+programmer given with -p (auto-detected ECF_PRG ports otherwise, "standin" for the
+in-process stand-in) and CRC-validates the whole image. The exit code is 0 when
+every device verified, 1 when the project didn't compile, 2 when no project was
+found or the arguments are invalid, 3 when no programmer was found and 4 when
+programming or verification failed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+_LINE_PREFIX = re.compile(r'^Line (\d+): ')
+
+
+def find_projects(paths: List[str]) -> List[Path]:
+    """
+    Expand files and folders into a sorted list of .ecfproj files
+
+    Args:
+        paths: .ecfproj files or folders to search recursively
+
+    Returns:
+        Unique project file paths in sorted order
+    """
+    projects = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            projects.update(p for p in path.rglob("*") if p.suffix.lower() == ".ecfproj" and p.is_file())
+        elif path.suffix.lower() == ".ecfproj" and path.is_file():
+            projects.add(path)
+    return sorted(p.resolve() for p in projects)
+
+
+def make_diagnostic(message: str, proj_path: Path) -> Dict[str, Any]:
+    """
+    Turn a compiler error message into a diagnostic
+    Messages starting with "Line N:" point at the project's .ecfASM file, others at the project file
+
+    Args:
+        message: Error message from the compiler
+        proj_path: Path to the .ecfproj file
+
+    Returns:
+        Diagnostic with severity, file, line (or None) and message
+    """
+    match = _LINE_PREFIX.match(message)
+    if match:
+        asm_path = proj_path.with_suffix(".ecfASM")
+        return {"severity": "error", "file": str(asm_path), "line": int(match.group(1)),
+                "message": message[match.end():]}
+    return {"severity": "error", "file": str(proj_path), "line": None, "message": message}
+
+
+def build_project(proj_file: str, debug_output: Optional[str] = None, use_cache: bool = True,
+                  write_output: bool = True, verbose: bool = False, profile: bool = False) -> Dict[str, Any]:
+    """
+    Compile one project and optionally write its output files
+    Runs in a worker process, so it only takes and returns plain data
+
+    Args:
+        proj_file: Path to the .ecfproj file
+        debug_output: Debug output mode passed to ECFCompiler (None uses the project setting)
+        use_cache: Use the project's build cache
+        write_output: Generate rom_data.h, .ecfROM and MATLAB files
+        verbose: Show the compiler's console output on stderr instead of discarding it
+        profile: Track peak memory per stage and write Debug/<name>_TRACE.json
+
+    Returns:
+        Build report with ok flag, diagnostics, stats and timing
+    """
+    from core.compiler_main import ECFCompiler
+    from core.output_generator import generate_output_files
+
+    proj_path = Path(proj_file)
+    report = {"project": proj_path.stem, "path": str(proj_path), "ok": False,
+              "diagnostics": [], "stats": {}, "profile": {}, "from_cache": False, "outputs": False,
+              "seconds": 0.0}
+    start = time.perf_counter()
+
+    # Compiler chatter goes to stderr when verbose so stdout stays machine-readable
+    console = contextlib.redirect_stdout(sys.stderr if verbose else io.StringIO())
+    try:
+        with console:
+            compiler = ECFCompiler(debug_output=debug_output, use_cache=use_cache, profile_memory=profile)
+            result = compiler.compile_project(str(proj_path))
+            if result is not None:
+                report["ok"] = True
+                report["stats"] = result.stats
+                report["from_cache"] = compiler.from_cache
+                if write_output:
+                    report["outputs"] = generate_output_files(result, str(proj_path.parent), compiler.profiler)
+                    if not report["outputs"]:
+                        report["ok"] = False
+                        report["diagnostics"].append(make_diagnostic("Could not write output files", proj_path))
+                report["profile"] = result.profile
+                if compiler.debug_manager is not None:
+                    compiler.debug_manager.flush()
+            else:
+                report["diagnostics"] = [make_diagnostic(error, proj_path) for error in compiler.get_errors()]
+            if profile:
+                compiler.save_chrome_trace()
+    except Exception as e:
+        report["diagnostics"].append(make_diagnostic(f"Unexpected error: {e}", proj_path))
+
+    report["seconds"] = round(time.perf_counter() - start, 4)
+    return report
+
+
+def build_projects(projects: List[Path], jobs: int = 1, **options) -> List[Dict[str, Any]]:
+    """
+    Build several projects, in a process pool when jobs > 1
+
+    Args:
+        projects: Project files to build
+        jobs: Number of worker processes
+        options: Keyword options passed to build_project
+
+    Returns:
+        Build reports in the same order as projects
+    """
+    if jobs <= 1 or len(projects) <= 1:
+        return [build_project(str(project), **options) for project in projects]
+
+    reports = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(projects))) as pool:
+        futures = {pool.submit(build_project, str(project), **options): project for project in projects}
+        for future in as_completed(futures):
+            reports[futures[future]] = future.result()
+    return [reports[project] for project in projects]
+
+
+def _print_text(reports: List[Dict[str, Any]], stream) -> None:
+    for report in reports:
+        status = "ok" if report["ok"] else "FAILED"
+        cached = " (cached)" if report["from_cache"] else ""
+        size = f", {report['stats'].get('rom_size', 0)} bytes" if report["ok"] else ""
+        print(f"{report['project']}: {status}{cached}{size} in {report['seconds']:.3f}s", file=stream)
+        for diagnostic in report["diagnostics"]:
+            location = f":{diagnostic['line']}" if diagnostic["line"] is not None else ""
+            print(f"  {diagnostic['file']}{location}: {diagnostic['severity']}: {diagnostic['message']}", file=stream)
+
+    failed = sum(1 for report in reports if not report["ok"])
+    print(f"{len(reports) - failed} succeeded, {failed} failed", file=stream)
+
+
+def _add_build_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("paths", nargs="+", help=".ecfproj files or folders to search for them")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="report format")
+    parser.add_argument("--release", action="store_true", help="skip debug stage dumps")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the build cache")
+    parser.add_argument("--no-output", action="store_true", help="don't write rom_data.h/.ecfROM/MATLAB files")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show compiler console output")
+    parser.add_argument("--profile", action="store_true",
+                        help="track peak memory per stage and write Debug/<name>_TRACE.json (Chrome trace)")
+
+
+def run_build(args: argparse.Namespace) -> int:
+    """Run the build command and return the process exit code"""
+    projects = find_projects(args.paths)
+    if not projects:
+        print("No .ecfproj files found", file=sys.stderr)
+        return 2
+
+    reports = build_projects(projects, jobs=args.jobs,
+                             debug_output="off" if args.release else None,
+                             use_cache=not args.no_cache,
+                             write_output=not args.no_output,
+                             verbose=args.verbose,
+                             profile=args.profile)
+
+    ok = all(report["ok"] for report in reports)
+    if args.format == "json":
+        json.dump({"ok": ok, "projects": reports}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        _print_text(reports, sys.stdout)
+    return 0 if ok else 1
+
+
+def _byte(text: str) -> int:
+    """argparse type for a byte value in decimal or 0x hex"""
+    try:
+        value = int(text, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid byte value '{text}'")
+    if not 0 <= value <= 0xFF:
+        raise argparse.ArgumentTypeError(f"byte value {text} is out of range 0-255")
+    return value
+
+
+def _add_flash_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("project", help=".ecfproj file, or a folder holding exactly one")
+    parser.add_argument("-p", "--port", action="append", dest="ports", metavar="PORT",
+                        help="programmer port, repeat to program several at once; 'standin[:option=value,...]' "
+                             "for the in-process stand-in (default: auto-detect)")
+    parser.add_argument("--all", action="store_true", help="program every auto-detected programmer")
+    parser.add_argument("--device", help="EEPROM part (default: the project's Device setting)")
+    parser.add_argument("--no-compile", action="store_true", help="flash the existing .ecfROM without compiling")
+    parser.add_argument("--full", action="store_true", help="write every used page, ignoring the device records")
+    parser.add_argument("--no-verify", action="store_true", help="skip the CRC validation after programming")
+    parser.add_argument("--fill", type=_byte, help="byte for the addresses the image doesn't use, e.g. 0xFF")
+    parser.add_argument("--records", help="device record folder (default: ~/.ecf/device_records)")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="report format")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show compiler output and programming progress")
+
+
+def _flash_ports(args: argparse.Namespace) -> List[str]:
+    """Ports given with -p, else the auto-detected programmers; empty when there is no usable choice"""
+    if args.ports:
+        return args.ports
+
+    from core.programmer import find_ecf_programmer
+    detected = [port_info["port"] for port_info in find_ecf_programmer(verbose=args.verbose)]
+    if not detected:
+        print("No ECF_PRG programmer found, connect one or pass -p PORT (-p standin for the stand-in)",
+              file=sys.stderr)
+    elif len(detected) > 1 and not args.all:
+        print(f"{len(detected)} programmers found ({', '.join(detected)}), pass -p PORT or --all", file=sys.stderr)
+        return []
+    return detected
+
+
+def _flash_result(result) -> Dict[str, Any]:
+    """Plain-data form of a GangResult for the JSON report"""
+    report = result.report
+    return {"port": result.port_name, "device_id": result.device_id, "ok": result.passed,
+            "mode": report.mode if report else None, "reason": report.reason if report else "",
+            "bytes_written": report.bytes_written if report else 0, "blocks": len(report.blocks) if report else 0,
+            "mismatches": len(result.mismatches), "error": result.error, "seconds": round(result.seconds, 4)}
+
+
+def run_flash(args: argparse.Namespace) -> int:
+    """Run the flash command and return the process exit code"""
+    from core.compiler.rom_image import RomImage
+    from core.programmer import DeviceRecordStore, run_gang
+    from core.devices import get_device_profile, device_for_project
+
+    projects = find_projects([args.project])
+    if len(projects) != 1:
+        print(f"Expected one .ecfproj file, found {len(projects)}", file=sys.stderr)
+        return 2
+    project = projects[0]
+
+    try:
+        device = get_device_profile(args.device) if args.device else device_for_project(project)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    build = None
+    if not args.no_compile:
+        build = build_project(str(project), verbose=args.verbose)
+        if not build["ok"]:
+            if args.format == "json":
+                json.dump({"ok": False, "build": build, "programmers": []}, sys.stdout, indent=2)
+                sys.stdout.write("\n")
+            else:
+                _print_text([build], sys.stdout)
+            return 1
+
+    try:
+        image = RomImage.from_output(project.parent / "Output", project.stem)
+    except (OSError, ValueError) as e:
+        print(f"Could not load the ROM image: {e}", file=sys.stderr)
+        return 1
+
+    ports = _flash_ports(args)
+    if not ports:
+        return 3
+
+    def show_progress(result) -> None:
+        # Status changes only, per-page progress would flood the console
+        if result.status != shown.get(result.port_name):
+            shown[result.port_name] = result.status
+            print(result.describe(), file=sys.stderr)
+
+    shown = {}
+    report = run_gang(ports, image, device, store=DeviceRecordStore(args.records), validate=not args.no_verify,
+                      fill_value=args.fill, full=args.full, on_update=show_progress if args.verbose else None)
+
+    if args.format == "json":
+        json.dump({"ok": report.ok, "build": build, "device": device.name, "image_bytes": len(image),
+                   "seconds": round(report.seconds, 4), "programmers": [_flash_result(r) for r in report.results]},
+                  sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        if build is not None:
+            _print_text([build], sys.stdout)
+        print(report.summary())
+    return 0 if report.ok else 4
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create the command-line parser with one sub-command per tool"""
+    parser = argparse.ArgumentParser(prog="python -m core", description="ECF command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="compile .ecfproj projects")
+    _add_build_arguments(build)
+    build.set_defaults(handler=run_build)
+
+    flash = commands.add_parser("flash", help="compile a project and program it into ECF_PRG programmers")
+    _add_flash_arguments(flash)
+    flash.set_defaults(handler=run_flash)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    args = create_parser().parse_args(argv)
+    return args.handler(args)
@@ -6,6 +6,11 @@ This package contains helper modules for the ECF compiler:
 - spacer: Code spacing and formatting
 - addresser: Address resolution and symbolic reference handling
 - implementation: Final machine code generation with comments
+- instruction_set: Name-indexed ISA lookups shared by all stages
+- rom_image: Byte image of program memory with a used-address bitmap
+- compile_result: In-memory result of a successful compile
+- build_cache: Content-hash cache of loaded tables, parsed ASM and results
+- profiler: Per-stage wall/CPU time and peak memory instrumentation
 - file_loader: Generic file loading with validation
 - debug_manager: Debug output management
 """
@@ -14,6 +19,11 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 
 # You can expose commonly used classes at package level if desired
+from .instruction_set import ECFInstructionSet
+from .rom_image import RomImage
+from .compile_result import CompileResult
+from .build_cache import BuildCache
+from .profiler import CompileProfiler
 from .parser import ECFParser
 from .spacer import ECFSpacer
 from .addresser_main import ECFAddresser
@@ -22,6 +32,11 @@ from .file_loader import ECFFileLoader, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA
 from .debug_manager import DebugManager
 
 __all__ = [
+    'ECFInstructionSet',
+    'RomImage',
+    'CompileResult',
+    'BuildCache',
+    'CompileProfiler',
     'ECFParser',
     'ECFSpacer',
     'ECFAddresser',
@@ -1,4 +1,5 @@
 from typing import List, Optional
+from ..ir import DataBytes
 
 
 class DBHandler:
@@ -9,65 +10,31 @@ class DBHandler:
     def __init__(self):
         self.errors = []
 
-    def is_db_line(self, line: str) -> bool:
+    def process_db(self, data: DataBytes) -> Optional[List[int]]:
         """
-        Check if a line is a DB (Data Byte) command
+        Validate a DB (Data Byte) statement before it is expanded vertically
 
         Args:
-            line: The line to check
+            data: The DB statement to process (e.g., DB 0 36 186 182 116 230 94 164 254 244)
 
         Returns:
-            True if it's a DB line, False otherwise
-        """
-        return line.strip().upper().startswith('DB ')
-
-    def process_db_line(self, line: str, line_num: int) -> Optional[List[str]]:
-        """
-        Process a DB (Data Byte) line by expanding it vertically
-
-        Args:
-            line: The DB line to process (e.g., "DB 0 36 186 182 116 230 94 164 254 244")
-            line_num: Line number for error reporting
-
-        Returns:
-            List of individual byte values as strings, or None if error
+            List of individual byte values, or None if error
         """
         try:
-            # Remove the "DB " prefix (case insensitive)
-            content = line[3:].strip()  # Remove first 3 characters ("DB ")
-
-            if not content:
-                self.errors.append(f"Line {line_num}: DB line has no data bytes")
+            if not data.values:
+                self.errors.append(f"Line {data.line_num}: DB line has no data bytes")
                 return None
 
-            # Split by whitespace to get individual byte values
-            byte_strings = content.split()
-            result_lines = []
-
-            for i, byte_str in enumerate(byte_strings):
-                byte_str = byte_str.strip()
-                if not byte_str:
-                    continue  # Skip empty strings from multiple spaces
-
-                # Validate that each value is a valid byte (0-255)
-                try:
-                    byte_value = int(byte_str)
-                    if byte_value < 0 or byte_value > 255:
-                        self.errors.append(f"Line {line_num}: Byte value {byte_value} is out of range (0-255)")
-                        return None
-                    result_lines.append(str(byte_value))
-                except ValueError:
-                    self.errors.append(f"Line {line_num}: '{byte_str}' is not a valid integer")
+            # Validate that each value is a valid byte (0-255)
+            for byte_value in data.values:
+                if byte_value < 0 or byte_value > 255:
+                    self.errors.append(f"Line {data.line_num}: Byte value {byte_value} is out of range (0-255)")
                     return None
 
-            if not result_lines:
-                self.errors.append(f"Line {line_num}: No valid byte values found in DB line")
-                return None
-
-            return result_lines
+            return data.values
 
         except Exception as e:
-            self.errors.append(f"Line {line_num}: Error processing DB line: {e}")
+            self.errors.append(f"Line {data.line_num}: Error processing DB line: {e}")
             return None
 
     def validate_byte_value(self, value_str: str) -> bool:
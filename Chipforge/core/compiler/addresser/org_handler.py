@@ -1,119 +1,87 @@
-from typing import List, Tuple, Optional
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class OrgRegion:
+    """A contiguous block of addresses filled after one ORG command"""
+    start: int
+    end: int  # Exclusive
+    line_num: int  # Line of the ORG command, 0 for code before the first ORG
+
+    def describe(self) -> str:
+        origin = f"ORG {self.start} (line {self.line_num})" if self.line_num else "code before first ORG"
+        return f"{origin} [{self.start}-{self.end - 1}]"
 
 
 class ORGHandler:
     """
     Handles ORG command validation and processing
+    Region sizes are tracked while the addresser assigns addresses, so validation needs no extra pass
     """
 
     def __init__(self):
         self.errors = []
+        self.regions = []  # Closed, non-empty regions in source order
+        self._region_start = 0
+        self._region_line = 0
 
-    def validate_org_commands(self, lines: List[str]) -> bool:
+    def reset(self) -> None:
+        """Clear errors and regions before a new addressing run"""
+        self.errors = []
+        self.regions = []
+        self._region_start = 0
+        self._region_line = 0
+
+    def start_region(self, org_address: int, line_num: int, current_address: int) -> None:
         """
-        Validate ORG commands for proper ordering and spacing
+        Close the running region and open a new one at an ORG command
 
         Args:
-            lines: List of all lines in the code
-
-        Returns:
-            True if ORG commands are valid, False if errors found
+            org_address: Address given by the ORG command
+            line_num: Line number of the ORG command
+            current_address: Address counter when the ORG was reached (end of the running region)
         """
-        try:
-            self.errors = []  # Clear previous errors
-            org_info = []  # List of (org_address, line_num, content_start_line)
-
-            # Find all ORG commands and their positions
-            for line_num, line in enumerate(lines):
-                line = line.strip()
-                if line.upper().startswith('ORG ') and line.endswith(':'):
-                    # Extract ORG address
-                    org_part = line[4:-1].strip()  # Remove "ORG " and ":"
-                    try:
-                        org_address = int(org_part)
-                        org_info.append((org_address, line_num + 1, line_num + 1))  # +1 for 1-based line numbering
-                    except ValueError:
-                        self.errors.append(f"Line {line_num + 1}: Invalid ORG address '{org_part}', must be an integer")
-                        return False
-
-            if not org_info:
-                # No ORG commands found, that's okay
-                return True
-
-            # Sort by ORG address to check ordering
-            org_info_sorted = sorted(org_info, key=lambda x: x[0])
-
-            # Check if ORGs are in order (by line number)
-            for i in range(len(org_info) - 1):
-                current_org = org_info[i]
-                next_org = org_info[i + 1]
-
-                # Check if addresses are in ascending order by line appearance
-                if current_org[0] >= next_org[0]:
-                    self.errors.append(f"Line {next_org[1]}: ORG {next_org[0]} must come after ORG {current_org[0]} "
-                                       f"(line {current_org[1]}) in ascending order")
-                    return False
-
-            # Check spacing between ORGs
-            for i in range(len(org_info) - 1):
-                current_org_addr, current_line_num, _ = org_info[i]
-                next_org_addr, next_line_num, _ = org_info[i + 1]
-
-                # Count non-empty lines between current ORG and next ORG
-                content_lines = 0
-                for line_idx in range(current_line_num,
-                                      next_line_num - 1):  # -1 because we don't count the next ORG line
-                    if line_idx < len(lines) and lines[line_idx].strip():
-                        content_lines += 1
-
-                # Calculate available space
-                available_space = next_org_addr - current_org_addr
-
-                # Check if content fits in available space
-                if content_lines > available_space:
-                    self.errors.append(
-                        f"Line {current_line_num}: ORG {current_org_addr} has {content_lines} lines of content "
-                        f"but only {available_space} spaces available before ORG {next_org_addr} (line {next_line_num})")
-                    return False
-
-            return True
-
-        except Exception as e:
-            self.errors.append(f"Error validating ORG commands: {e}")
-            return False
+        self._close_region(current_address)
+        self._region_start = org_address
+        self._region_line = line_num
 
-    def is_org_line(self, line: str) -> bool:
+    def finish_regions(self, current_address: int) -> bool:
         """
-        Check if a line is an ORG command
+        Close the last region and check that no two regions overlap
 
         Args:
-            line: The line to check
+            current_address: Address counter after the last word
 
         Returns:
-            True if it's an ORG line, False otherwise
+            True if ORG regions are valid, False if errors found
         """
-        line = line.strip()
-        return line.upper().startswith('ORG ') and line.endswith(':')
+        try:
+            self._close_region(current_address)
 
-    def extract_org_address(self, line: str) -> Optional[int]:
-        """
-        Extract the address from an ORG command line
+            # Sorted by start, any overlap shows up between neighbours
+            ordered = sorted(self.regions, key=lambda region: region.start)
+            furthest = None  # Region reaching highest so far
+            for region in ordered:
+                if furthest is not None and region.start < furthest.end:
+                    self.errors.append(f"ORG regions overlap: {furthest.describe()} and {region.describe()}")
+                if furthest is None or region.end > furthest.end:
+                    furthest = region
 
-        Args:
-            line: The ORG line (e.g., "ORG 100:")
+            return not self.errors
 
-        Returns:
-            The ORG address as integer, or None if invalid
-        """
-        try:
-            line = line.strip()
-            if not self.is_org_line(line):
-                return None
+        except Exception as e:
+            self.errors.append(f"Error validating ORG commands: {e}")
+            return False
+
+    def _close_region(self, current_address: int) -> None:
+        """Record the running region if anything was placed in it"""
+        if current_address > self._region_start:
+            self.regions.append(OrgRegion(self._region_start, current_address, self._region_line))
 
-            org_part = line[4:-1].strip()  # Remove "ORG " and ":"
-            return int(org_part)
-        except ValueError:
-            return None
+    def get_regions(self) -> List[OrgRegion]:
+        """Return the non-empty regions found in the last addressing run"""
+        return self.regions.copy()
 
     def get_errors(self) -> List[str]:
         """Return the list of ORG validation errors"""
@@ -121,4 +89,4 @@ class ORGHandler:
 
     def has_errors(self) -> bool:
         """Check if there are any ORG validation errors"""
-        return len(self.errors) > 0
\ No newline at end of file
+        return len(self.errors) > 0
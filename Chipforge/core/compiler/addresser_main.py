@@ -1,4 +1,8 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Any
+from .instruction_set import ECFInstructionSet
+from .ir import OrgDirective, LabelDef, DataBytes, Opcode, AddressedCode
+from .rom_image import RomImage, DEFAULT_PROGRAM_COUNTER_SIZE
+from .profiler import CompileProfiler
 from .addresser.org_handler import ORGHandler
 from .addresser.db_handler import DBHandler
 from .addresser.lbl_handler import LBLHandler
@@ -10,109 +14,117 @@ class ECFAddresser:
     Separates addressing logic from the main compiler
     """
 
-    def __init__(self, instructions: Dict[int, Dict[str, Any]],
-                 write_addresses: Dict[int, Dict[str, Any]],
-                 read_addresses: Dict[int, Dict[str, Any]]):
+    def __init__(self, instruction_set: ECFInstructionSet, memory_size: int = 2 ** DEFAULT_PROGRAM_COUNTER_SIZE,
+                 profiler: Optional[CompileProfiler] = None):
         """
         Initialize the addresser with instruction and address definitions
 
         Args:
-            instructions: Dictionary of instruction definitions from compiler
-            write_addresses: Dictionary of write address definitions from compiler
-            read_addresses: Dictionary of read address definitions from compiler
+            instruction_set: Name-indexed instruction set from compiler
+            memory_size: Number of addressable bytes (2 ** ProgramCounterSize)
+            profiler: Records time spent in each handler (optional)
         """
-        self.instructions = instructions
-        self.write_addresses = write_addresses
-        self.read_addresses = read_addresses
+        self.instruction_set = instruction_set
+        self.memory_size = memory_size
+        self.profiler = profiler if profiler is not None else CompileProfiler(enabled=False)
         self.errors = []
 
         # Initialize handlers
         self.org_handler = ORGHandler()
         self.db_handler = DBHandler()
         self.lbl_handler = LBLHandler()
-        self.lbl_handler = LBLHandler(self.instructions)
 
-    def address_code(self, spaced_content: str) -> Optional[str]:
+    def address_code(self, spaced_words: List[Any]) -> Optional[AddressedCode]:
         """
-        Process spaced ASM content and generate addressed code
-        Handles DB (Data Byte) line expansion, ORG command validation and addressing
+        Process spaced words and generate addressed code
+        Handles DB (Data Byte) expansion, ORG command validation and addressing
 
         Args:
-            spaced_content: The spaced ASM content from spacer
+            spaced_words: The spaced words from spacer
 
         Returns:
-            Addressed code content as string if successful, None if failed
+            Addressed code (ROM image plus instruction words by address) if successful, None if failed
         """
         try:
             self.errors = []  # Clear previous errors
             self._clear_handler_errors()
 
-            lines = spaced_content.splitlines()
-
-            # First pass: validate ORG commands
-            if not self.org_handler.validate_org_commands(lines):
-                self._collect_handler_errors()
-                return None  # Error occurred in ORG validation
-
-            # Second pass: process lines and handle ORG addressing
+            # First pass: lay words out by address, recording ORG regions, labels and fixups
             address_counter = 0
-            addressed_array = []
-            max_address = 0
-
-            for line_num, line in enumerate(lines, 1):
-                original_line = line
-                line = line.strip()
-
-                # Check if this is an ORG line
-                if self.org_handler.is_org_line(line):
-                    # Extract ORG address and set counter
-                    org_address = self.org_handler.extract_org_address(line)
-                    if org_address is not None:
-                        address_counter = org_address
-                        # ORG lines themselves don't get added to output
-                        continue
-                    else:
-                        # This should have been caught in validation, but just in case
-                        self.errors.append(f"Line {line_num}: Invalid ORG address in line '{line}'")
-                        return None
+            addressed = AddressedCode(RomImage(self.memory_size))
+            image = addressed.image
+            words = addressed.words
+            source_map = addressed.source_map
+            current_opcode = None  # Address and word of the instruction owning following operands
+            measure = self.profiler.measure
+
+            for word in spaced_words:
+                # ORG words close the running region, set the counter and don't get added to output
+                if isinstance(word, OrgDirective):
+                    with measure("ORGHandler.start_region"):
+                        self.org_handler.start_region(word.address, word.line_num, address_counter)
+                    address_counter = word.address
+                    continue
 
-                # Handle empty lines
-                if not line:
-                    # Extend array if needed and add 0
-                    self._extend_array_to_address(addressed_array, address_counter)
-                    addressed_array[address_counter] = "0"
-                    address_counter += 1
-                    max_address = max(max_address, address_counter - 1)
+                # Labels take no space, they name the current address
+                if isinstance(word, LabelDef):
+                    with measure("LBLHandler.define_label"):
+                        self.lbl_handler.define_label(word, address_counter)
                     continue
 
-                # Handle DB (Data Byte) lines
-                if self.db_handler.is_db_line(line):
-                    processed_bytes = self.db_handler.process_db_line(line, line_num)
+                # Handle DB (Data Byte) statements
+                if isinstance(word, DataBytes):
+                    with measure("DBHandler.process_db"):
+                        processed_bytes = self.db_handler.process_db(word)
                     if processed_bytes is None:
                         self._collect_handler_errors()
                         return None  # Error occurred
 
-                    # Add each byte to the addressed array
-                    for byte_value in processed_bytes:
-                        self._extend_array_to_address(addressed_array, address_counter)
-                        addressed_array[address_counter] = byte_value
-                        address_counter += 1
-                        max_address = max(max_address, address_counter - 1)
-                else:
-                    # Regular line - add to array at current address
-                    self._extend_array_to_address(addressed_array, address_counter)
-                    addressed_array[address_counter] = line
-                    address_counter += 1
-                    max_address = max(max_address, address_counter - 1)
-
-            # Third pass: Find and process labels from bottom to top
-            label_addresses = self.lbl_handler.find_and_process_labels(addressed_array)
+                    # Write the bytes into the image in one slice
+                    end_address = address_counter + len(processed_bytes)
+                    if not self._check_fits(end_address, word.line_num):
+                        return None
+                    image.write_block(address_counter, processed_bytes)
+                    source_map.update(dict.fromkeys(range(address_counter, end_address), word.line_num))
+                    address_counter = end_address
+                    continue
+
+                # Instruction word - reserve its address, the implementation encodes it later
+                if not self._check_fits(address_counter + 1, word.line_num):
+                    return None
+                image.write(address_counter, 0)
+                words[address_counter] = word
+                source_map[address_counter] = word.line_num
+
+                if isinstance(word, Opcode):
+                    current_opcode = (address_counter, word)
+                elif word.fixup is not None:
+                    fixup = word.fixup
+                    fixup.location = address_counter
+                    fixup.origin, owner = current_opcode
+                    fixup.length = owner.length
+                    self.lbl_handler.add_fixup(fixup)
+
+                address_counter += 1
+
+            # Check the ORG regions for overlaps
+            with self.profiler.stage("ORGHandler.finish_regions", "handler"):
+                regions_valid = self.org_handler.finish_regions(address_counter)
+            if not regions_valid:
+                self._collect_handler_errors()
+                return None
+
+            # Second pass: patch label references now that every label address is known
+            with self.profiler.stage("LBLHandler.resolve_fixups", "handler"):
+                self.lbl_handler.resolve_fixups(words)
 
             # Check for label processing errors
             if self.lbl_handler.has_errors():
                 self._collect_handler_errors()
                 return None
 
+            label_addresses = self.lbl_handler.get_label_addresses()
+
             # Print the stored dictionary
             print(f"\n=== LABEL ADDRESSES DICTIONARY ===")
             print(f"Total labels processed: {len(label_addresses)}")
@@ -120,33 +132,34 @@ class ECFAddresser:
                 print(f"'{label_name}' -> {address}")
             print("=" * 40)
 
-            # Convert array to output format without address numbers
-            result_lines = []
-            for i in range(len(addressed_array)):
-                result_lines.append(addressed_array[i])
-
-            return '\n'.join(result_lines)
+            return addressed
 
         except Exception as e:
             self.errors.append(f"Error in address_code processing: {e}")
             return None
 
-    def _extend_array_to_address(self, array: List[str], target_address: int) -> None:
+    def _check_fits(self, end_address: int, line_num: int) -> bool:
         """
-        Extend the array with zeros up to the target address if needed
+        Check that a word or data run ending before end_address fits in program memory
 
         Args:
-            array: The addressed array to extend
-            target_address: The address we need to reach
+            end_address: One past the last address being written
+            line_num: Source line for error reporting
+
+        Returns:
+            True if it fits, False (with an error recorded) otherwise
         """
-        while len(array) <= target_address:
-            array.append("0")
+        if end_address > self.memory_size:
+            self.errors.append(
+                f"Line {line_num}: Address {end_address - 1} is outside program memory (0-{self.memory_size - 1})")
+            return False
+        return True
 
     def _clear_handler_errors(self) -> None:
         """Clear errors from all handlers"""
+        self.org_handler.reset()
         self.db_handler.clear_errors()
-        self.lbl_handler.clear_errors()
-        # ORG handler doesn't have a clear_errors method, errors are cleared in validate_org_commands
+        self.lbl_handler.reset()
 
     def _collect_handler_errors(self) -> None:
         """Collect errors from all handlers into the main error list"""
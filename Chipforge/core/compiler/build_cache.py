@@ -0,0 +1,233 @@
+from pathlib import Path
+from typing import Optional, Any, List
+import hashlib
+import hmac
+import os
+import pickle
+
+CACHE_FORMAT = 3  # Bump when the layout of cached objects changes
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_SECRET_FILE = Path.home() / ".ecf" / "cache_key"  # Per-user key signing cache entries
+SECRET_BYTES = 32
+_SIGNATURE_BYTES = hashlib.sha256().digest_size  # HMAC-SHA256 in front of each pickled entry
+
+_fingerprint = None
+_secret = None
+
+
+def compiler_fingerprint() -> str:
+    """
+    Identify the compiler build so cache entries from other versions never match
+    Hashes the compiler sources when available (frozen builds fall back to the package version)
+
+    Returns:
+        Hex digest of the cache format, package version and compiler sources
+    """
+    global _fingerprint
+    if _fingerprint is None:
+        from . import __version__
+        digest = hashlib.sha256(f"{CACHE_FORMAT}:{__version__}".encode())
+        package_dir = Path(__file__).parent
+        # The device table decides the fit check, the programmer package plays no part in a compile
+        sources = sorted(package_dir.rglob("*.py")) + [package_dir.parent / "compiler_main.py",
+                                                        package_dir.parent / "devices.py"]
+        for source in sources:
+            try:
+                digest.update(source.read_bytes())
+            except OSError:
+                pass
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+def hash_file(file_path: Path) -> Optional[str]:
+    """Return the SHA-256 of a file's contents, or None if it can't be read"""
+    try:
+        return hashlib.sha256(file_path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def cache_secret(secret_file: Path = DEFAULT_SECRET_FILE) -> bytes:
+    """
+    Return the per-user key that signs cache entries, creating it on first use
+    It lives outside every project, so a cache folder copied from someone else never verifies
+
+    Args:
+        secret_file: File holding the key
+
+    Returns:
+        The key, a key for this process only if the file can't be read or created
+    """
+    global _secret
+    if _secret is None:
+        if not secret_file.exists():
+            _create_secret(secret_file)
+        try:
+            secret = secret_file.read_bytes()
+        except OSError:
+            secret = b""
+        # Without a usable key file, entries only verify within this process
+        _secret = secret if len(secret) == SECRET_BYTES else os.urandom(SECRET_BYTES)
+    return _secret
+
+
+def _create_secret(secret_file: Path) -> None:
+    """Write a new random key, unless another build process created one first"""
+    temp_path = secret_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        secret_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(SECRET_BYTES))
+        # Linking never replaces an existing key and never exposes a partly written one
+        os.link(temp_path, secret_file)
+    except OSError:
+        pass  # FileExistsError included, the caller reads whichever key won
+    finally:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def make_key(*parts: str) -> str:
+    """Combine the compiler fingerprint and content hashes into one cache key"""
+    return hashlib.sha256("\n".join((compiler_fingerprint(),) + parts).encode()).hexdigest()
+
+
+class BuildCache:
+    """
+    Content-addressed build cache stored in the project's Debug/.cache folder
+    Entries are pickled objects keyed by hashes of their inputs, so a changed input simply misses.
+    Each entry carries an HMAC under the user's cache_secret and is only unpickled once it verifies,
+    so opening a project from elsewhere can't run code hidden in its cache
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES, secret: Optional[bytes] = None):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Folder holding the cache entries (created on first store)
+            max_bytes: Total size above which the least recently used entries are evicted
+            secret: Key signing the entries, defaults to the user's cache_secret
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.secret = secret if secret is not None else cache_secret()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, kind: str, key: str) -> Optional[Any]:
+        """
+        Load an entry
+
+        Args:
+            kind: Entry kind (e.g., "tables", "parsed", "result")
+            key: Key built with make_key
+
+        Returns:
+            The cached object, or None on a miss or an unreadable or unsigned entry
+        """
+        entry_path = self._entry_path(kind, key)
+        try:
+            entry = entry_path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+
+        signature, payload = entry[:_SIGNATURE_BYTES], entry[_SIGNATURE_BYTES:]
+        try:
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                raise ValueError("Cache entry signature mismatch")
+            stored_kind, stored_key, value = pickle.loads(payload)
+        except Exception:
+            # Truncated, tampered or foreign entry - drop it and rebuild
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        if stored_kind != kind or stored_key != key:
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        # Mark as recently used for eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return value
+
+    def store(self, kind: str, key: str, value: Any) -> bool:
+        """
+        Store an entry atomically and evict old entries if over the size cap
+
+        Args:
+            kind: Entry kind (e.g., "tables", "parsed", "result")
+            key: Key built with make_key
+            value: Picklable object to store
+
+        Returns:
+            True if stored, False if the cache couldn't be written
+        """
+        entry_path = self._entry_path(kind, key)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            payload = pickle.dumps((kind, key, value), protocol=pickle.HIGHEST_PROTOCOL)
+            with open(temp_path, 'wb') as f:
+                f.write(self._sign(payload) + payload)
+            # Readers only ever see a complete entry
+            os.replace(temp_path, entry_path)
+        except Exception:
+            self._remove(temp_path)
+            return False
+
+        self._evict()
+        return True
+
+    def clear(self) -> None:
+        """Remove every cache entry"""
+        for entry_path in self._entries():
+            self._remove(entry_path)
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def _entry_path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / f"{kind}-{key}.pkl"
+
+    def _entries(self) -> List[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return list(self.cache_dir.glob("*.pkl"))
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry_path in self._entries():
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(entry_path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any
+from .rom_image import RomImage
+
+
+@dataclass
+class CompileResult:
+    """
+    Everything a successful compile produces
+    Output writers take this directly instead of re-reading the debug dumps
+    """
+    project_name: str
+    source_file: Path  # The .ecfASM file that was compiled
+    image: RomImage
+    symbols: Dict[str, int] = field(default_factory=dict)  # Label name -> address
+    source_map: Dict[int, int] = field(default_factory=dict)  # Address -> source line
+    comments: Dict[int, str] = field(default_factory=dict)  # Address -> encoding comment
+    stats: Dict[str, int] = field(default_factory=dict)
+    profile: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Stage -> timings, see CompileProfiler.as_dict
+
+    @property
+    def rom_bytes(self) -> bytes:
+        """ROM contents from address 0 up to the highest used address"""
+        return self.image.to_bytes()
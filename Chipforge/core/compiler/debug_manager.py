@@ -1,8 +1,74 @@
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Union
+import atexit
 import json
+import queue
+import threading
 from datetime import datetime
 
+# Debug output modes, chosen with the DebugOutput project setting or ECFCompiler(debug_output=...)
+DEBUG_SYNC = "sync"  # Write every stage dump during the compile (default)
+DEBUG_BACKGROUND = "background"  # Render and write stage dumps on a background writer thread
+DEBUG_OFF = "off"  # Release mode: no stage dumps or summary, only the compilation log
+
+_MODE_ALIASES = {"on": DEBUG_SYNC, "release": DEBUG_OFF, "none": DEBUG_OFF, "async": DEBUG_BACKGROUND}
+
+
+def resolve_debug_mode(value: Union[bool, str, None], default: str = DEBUG_SYNC) -> str:
+    """
+    Normalise a debug output option to one of DEBUG_SYNC, DEBUG_BACKGROUND or DEBUG_OFF
+
+    Args:
+        value: True/False, a mode name (or alias), or None for the default
+        default: Mode used for None or unrecognised values
+
+    Returns:
+        The debug output mode
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return DEBUG_SYNC if value else DEBUG_OFF
+    mode = str(value).strip().lower()
+    mode = _MODE_ALIASES.get(mode, mode)
+    return mode if mode in (DEBUG_SYNC, DEBUG_BACKGROUND, DEBUG_OFF) else default
+
+
+class _BackgroundWriter:
+    """Single writer thread shared by all debug managers, jobs run in submission order"""
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.errors = []
+
+    def submit(self, job: Callable[[], None]) -> None:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="ECFDebugWriter", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+        self.jobs.put(job)
+
+    def flush(self) -> None:
+        """Block until every submitted job has run"""
+        self.jobs.join()
+
+    def _run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            try:
+                job()
+            except Exception as e:
+                self.errors.append(str(e))
+                print(f"Debug writer error: {e}")
+            finally:
+                self.jobs.task_done()
+
+
+_background_writer = _BackgroundWriter()
+
 
 class DebugManager:
     """
@@ -10,15 +76,18 @@ class DebugManager:
     Handles creating debug directory and saving various output stages
     """
 
-    def __init__(self, project_dir: Path, base_name: str):
+    def __init__(self, project_dir: Path, base_name: str, mode: Union[bool, str] = DEBUG_SYNC):
         self.project_dir = project_dir
         self.base_name = base_name
+        self.mode = resolve_debug_mode(mode)
+        self.enabled = self.mode != DEBUG_OFF  # When False, stage dumps are never rendered or written
         self.debug_dir = project_dir / "Debug"
         self.debug_dir.mkdir(exist_ok=True)
 
     def save_stage(self, stage_name: str, content: str, extension: str = "txt") -> Path:
         """
         Save a compilation stage to debug directory
+        In background mode the write is queued and the path is returned straight away
 
         Args:
             stage_name: Name of the stage (e.g., "PARSED", "SPACED")
@@ -28,20 +97,75 @@ class DebugManager:
         Returns:
             Path to the saved file
         """
-        filename = f"{self.base_name}_{stage_name}.{extension}"
-        file_path = self.debug_dir / filename
+        file_path = self._stage_path(stage_name, extension)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        if self.mode == DEBUG_BACKGROUND:
+            _background_writer.submit(lambda: self._write(file_path, content))
+        else:
+            self._write(file_path, content)
 
         return file_path
 
-    def save_json_stage(self, stage_name: str, data: Dict[str, Any]) -> Path:
-        """Save structured data as JSON"""
+    def save_rendered_stage(self, stage_name: str, render: Callable[[], str]) -> Optional[Path]:
+        """
+        Render and save a compilation stage only if debug output is enabled
+        In background mode both rendering and writing happen on the writer thread,
+        so render must only read data that the rest of the compile no longer changes
+
+        Args:
+            stage_name: Name of the stage (e.g., "PARSED", "SPACED")
+            render: Callable producing the stage text
+
+        Returns:
+            Path to the saved file, or None if debug output is disabled
+        """
+        if self.mode == DEBUG_OFF:
+            return None
+        if self.mode == DEBUG_BACKGROUND:
+            file_path = self._stage_path(stage_name, "txt")
+            _background_writer.submit(lambda: self._write(file_path, render()))
+            return file_path
+        return self.save_stage(stage_name, render())
+
+    def save_stage_now(self, stage_name: str, render: Callable[[], str], extension: str = "txt") -> Path:
+        """
+        Render and write one stage immediately, whatever the debug output mode
+        Used to request a single stage on demand in release mode
+
+        Args:
+            stage_name: Name of the stage (e.g., "IMPLEMENTED")
+            render: Callable producing the stage text
+            extension: File extension (default: "txt")
+
+        Returns:
+            Path to the saved file
+        """
+        file_path = self._stage_path(stage_name, extension)
+        self._write(file_path, render())
+        return file_path
+
+    def flush(self) -> None:
+        """Wait until queued background writes are on disk"""
+        if self.mode == DEBUG_BACKGROUND:
+            _background_writer.flush()
+
+    def _stage_path(self, stage_name: str, extension: str) -> Path:
+        return self.debug_dir / f"{self.base_name}_{stage_name}.{extension}"
+
+    @staticmethod
+    def _write(file_path: Path, content: str) -> None:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def save_json_stage(self, stage_name: str, data: Dict[str, Any]) -> Optional[Path]:
+        """Save structured data as JSON, skipped when debug output is off"""
+        if self.mode == DEBUG_OFF:
+            return None
         return self.save_stage(stage_name, json.dumps(data, indent=2), "json")
 
-    def save_compilation_log(self, errors: list, warnings: list = None, info: list = None) -> Path:
-        """Save compilation log with errors, warnings, and info"""
+    def save_compilation_log(self, errors: list, warnings: list = None, info: list = None,
+                             timings: list = None) -> Path:
+        """Save compilation log with errors, warnings, info and stage timings"""
         log_content = []
         log_content.append(f"ECF Compilation Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         log_content.append("=" * 60)
@@ -64,10 +188,17 @@ class DebugManager:
         if not errors and not warnings:
             log_content.append("\nNo errors or warnings - compilation successful!")
 
+        if timings:
+            log_content.append(f"\nTIMING ({len(timings)} stages):")
+            for line in timings:
+                log_content.append(f"  {line}")
+
         return self.save_stage("LOG", "\n".join(log_content), "log")
 
-    def save_project_summary(self, compiler) -> Path:
-        """Save a summary of the loaded project data"""
+    def save_project_summary(self, compiler) -> Optional[Path]:
+        """Save a summary of the loaded project data, skipped when debug output is off"""
+        if self.mode == DEBUG_OFF:
+            return None
         summary = {
             "project_settings": compiler.project_settings,
             "write_addresses_count": len(compiler.write_addresses),
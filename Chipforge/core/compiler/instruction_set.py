@@ -0,0 +1,96 @@
+from typing import Dict, Any, Optional, Tuple
+
+
+class ECFInstructionSet:
+    """
+    Name-indexed view of the loaded ISA and address spaces
+    Built once per project so every compiler stage can resolve names in O(1)
+    """
+
+    def __init__(self, instructions: Dict[int, Dict[str, Any]],
+                 write_addresses: Dict[int, Dict[str, Any]],
+                 read_addresses: Dict[int, Dict[str, Any]]):
+        """
+        Build the lookup tables from the address-keyed dictionaries
+
+        Args:
+            instructions: Dictionary of instruction definitions from compiler
+            write_addresses: Dictionary of write address definitions from compiler
+            read_addresses: Dictionary of read address definitions from compiler
+        """
+        self.instructions = instructions
+        self.write_addresses = write_addresses
+        self.read_addresses = read_addresses
+
+        self.opcodes = {}  # name -> opcode (INST address)
+        self.lengths = {}  # name -> instruction length
+        self.leading_nops = {}  # name -> number of trailing NOP words
+        self.formats = {}  # name -> tuple of parameter formats, e.g. ('WRT', 'NUM')
+        self.write_lookup = {}  # name -> ADDW address
+        self.read_lookup = {}  # name -> ADDR address
+
+        # First definition wins, matching the order a linear scan would find
+        for opcode, inst_data in instructions.items():
+            name = inst_data['name']
+            if name in self.opcodes:
+                continue
+            self.opcodes[name] = opcode
+            self.lengths[name] = inst_data['length']
+            self.leading_nops[name] = inst_data['leading_nops']
+            self.formats[name] = self._split_format(inst_data['format'])
+
+        for address, write_data in write_addresses.items():
+            self.write_lookup.setdefault(write_data['name'], address)
+
+        for address, read_data in read_addresses.items():
+            self.read_lookup.setdefault(read_data['name'], address)
+
+    @staticmethod
+    def _split_format(instruction_format: str) -> Tuple[str, ...]:
+        """
+        Split an instruction format into its parameter formats
+
+        Args:
+            instruction_format: Format string from the INST file (e.g., "INS_WRT_NUM")
+
+        Returns:
+            Tuple of parameter formats without the leading INS part
+        """
+        if '_' not in instruction_format:
+            return ()
+        return tuple(instruction_format.split('_')[1:])
+
+    def has_instruction(self, name: str) -> bool:
+        """Check if an instruction with the given name exists"""
+        return name in self.opcodes
+
+    def get_opcode(self, name: str) -> Optional[int]:
+        """Return the opcode of an instruction, or None if not found"""
+        return self.opcodes.get(name)
+
+    def get_length(self, name: str) -> Optional[int]:
+        """Return the length of an instruction, or None if not found"""
+        return self.lengths.get(name)
+
+    def get_leading_nops(self, name: str) -> Optional[int]:
+        """Return the number of NOP words following an instruction, or None if not found"""
+        return self.leading_nops.get(name)
+
+    def get_param_formats(self, name: str) -> Optional[Tuple[str, ...]]:
+        """Return the parameter formats of an instruction, or None if not found"""
+        return self.formats.get(name)
+
+    def get_write_address(self, name: str) -> Optional[int]:
+        """Return the ADDW address for a name, or None if not found"""
+        return self.write_lookup.get(name)
+
+    def get_read_address(self, name: str) -> Optional[int]:
+        """Return the ADDR address for a name, or None if not found"""
+        return self.read_lookup.get(name)
+
+    def get_instruction(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the full instruction definition for a name, or None if not found"""
+        opcode = self.opcodes.get(name)
+        if opcode is None:
+            return None
+        return self.instructions[opcode]
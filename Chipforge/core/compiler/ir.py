@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Iterable
+from .rom_image import RomImage
+
+
+@dataclass
+class OrgDirective:
+    """ORG NUM: - moves the address counter to a fixed address"""
+    address: int
+    line_num: int
+
+    def render(self) -> str:
+        return f"ORG {self.address}:"
+
+
+@dataclass
+class LabelDef:
+    """WORD: - names the address of the next word"""
+    name: str
+    line_num: int
+
+    def render(self) -> str:
+        return f"{self.name}:"
+
+
+@dataclass
+class DataBytes:
+    """DB NUM NUM ... - raw data bytes placed one per address"""
+    values: List[int]
+    line_num: int
+
+    def render(self) -> str:
+        return "DB " + " ".join(str(value) for value in self.values)
+
+
+@dataclass
+class InstructionStmt:
+    """A source instruction with its parameters, before spacing"""
+    name: str
+    params: List[str]
+    line_num: int
+
+    def render(self) -> str:
+        return " ".join([self.name] + self.params)
+
+
+@dataclass
+class Fixup:
+    """
+    A reference to a label that is patched once label addresses are known
+    kind is 'T' (top byte), 'B' (bottom byte) or 'REL' (8-bit offset)
+    """
+    kind: str
+    target: str
+    line_num: int = 0
+    location: int = -1  # Address of the patched word, set by the addresser
+    origin: int = -1  # Address of the referencing instruction's opcode, set by the addresser
+    length: int = 0  # Length of the referencing instruction, set by the addresser
+
+    def render(self) -> str:
+        if self.kind == 'REL':
+            return self.target
+        return f"{self.kind}@{self.target}"
+
+
+@dataclass
+class Opcode:
+    """First word of a spaced instruction"""
+    name: str
+    opcode: int
+    length: int
+    line_num: int
+
+    def render(self) -> str:
+        return self.name
+
+
+@dataclass
+class Operand:
+    """
+    A spaced parameter word
+    kind is the parameter format ('WRT', 'READ', 'NUM', '16ADD', ...) or 'NOP' for padding
+    """
+    kind: str
+    text: str
+    line_num: int
+    value: Optional[int] = None
+    fixup: Optional[Fixup] = field(default=None)
+
+    def render(self) -> str:
+        if self.value is not None:
+            return str(self.value)
+        if self.fixup is not None:
+            return self.fixup.render()
+        return self.text
+
+
+@dataclass
+class AddressedCode:
+    """
+    Program laid out in memory by the addresser
+    Data bytes go straight into the image, instruction words wait in words until the implementation encodes them
+    """
+    image: RomImage
+    words: Dict[int, Any] = field(default_factory=dict)  # Opcode/Operand keyed by address
+    comments: Dict[int, str] = field(default_factory=dict)  # Encoding comment keyed by address, set by implementation
+    source_map: Dict[int, int] = field(default_factory=dict)  # Source line keyed by address
+
+
+def render_word(word: Any) -> str:
+    """
+    Render a single IR word as a debug text line
+
+    Args:
+        word: An IR record, a raw byte value, or None for an unused address
+
+    Returns:
+        The text line for the debug dump
+    """
+    if word is None:
+        return "0"
+    if isinstance(word, int):
+        return str(word)
+    return word.render()
+
+
+def render_lines(words: Iterable[Any]) -> str:
+    """Render a sequence of IR words as newline-joined debug text"""
+    return '\n'.join(render_word(word) for word in words)
+
+
+def render_spaced(words: Iterable[Any]) -> str:
+    """
+    Render spaced words as debug text
+    Label references are shown as written even after the addresser has resolved them
+
+    Args:
+        words: Spaced words from the spacer
+
+    Returns:
+        Newline-joined words
+    """
+    return '\n'.join(word.fixup.render() if isinstance(word, Operand) and word.fixup is not None
+                     else render_word(word) for word in words)
+
+
+def render_addressed(code: AddressedCode) -> str:
+    """
+    Render addressed code as debug text, one line per address up to the highest used one
+
+    Args:
+        code: Addressed code from the addresser
+
+    Returns:
+        Newline-joined words, data byte values and "0" for unused addresses
+    """
+    words = code.words
+    data = code.image.data
+    return '\n'.join(words[address].render() if address in words else str(data[address])
+                     for address in range(len(code.image)))
+
+
+def render_implemented(code: Any) -> str:
+    """
+    Render encoded code in the IMPLEMENTED text format
+
+    Args:
+        code: Addressed code after the implementation stage, or anything else with an image and comments
+
+    Returns:
+        One "VALUE //COMMENT" (or "VALUE") line per address
+    """
+    comments = code.comments
+    data = code.image.data
+    return '\n'.join(f"{data[address]} //{comments[address]}" if address in comments else str(data[address])
+                     for address in range(len(code.image)))
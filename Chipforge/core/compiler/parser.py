@@ -1,21 +1,24 @@
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Union
+from .ir import OrgDirective, LabelDef, DataBytes, InstructionStmt
+
+Statement = Union[OrgDirective, LabelDef, DataBytes, InstructionStmt]
 
 
 class ECFParser:
     def __init__(self):
         self.errors = []
 
-    def parse_asm_file(self, asm_file_path: str) -> Optional[str]:
+    def parse_asm_file(self, asm_file_path: str) -> Optional[List[Statement]]:
         """
-        Parse ECF ASM file and return cleaned content
+        Parse ECF ASM file into typed statements
 
         Args:
             asm_file_path: Path to the .ecfASM file
 
         Returns:
-            Cleaned file content as string if successful, None if failed
+            List of ORG, label, DB and instruction statements if successful, None if failed
         """
         try:
             self.errors = []
@@ -29,7 +32,7 @@ class ECFParser:
             with open(asm_path, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
 
-            cleaned_lines = []
+            statements = []
             for line_num, line in enumerate(lines, 1):
                 # Remove comments (everything after //)
                 if '//' in line:
@@ -49,17 +52,77 @@ class ECFParser:
                     self.errors.append(f"Line {line_num}: {e}")
                     return None
 
-                cleaned_lines.append(line)
+                statement = self._build_statement(line.split(' '), line_num)
+                if statement is None:
+                    return None
+
+                statements.append(statement)
 
-            content = '\n'.join(cleaned_lines)
             print(f"Successfully parsed ASM file: {asm_file_path}")
-            print(f"Processed {len(lines)} -> {len(cleaned_lines)} lines")
-            return content
+            print(f"Processed {len(lines)} -> {len(statements)} lines")
+            return statements
 
         except Exception as e:
             self.errors.append(f"Error parsing ASM file: {e}")
             return None
 
+    def _build_statement(self, parts: List[str], line_num: int) -> Optional[Statement]:
+        """
+        Classify a cleaned line and build its statement record
+        Validates compiler-only command formats (ORG, labels, DB)
+
+        Args:
+            parts: Whitespace-separated tokens of the cleaned line
+            line_num: Line number for error reporting
+
+        Returns:
+            The statement record, or None if the line is malformed
+        """
+        # Validate ORG format: ORG NUM:
+        if parts[0].upper() == 'ORG':
+            if len(parts) != 2:
+                self.errors.append(f"Line {line_num}: ORG format should be 'ORG NUM:'")
+                return None
+            if not parts[1].endswith(':'):
+                self.errors.append(f"Line {line_num}: ORG should end with colon ':'")
+                return None
+            try:
+                address = int(parts[1][:-1])  # Remove colon and check if it's a number
+            except ValueError:
+                self.errors.append(f"Line {line_num}: ORG address '{parts[1][:-1]}' is not a valid number")
+                return None
+            return OrgDirective(address, line_num)
+
+        # Validate Label format: WORD:
+        if len(parts) == 1 and parts[0].endswith(':'):
+            label_name = parts[0][:-1]
+            if not label_name:
+                self.errors.append(f"Line {line_num}: Empty label name")
+                return None
+            # Allow alphanumeric characters and underscores for labels
+            if not all(c.isalnum() or c == '_' for c in label_name):
+                self.errors.append(
+                    f"Line {line_num}: Label '{label_name}' should contain only letters, numbers, and underscores")
+                return None
+            return LabelDef(label_name, line_num)
+
+        # Validate DB format: DB NUM NUM ...
+        if parts[0].upper() == 'DB':
+            if len(parts) < 2:
+                self.errors.append(f"Line {line_num}: DB should be followed by at least one number")
+                return None
+            values = []
+            for part in parts[1:]:
+                try:
+                    values.append(int(part))
+                except ValueError:
+                    self.errors.append(f"Line {line_num}: DB parameter '{part}' is not a valid number")
+                    return None
+            return DataBytes(values, line_num)
+
+        # Anything else is an instruction, checked against the ISA by the spacer
+        return InstructionStmt(parts[0], parts[1:], line_num)
+
     def _normalize_whitespace(self, line: str) -> str:
         """
         Remove tabs, multiple spaces, leading spaces, and trailing spaces
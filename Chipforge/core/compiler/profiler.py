@@ -0,0 +1,221 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Union
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+@dataclass
+class StageStats:
+    """Accumulated measurements for one named stage or handler"""
+    name: str
+    category: str  # "stage" for compiler stages, "handler" for addresser handlers
+    calls: int = 0
+    wall: float = 0.0  # Seconds
+    cpu: float = 0.0  # Seconds of process CPU time
+    peak_bytes: Optional[int] = None  # Peak traced allocation above the stage's starting point
+
+
+@dataclass
+class _Frame:
+    stats: StageStats
+    start_wall: float
+    start_cpu: float
+    start_memory: int = 0
+    peak_memory: int = 0  # Highest traced memory seen while this frame was open
+
+
+@dataclass
+class TraceEvent:
+    """One timed stage call, kept for Chrome-trace export"""
+    name: str
+    category: str
+    start: float  # Seconds since the profiler was created
+    duration: float
+    thread_id: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class CompileProfiler:
+    """
+    Records wall time, CPU time and (optionally) peak memory per compiler stage and handler
+    Stages can nest, e.g. the label handler runs inside the address stage
+    """
+
+    def __init__(self, enabled: bool = True, track_memory: bool = False):
+        """
+        Initialize the profiler
+
+        Args:
+            enabled: When False, stage() and measure() cost almost nothing and record nothing
+            track_memory: Record peak allocations with tracemalloc (slows the compile noticeably)
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory and enabled
+        self.stats = {}  # Name -> StageStats, in order of first use
+        self.events = []  # TraceEvent per stage() call
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Begin a profiling session (starts tracemalloc if memory tracking is on)"""
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """End the session and stop tracemalloc if this profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, category: str = "stage"):
+        """
+        Time a block as one call of a named stage, with a trace event
+
+        Args:
+            name: Stage or handler name (e.g., "parse", "LBLHandler.resolve_fixups")
+            category: "stage" or "handler"
+        """
+        if not self.enabled:
+            yield
+            return
+
+        frame = self._enter(name, category)
+        try:
+            yield
+        finally:
+            duration = self._exit(frame)
+            stats = frame.stats
+            args = {"cpu_ms": round((time.process_time() - frame.start_cpu) * 1000, 3)}
+            if self.track_memory:
+                args["peak_kib"] = round((frame.peak_memory - frame.start_memory) / 1024, 1)
+            self.events.append(TraceEvent(stats.name, stats.category, frame.start_wall - self._origin,
+                                          duration, threading.get_ident(), args))
+
+    @contextmanager
+    def measure(self, name: str, category: str = "handler"):
+        """
+        Time a short, frequently repeated block (no trace event, no memory tracking)
+
+        Args:
+            name: Handler operation name (e.g., "DBHandler.process_db")
+            category: "stage" or "handler"
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stats = self._get_stats(name, category)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            stats.calls += 1
+            stats.wall += time.perf_counter() - start_wall
+            stats.cpu += time.process_time() - start_cpu
+
+    def _get_stats(self, name: str, category: str) -> StageStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StageStats(name, category)
+        return stats
+
+    def _enter(self, name: str, category: str) -> _Frame:
+        frame = _Frame(self._get_stats(name, category), time.perf_counter(), time.process_time())
+
+        if self.track_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The parent's peak so far would be lost by the reset below
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, peak)
+            tracemalloc.reset_peak()
+            frame.start_memory = frame.peak_memory = current
+
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame: _Frame) -> float:
+        duration = time.perf_counter() - frame.start_wall
+        stats = frame.stats
+        stats.calls += 1
+        stats.wall += duration
+        stats.cpu += time.process_time() - frame.start_cpu
+
+        self._stack.pop()
+        if self.track_memory and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            frame.peak_memory = max(frame.peak_memory, peak)
+            stats.peak_bytes = max(stats.peak_bytes or 0, frame.peak_memory - frame.start_memory)
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, frame.peak_memory)
+
+        return duration
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the measurements as plain data
+
+        Returns:
+            Stage name -> {"category", "calls", "wall_ms", "cpu_ms", "peak_kib"} in order of first use
+        """
+        return {
+            name: {
+                "category": stats.category,
+                "calls": stats.calls,
+                "wall_ms": round(stats.wall * 1000, 3),
+                "cpu_ms": round(stats.cpu * 1000, 3),
+                "peak_kib": None if stats.peak_bytes is None else round(stats.peak_bytes / 1024, 1),
+            }
+            for name, stats in self.stats.items()
+        }
+
+    def format_lines(self) -> List[str]:
+        """Return one human-readable line per finished stage for the compilation log"""
+        lines = []
+        for name, stats in self.stats.items():
+            if stats.calls == 0:
+                continue  # Still running (e.g. the enclosing "compile" stage)
+            line = f"{name}: {stats.wall * 1000:.3f} ms wall, {stats.cpu * 1000:.3f} ms CPU"
+            if stats.calls > 1:
+                line += f", {stats.calls} calls"
+            if stats.peak_bytes is not None:
+                line += f", peak {stats.peak_bytes / 1024:.1f} KiB"
+            lines.append(line)
+        return lines
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Build a Chrome trace (chrome://tracing, Perfetto) from the recorded stage calls
+
+        Returns:
+            Trace document in the Trace Event Format
+        """
+        pid = os.getpid()
+        events = [{
+            "name": event.name,
+            "cat": event.category,
+            "ph": "X",
+            "ts": round(event.start * 1e6, 1),
+            "dur": round(event.duration * 1e6, 1),
+            "pid": pid,
+            "tid": event.thread_id,
+            "args": event.args,
+        } for event in self.events]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, file_path: Union[str, Path]) -> Path:
+        """Write the Chrome trace JSON to a file"""
+        file_path = Path(file_path)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        return file_path
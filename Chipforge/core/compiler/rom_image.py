@@ -0,0 +1,222 @@
+from pathlib import Path
+from typing import List, Tuple, Iterable, Union
+
+DEFAULT_PROGRAM_COUNTER_SIZE = 13  # 8 KiB of program memory
+
+
+class RomImage:
+    """
+    Program memory image: one byte per address plus a bitmap of occupied addresses
+    Unused addresses read as 0, the same filler the ROM file has always used
+    """
+
+    def __init__(self, size: int = 2 ** DEFAULT_PROGRAM_COUNTER_SIZE):
+        """
+        Create an empty image
+
+        Args:
+            size: Number of addressable bytes (2 ** ProgramCounterSize)
+        """
+        self.size = size
+        self.data = bytearray(size)
+        self.used = bytearray((size + 7) // 8)  # Bit per address, set when written
+        self.end = 0  # One past the highest used address
+
+    @classmethod
+    def from_values(cls, values: Iterable[int], size: int = None) -> 'RomImage':
+        """
+        Create an image with every given value written from address 0
+
+        Args:
+            values: Byte values (0-255) in address order
+            size: Image size, defaults to the larger of the value count and 8 KiB
+
+        Returns:
+            The filled image
+
+        Raises:
+            ValueError: If a value is not a valid byte
+        """
+        data = bytes(values)  # Raises ValueError for values outside 0-255
+        image = cls(max(size or 2 ** DEFAULT_PROGRAM_COUNTER_SIZE, len(data)))
+        image.write_block(0, data)
+        return image
+
+    @classmethod
+    def from_ecfrom(cls, rom_file_path: Union[str, Path], size: int = None) -> 'RomImage':
+        """
+        Load an .ecfROM file (one decimal byte per line)
+
+        Args:
+            rom_file_path: Path to the .ecfROM file
+            size: Image size, defaults to the larger of the line count and 8 KiB
+
+        Returns:
+            The loaded image
+
+        Raises:
+            ValueError: If a line is not a valid byte value
+        """
+        with open(rom_file_path, 'r') as f:
+            values = []
+            for address, line in enumerate(f):
+                value = int(line.strip())
+                if value < 0 or value > 255:
+                    raise ValueError(f"Invalid byte value {value} at address {address}")
+                values.append(value)
+        return cls.from_values(values, size)
+
+    @classmethod
+    def from_output(cls, output_dir: Union[str, Path], project_name: str, size: int = None) -> 'RomImage':
+        """
+        Load a project's compiled output: the .ecfROM file, restricted to the ranges in its
+        .ecfSEG file when there is one (older outputs count every address as used)
+
+        Args:
+            output_dir: The project's Output folder
+            project_name: Project base name
+            size: Image size, defaults to the larger of the ROM length and 8 KiB
+
+        Returns:
+            The loaded image
+
+        Raises:
+            ValueError: If either file holds invalid values
+        """
+        output_dir = Path(output_dir)
+        image = cls.from_ecfrom(output_dir / f"{project_name}.ecfROM", size)
+        segments_path = output_dir / f"{project_name}.ecfSEG"
+        if segments_path.exists():
+            image.set_used_ranges(read_segments(segments_path))
+        return image
+
+    def set_used_ranges(self, ranges: Iterable[Tuple[int, int]]) -> None:
+        """
+        Replace the used-address bitmap, e.g. with the segments the compiler recorded
+
+        Args:
+            ranges: (start, end) pairs with end exclusive
+
+        Raises:
+            IndexError: If a range is outside the image
+        """
+        self.used = bytearray(len(self.used))
+        self.end = 0
+        for start, end in ranges:
+            self._check_range(start, end - start)
+            self._mark_used(start, end)
+
+    def _check_range(self, address: int, length: int) -> None:
+        if address < 0 or address + length > self.size:
+            raise IndexError(f"Address {address + max(length - 1, 0)} is outside program memory (0-{self.size - 1})")
+
+    def _mark_used(self, start: int, end: int) -> None:
+        """Set the used bits for addresses start..end-1"""
+        used = self.used
+        address = start
+        # Leading bits up to a byte boundary
+        while address < end and address & 7:
+            used[address >> 3] |= 1 << (address & 7)
+            address += 1
+        # Whole bytes
+        full_end = end & ~7
+        if address < full_end:
+            used[address >> 3:full_end >> 3] = b'\xff' * ((full_end - address) >> 3)
+            address = full_end
+        # Trailing bits
+        while address < end:
+            used[address >> 3] |= 1 << (address & 7)
+            address += 1
+        if end > self.end:
+            self.end = end
+
+    def write(self, address: int, value: int) -> None:
+        """
+        Write one byte and mark its address as used
+
+        Raises:
+            IndexError: If the address is outside the image
+            ValueError: If the value is not a valid byte
+        """
+        self._check_range(address, 1)
+        self.data[address] = value
+        self.used[address >> 3] |= 1 << (address & 7)
+        if address >= self.end:
+            self.end = address + 1
+
+    def write_block(self, address: int, values: Union[bytes, bytearray, List[int]]) -> None:
+        """
+        Write a run of bytes starting at an address and mark them as used
+
+        Raises:
+            IndexError: If the run does not fit in the image
+            ValueError: If a value is not a valid byte
+        """
+        self._check_range(address, len(values))
+        self.data[address:address + len(values)] = bytes(values)
+        self._mark_used(address, address + len(values))
+
+    def is_used(self, address: int) -> bool:
+        """Check if an address has been written"""
+        return 0 <= address < self.size and bool(self.used[address >> 3] & (1 << (address & 7)))
+
+    def used_ranges(self) -> List[Tuple[int, int]]:
+        """
+        Return the occupied address ranges
+
+        Returns:
+            List of (start, end) pairs with end exclusive, in ascending order
+        """
+        ranges = []
+        start = None
+        for byte_index in range((self.end + 7) >> 3):
+            bits = self.used[byte_index]
+            if bits == 0xFF and start is not None:
+                continue
+            if bits == 0 and start is None:
+                continue
+            base = byte_index << 3
+            for bit in range(8):
+                if bits & (1 << bit):
+                    if start is None:
+                        start = base + bit
+                elif start is not None:
+                    ranges.append((start, base + bit))
+                    start = None
+        if start is not None:
+            ranges.append((start, self.end))
+        return ranges
+
+    def to_bytes(self) -> bytes:
+        """Return addresses 0 up to the highest used one, unused addresses as 0"""
+        return bytes(self.data[:self.end])
+
+    def __len__(self) -> int:
+        return self.end
+
+    def __getitem__(self, address):
+        return self.data[address]
+
+
+def read_segments(segments_path: Union[str, Path]) -> List[Tuple[int, int]]:
+    """
+    Read an .ecfSEG file (one "START<tab>LENGTH" line per used range)
+
+    Returns:
+        (start, end) pairs with end exclusive
+
+    Raises:
+        ValueError: If a line is malformed
+    """
+    ranges = []
+    with open(segments_path, 'r') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split('\t')
+            if len(fields) != 2 or not fields[0].isdigit() or not fields[1].isdigit():
+                raise ValueError(f"Invalid segment on line {line_num}: {line}")
+            start, length = int(fields[0]), int(fields[1])
+            ranges.append((start, start + length))
+    return ranges
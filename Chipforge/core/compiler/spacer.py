@@ -1,4 +1,6 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Any
+from .instruction_set import ECFInstructionSet
+from .ir import InstructionStmt, Opcode, Operand, Fixup
 
 
 class ECFSpacer:
@@ -7,191 +9,110 @@ class ECFSpacer:
     Separates spacing logic from the main compiler
     """
 
-    def __init__(self, instructions: Dict[int, Dict[str, Any]]):
+    def __init__(self, instruction_set: ECFInstructionSet):
         """
         Initialize the spacer with instruction definitions
 
         Args:
-            instructions: Dictionary of instruction definitions from compiler
+            instruction_set: Name-indexed instruction set from compiler
         """
-        self.instructions = instructions
+        self.instruction_set = instruction_set
         self.errors = []
 
-    def space_code(self, parsed_content: str) -> Optional[str]:
+    def space_code(self, statements: List[Any]) -> Optional[List[Any]]:
         """
-        Process parsed ASM content and generate spaced code
+        Process parsed ASM statements and generate spaced code
+        Each instruction is expanded into one word per address
 
         Args:
-            parsed_content: The cleaned ASM content from parser
+            statements: The statement records from parser
 
         Returns:
-            Spaced code content as string if successful, None if failed
+            List of spaced words (compiler commands pass through) if successful, None if failed
         """
         try:
             self.errors = []  # Clear previous errors
-            lines = parsed_content.strip().split('\n')
-            output_lines = []
-            current_address = 0
-            line_num = 0
-
-            for line in lines:
-                line_num += 1
-                line = line.strip()
-                if not line:
-                    continue
+            output_words = []
 
-                # Check for compiler-only commands
-                if self._is_compiler_command(line, line_num):
-                    # Validate format but keep as-is in output
-                    if not self._validate_compiler_command(line, line_num):
-                        return None
-                    output_lines.append(line)
-
-                    # Update current address if this is an ORG command
-                    if line.split()[0].upper() == 'ORG':
-                        parts = line.split()
-                        current_address = int(parts[1][:-1])  # Remove colon and convert to int
+            for statement in statements:
+                # Compiler-only commands were validated by the parser and are kept as-is
+                if not isinstance(statement, InstructionStmt):
+                    output_words.append(statement)
                     continue
 
                 # Process regular instruction
-                if not self._process_instruction_line(line, line_num, current_address, output_lines):
+                if not self._process_instruction(statement, output_words):
                     return None
 
-                # Update current address based on instruction length
-                instruction_name = line.split()[0]
-                if instruction_name in [inst['name'] for inst in self.instructions.values()]:
-                    # Find instruction by name
-                    for inst_data in self.instructions.values():
-                        if inst_data['name'] == instruction_name:
-                            current_address += inst_data['length']
-                            break
-
-            return '\n'.join(output_lines)
+            return output_words
 
         except Exception as e:
             self.errors.append(f"Error in SpaceCode processing: {e}")
             return None
 
-    def _is_compiler_command(self, line: str, line_num: int) -> bool:
-        """Check if line is a compiler-only command"""
-        parts = line.split()
-        if not parts:
-            return False
-
-        # Check for ORG command
-        if parts[0].upper() == 'ORG':
-            return True
-
-        # Check for Label (word ending with :)
-        if len(parts) == 1 and parts[0].endswith(':'):
-            return True
-
-        # Check for DB command
-        if parts[0].upper() == 'DB':
-            return True
+    def _process_instruction(self, statement: InstructionStmt, output_words: list) -> bool:
+        """Process a regular instruction statement"""
+        instruction_name = statement.name
+        parameters = statement.params
+        line_num = statement.line_num
 
-        return False
+        # Look up the pre-split parameter formats
+        format_parts = self.instruction_set.get_param_formats(instruction_name)
 
-    def _validate_compiler_command(self, line: str, line_num: int) -> bool:
-        """Validate compiler-only command format"""
-        parts = line.split()
-
-        if not parts:
-            self.errors.append(f"Line {line_num}: Empty compiler command")
-            return False
-
-        # Validate ORG format: ORG NUM:
-        if parts[0].upper() == 'ORG':
-            if len(parts) != 2:
-                self.errors.append(f"Line {line_num}: ORG format should be 'ORG NUM:'")
-                return False
-            if not parts[1].endswith(':'):
-                self.errors.append(f"Line {line_num}: ORG should end with colon ':'")
-                return False
-            try:
-                int(parts[1][:-1])  # Remove colon and check if it's a number
-            except ValueError:
-                self.errors.append(f"Line {line_num}: ORG address '{parts[1][:-1]}' is not a valid number")
-                return False
-            return True
-
-        # Validate Label format: WORD:
-        if len(parts) == 1 and parts[0].endswith(':'):
-            label_name = parts[0][:-1]
-            if not label_name:
-                self.errors.append(f"Line {line_num}: Empty label name")
-                return False
-            # Allow alphanumeric characters and underscores for labels
-            if not all(c.isalnum() or c == '_' for c in label_name):
-                self.errors.append(
-                    f"Line {line_num}: Label '{label_name}' should contain only letters, numbers, and underscores")
-                return False
-            return True
-
-        # Validate DB format: DB NUM NUM ...
-        if parts[0].upper() == 'DB':
-            if len(parts) < 2:
-                self.errors.append(f"Line {line_num}: DB should be followed by at least one number")
-                return False
-            for i, part in enumerate(parts[1:], 2):
-                try:
-                    int(part)
-                except ValueError:
-                    self.errors.append(f"Line {line_num}: DB parameter '{part}' is not a valid number")
-                    return False
-            return True
-
-        self.errors.append(f"Line {line_num}: Unknown compiler command format")
-        return False
-
-    def _process_instruction_line(self, line: str, line_num: int, current_address: int, output_lines: list) -> bool:
-        """Process a regular instruction line"""
-        parts = line.split()
-        if not parts:
-            return True
-
-        instruction_name = parts[0]
-        parameters = parts[1:] if len(parts) > 1 else []
-
-        # Find instruction in dictionary
-        instruction_data = None
-        for inst_data in self.instructions.values():
-            if inst_data['name'] == instruction_name:
-                instruction_data = inst_data
-                break
-
-        if instruction_data is None:
+        if format_parts is None:
             self.errors.append(f"Line {line_num}: Unknown instruction '{instruction_name}'")
             return False
 
-        # Parse format to get expected parameter types
-        format_parts = instruction_data['format'].split('_')[1:] if '_' in instruction_data['format'] else []
-
         # Validate parameter count
         if len(parameters) != len(format_parts):
             self.errors.append(
                 f"Line {line_num}: Instruction '{instruction_name}' expects {len(format_parts)} parameters, got {len(parameters)}")
             return False
 
-        # Add instruction name
-        output_lines.append(instruction_name)
+        # Add instruction word
+        output_words.append(Opcode(instruction_name,
+                                   self.instruction_set.get_opcode(instruction_name),
+                                   self.instruction_set.get_length(instruction_name),
+                                   line_num))
 
         # Process parameters based on format
-        for i, (param, format_type) in enumerate(zip(parameters, format_parts)):
+        for param, format_type in zip(parameters, format_parts):
             if format_type == '16ADD':
                 # 16-bit address - split into top and bottom bytes
-                output_lines.append(f"T@{param}")
-                output_lines.append(f"B@{param}")
+                output_words.append(Operand(format_type, param, line_num, fixup=Fixup('T', param, line_num)))
+                output_words.append(Operand(format_type, param, line_num, fixup=Fixup('B', param, line_num)))
+            elif format_type in ('WRT', 'READ'):
+                # Register names are resolved by the implementation stage
+                output_words.append(Operand(format_type, param, line_num))
             else:
-                # Regular parameter (NUM, WRT, READ)
-                output_lines.append(param)
+                # Numbers are taken as-is, T@/B@ take one byte of a label address,
+                # anything else is a relative label reference
+                try:
+                    output_words.append(Operand(format_type, param, line_num, value=int(param)))
+                except ValueError:
+                    output_words.append(Operand(format_type, param, line_num, fixup=self._make_fixup(param, line_num)))
 
         # Add leading NOPs
-        for _ in range(instruction_data['leading_nops']):
-            output_lines.append("0")
+        output_words.extend(Operand('NOP', "0", line_num, value=0)
+                            for _ in range(self.instruction_set.get_leading_nops(instruction_name)))
 
         return True
 
+    def _make_fixup(self, param: str, line_num: int) -> Fixup:
+        """
+        Build the label fixup for a non-numeric parameter
+
+        Args:
+            param: The parameter text (e.g., "LOOP", "T@MAIN", "B@MAIN")
+            line_num: Line number for error reporting
+
+        Returns:
+            Fixup of kind 'T' or 'B' for prefixed references, 'REL' otherwise
+        """
+        if len(param) > 2 and param[1] == '@' and param[0] in ('T', 'B'):
+            return Fixup(param[0], param[2:], line_num)
+        return Fixup('REL', param, line_num)
+
     def get_errors(self) -> List[str]:
         """Return the list of spacing errors"""
         return self.errors.copy()
@@ -209,4 +130,4 @@ class ECFSpacer:
             validator_func: Function to validate this command type
         """
         # This could be extended in the future to support plugin-style command additions
-        pass
\ No newline at end of file
+        pass
@@ -1,21 +1,59 @@
 from pathlib import Path
-from core.compiler import DebugManager, ECFFileLoader, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA
+from typing import Optional
+import json
+from core.compiler import DebugManager, ECFFileLoader, ECFInstructionSet, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA
+from core.compiler.ir import Opcode, render_lines, render_spaced, render_addressed, render_implemented
+from core.compiler.debug_manager import resolve_debug_mode
+from core.compiler.rom_image import DEFAULT_PROGRAM_COUNTER_SIZE
+from core.compiler.compile_result import CompileResult
+from core.compiler.build_cache import BuildCache, hash_file, make_key
+from core.compiler.profiler import CompileProfiler
+from core.devices import get_device_profile
+
+# Renderers of the stages whose IR is cached with the result, in compile order (IMPLEMENTED renders the result)
+CACHED_STAGE_RENDERERS = {"PARSED": render_lines, "SPACED": render_spaced, "ADDRESSED": render_addressed}
 
 
 class ECFCompiler:
-    def __init__(self):
+    def __init__(self, debug_output=None, use_cache: bool = True, profile_memory: bool = False):
         self.project_settings = {}
         self.write_addresses = {}  # ADDW - keyed by address
         self.read_addresses = {}  # ADDR - keyed by address
         self.instructions = {}  # INST - keyed by address
+        self.instruction_set = None  # Name-indexed view shared by all stages
         self.errors = []  # List to store validation errors
         self.base_name = ""  # Store project base name
         self.proj_dir = None  # Store project directory
         self.debug_manager = None  # Will be initialized when project is loaded
+        self.debug_output = debug_output  # True/False or "sync"/"background"/"off", None uses the DebugOutput setting
+        self.stage_renderers = {}  # Stage name -> callable rendering it from the last compile, for dump_stage
+        self.implemented = None  # AddressedCode (ROM image and comments) after a successful compile
+        self.result = None  # CompileResult after a successful compile
+        self.use_cache = use_cache  # Reuse tables, parsed ASM and results from Debug/.cache
+        self.cache = None  # BuildCache, set when a project is loaded with use_cache
+        self.cache_keys = {}  # Cache key per entry kind for the current project
+        self.from_cache = False  # True if the last result came straight from the cache
+        self.profile_memory = profile_memory  # Track peak memory per stage with tracemalloc
+        self.profiler = CompileProfiler(enabled=False)  # Stage timings of the last compile
+
+    def compile_project(self, proj_file_path: str) -> Optional[CompileResult]:
+        """
+        Load and compile an ECF project
+
+        Args:
+            proj_file_path: Path to the .ecfproj file
+
+        Returns:
+            CompileResult if successful, None if failed (see get_errors)
+        """
+        if not self.load_project(proj_file_path):
+            return None
+        return self.result
 
     def load_project(self, proj_file_path: str) -> bool:
         """
         Load ECF project and associated address files
+        Every stage is timed, see self.profiler and CompileResult.profile
 
         Args:
             proj_file_path: Path to the .ecfproj file
@@ -23,10 +61,26 @@ class ECFCompiler:
         Returns:
             True if successful, False otherwise
         """
+        self.profiler = CompileProfiler(track_memory=self.profile_memory)
+        self.profiler.start()
+        try:
+            with self.profiler.stage("compile"):
+                return self._load_project(proj_file_path)
+        finally:
+            self.profiler.stop()
+            if self.result is not None:
+                self.result.profile = self.profiler.as_dict()
+
+    def _load_project(self, proj_file_path: str) -> bool:
+        """Body of load_project, run inside the "compile" profiler stage"""
         try:
 
-            # Clear previous errors
+            # Clear previous errors and results
             self.errors = []
+            self.implemented = None
+            self.result = None
+            self.from_cache = False
+            self.stage_renderers = {}
 
             proj_path = Path(proj_file_path)
 
@@ -39,27 +93,20 @@ class ECFCompiler:
             self.base_name = proj_path.stem
             self.proj_dir = proj_path.parent
 
-            # Initialize debug manager
-            try:
-                from core.compiler import DebugManager
-                self.debug_manager = DebugManager(self.proj_dir, self.base_name)
-            except ImportError as e:
-                self.errors.append(f"Error: Could not import debug_manager: {e}")
-                return False
-
             # Load project settings
             if not self._load_project_file(proj_path):
                 return False
 
-            # Load address files using abstracted loader
+            # Initialize debug manager, the API flag overrides the DebugOutput project setting
             try:
-                from core.compiler import ECFFileLoader, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA
+                from core.compiler import DebugManager
+                debug_mode = resolve_debug_mode(self.debug_output if self.debug_output is not None
+                                                else self.project_settings.get('DebugOutput'))
+                self.debug_manager = DebugManager(self.proj_dir, self.base_name, debug_mode)
             except ImportError as e:
-                self.errors.append(f"Error: Could not import file_loader: {e}")
+                self.errors.append(f"Error: Could not import debug_manager: {e}")
                 return False
 
-            loader = ECFFileLoader()
-
             # Calculate file paths relative to project directory
             source_dir = self.proj_dir / "source"
             addw_file = source_dir / f"{self.base_name}.ecfADDW"
@@ -71,31 +118,62 @@ class ECFCompiler:
                 self.errors.append(f"Error: Source directory not found: {source_dir}")
                 return False
 
-            # Load files using schemas
-            self.write_addresses = loader.load_tabbed_file(addw_file, ADDW_SCHEMA)
-            if loader.has_errors():
-                self.errors.extend(loader.get_errors())
+            # An unchanged project reuses its last result, unchanged tables skip loading
+            if self.use_cache:
+                with self.profiler.stage("cache_lookup"):
+                    self._init_cache(proj_path, addw_file, addr_file, inst_file)
+                    tables_cached = self._load_cached_tables()
+                    result_cached = tables_cached and self._load_cached_result()
+                if result_cached:
+                    return True
+                if tables_cached:
+                    with self.profiler.stage("debug_dump"):
+                        self.debug_manager.save_project_summary(self)
+                    return self._process_asm_file()
+
+            # Load address files using abstracted loader
+            try:
+                from core.compiler import ECFFileLoader, ADDW_SCHEMA, ADDR_SCHEMA, INST_SCHEMA
+            except ImportError as e:
+                self.errors.append(f"Error: Could not import file_loader: {e}")
+                return False
+
+            loader = ECFFileLoader()
+
+            with self.profiler.stage("load_tables"):
+                # Load files using schemas
+                self.write_addresses = loader.load_tabbed_file(addw_file, ADDW_SCHEMA)
+                if loader.has_errors():
+                    self.errors.extend(loader.get_errors())
 
-            self.read_addresses = loader.load_tabbed_file(addr_file, ADDR_SCHEMA)
-            if loader.has_errors():
-                self.errors.extend(loader.get_errors())
+                self.read_addresses = loader.load_tabbed_file(addr_file, ADDR_SCHEMA)
+                if loader.has_errors():
+                    self.errors.extend(loader.get_errors())
 
-            self.instructions = loader.load_tabbed_file(inst_file, INST_SCHEMA)
-            if loader.has_errors():
-                self.errors.extend(loader.get_errors())
+                self.instructions = loader.load_tabbed_file(inst_file, INST_SCHEMA)
+                if loader.has_errors():
+                    self.errors.extend(loader.get_errors())
 
-            # Cross-file validation
-            self._validate_cross_file_conflicts()
+                # Cross-file validation
+                self._validate_cross_file_conflicts()
 
-            if self.errors:
-                return False
+                if self.errors:
+                    self._save_log()
+                    return False
 
-            # Add address 0 as "do nothing" for all spaces
-            self._add_do_nothing_entries()
+                # Add address 0 as "do nothing" for all spaces
+                self._add_do_nothing_entries()
 
+                # Build the name-indexed ISA once for every stage
+                self.instruction_set = ECFInstructionSet(self.instructions, self.write_addresses, self.read_addresses)
+
+            with self.profiler.stage("cache_store"):
+                self._store_cached('tables', (self.write_addresses, self.read_addresses,
+                                              self.instructions, self.instruction_set))
 
             # Save project summary to debug
-            self.debug_manager.save_project_summary(self)
+            with self.profiler.stage("debug_dump"):
+                self.debug_manager.save_project_summary(self)
 
             # Process ASM file if basic validation passed
             if not self.errors:
@@ -145,65 +223,99 @@ class ECFCompiler:
                 return False
 
 
-            # Create parser and process file
-            parser = ECFParser()
-            parsed_content = parser.parse_asm_file(str(asm_file))
+            # Create parser and process file, unless this ASM was parsed before
+            with self.profiler.stage("cache_lookup"):
+                statements = self._load_cached('parsed')
+            if statements is None:
+                with self.profiler.stage("parse"):
+                    parser = ECFParser()
+                    statements = parser.parse_asm_file(str(asm_file))
 
-            if parsed_content is None:
-                self.errors.extend(parser.get_errors())
-                return False
+                if statements is None:
+                    self.errors.extend(parser.get_errors())
+                    self._save_log()
+                    return False
+
+                with self.profiler.stage("cache_store"):
+                    self._store_cached('parsed', statements)
 
 
             # Save parsed content using debug manager
-            parsed_file = self.debug_manager.save_stage("PARSED", parsed_content)
+            self.stage_renderers["PARSED"] = lambda: render_lines(statements)
+            with self.profiler.stage("debug_dump"):
+                parsed_file = self.debug_manager.save_rendered_stage("PARSED", self.stage_renderers["PARSED"])
             print(f"ASM file processed and saved to: {parsed_file}")
 
-            # Create spacer and process the parsed content
-            spacer = ECFSpacer(self.instructions)
-            spaced_content = spacer.space_code(parsed_content)
+            # Create spacer and process the parsed statements
+            with self.profiler.stage("space"):
+                spacer = ECFSpacer(self.instruction_set)
+                spaced_words = spacer.space_code(statements)
 
-            if spaced_content is None:
+            if spaced_words is None:
                 self.errors.extend(spacer.get_errors())
                 # Save compilation log with errors
-                self.debug_manager.save_compilation_log(self.errors)
+                self._save_log()
                 return False
 
 
             # Save spaced content using debug manager
-            spaced_file = self.debug_manager.save_stage("SPACED", spaced_content)
+            self.stage_renderers["SPACED"] = lambda: render_spaced(spaced_words)
+            with self.profiler.stage("debug_dump"):
+                spaced_file = self.debug_manager.save_rendered_stage("SPACED", self.stage_renderers["SPACED"])
             print(f"Spaced code generated and saved to: {spaced_file}")
 
-            # Create addresser and process the spaced content
-            addresser = ECFAddresser(self.instructions, self.write_addresses, self.read_addresses)
-            addressed_content = addresser.address_code(spaced_content)
+            # Create addresser and process the spaced words
+            program_counter_size = self.project_settings.get('ProgramCounterSize', DEFAULT_PROGRAM_COUNTER_SIZE)
+            with self.profiler.stage("address"):
+                addresser = ECFAddresser(self.instruction_set, 2 ** program_counter_size, self.profiler)
+                addressed = addresser.address_code(spaced_words)
 
-            if addressed_content is None:
+            if addressed is None:
                 self.errors.extend(addresser.get_errors())
                 # Save compilation log with errors
-                self.debug_manager.save_compilation_log(self.errors)
+                self._save_log()
                 return False
 
 
             # Save addressed content using debug manager
-            addressed_file = self.debug_manager.save_stage("ADDRESSED", addressed_content)
+            self.stage_renderers["ADDRESSED"] = lambda: render_addressed(addressed)
+            with self.profiler.stage("debug_dump"):
+                addressed_file = self.debug_manager.save_rendered_stage("ADDRESSED", self.stage_renderers["ADDRESSED"])
             print(f"Addressed code generated and saved to: {addressed_file}")
 
-            # Create implementation and process the addressed content
-            implementation = ECFImplementation(self.instructions, self.write_addresses, self.read_addresses)
-            implemented_content = implementation.implement_code(addressed_content)
+            # Create implementation and encode the addressed words into the image
+            with self.profiler.stage("implement"):
+                implementation = ECFImplementation(self.instruction_set)
+                implemented = implementation.implement_code(addressed)
 
-            if implemented_content is None:
+            if implemented is None:
                 self.errors.extend(implementation.get_errors())
                 # Save compilation log with errors
-                self.debug_manager.save_compilation_log(self.errors)
+                self._save_log()
+                return False
+
+            # The program has to fit the EEPROM part the project is built for
+            if not self._check_device(implemented.image):
+                self._save_log()
                 return False
 
             # Save implemented content using debug manager
-            implemented_file = self.debug_manager.save_stage("IMPLEMENTED", implemented_content)
+            self.implemented = implemented
+            self.stage_renderers["IMPLEMENTED"] = lambda: render_implemented(implemented)
+            with self.profiler.stage("debug_dump"):
+                implemented_file = self.debug_manager.save_rendered_stage("IMPLEMENTED",
+                                                                          self.stage_renderers["IMPLEMENTED"])
             print(f"Implemented code generated and saved to: {implemented_file}")
 
+            self.result = self._build_result(asm_file, implemented, addresser.get_lbl_handler().get_label_addresses())
+            # With dumps on, the stage IR is cached too so a hit can write the same dumps again
+            stages = {"PARSED": statements, "SPACED": spaced_words,
+                      "ADDRESSED": addressed} if self.debug_manager.enabled else {}
+            with self.profiler.stage("cache_store"):
+                self._store_cached('result', (self.result, stages))
+
             # Save successful compilation log
-            self.debug_manager.save_compilation_log(self.errors, info=["Compilation completed successfully"])
+            self._save_log(info=["Compilation completed successfully"])
             return True
 
         except Exception as e:
@@ -211,8 +323,142 @@ class ECFCompiler:
             self.errors.append(f"Error processing ASM file: {e}")
             # Save compilation log with errors
             if self.debug_manager:
-                self.debug_manager.save_compilation_log(self.errors)
+                self._save_log()
+            return False
+
+    def _check_device(self, image) -> bool:
+        """Check the image fits the part named by the Device project setting (no check without one)"""
+        device_name = self.project_settings.get('Device')
+        if not device_name:
+            return True
+        try:
+            device = get_device_profile(device_name)
+        except ValueError as e:
+            self.errors.append(f"Error: {e}")
+            return False
+        if len(image) > device.size:
+            self.errors.append(f"Error: Program needs {len(image)} bytes but the {device.name} holds {device.size}")
+            return False
+        return True
+
+    def _save_log(self, info: list = None) -> None:
+        """Save the compilation log with the errors and stage timings so far"""
+        self.debug_manager.save_compilation_log(self.errors, info=info, timings=self.profiler.format_lines())
+
+    def save_chrome_trace(self, file_path=None) -> Optional[Path]:
+        """
+        Export the last compile's stage timings as Chrome-trace JSON (open in chrome://tracing or Perfetto)
+
+        Args:
+            file_path: Where to write the trace, defaults to Debug/<name>_TRACE.json
+
+        Returns:
+            Path to the trace file, or None if no project was compiled
+        """
+        if file_path is not None:
+            return self.profiler.save_chrome_trace(file_path)
+        if self.debug_manager is None:
+            return None
+        return self.debug_manager.save_stage_now("TRACE", lambda: json.dumps(self.profiler.to_chrome_trace()), "json")
+
+    def dump_stage(self, stage_name: str) -> Optional[Path]:
+        """
+        Write one debug stage from the last compile on demand, even in release mode
+
+        Args:
+            stage_name: "PARSED", "SPACED", "ADDRESSED" or "IMPLEMENTED"
+
+        Returns:
+            Path to the written file, or None if the stage isn't available (see get_errors)
+        """
+        renderer = self.stage_renderers.get(stage_name.upper())
+        if renderer is None or self.debug_manager is None:
+            reason = "was restored from the build cache" if self.from_cache else "has not produced it"
+            self.errors.append(f"Debug stage {stage_name} is not available: the last compile {reason}")
+            return None
+        return self.debug_manager.save_stage_now(stage_name.upper(), renderer)
+
+    def _init_cache(self, proj_path: Path, addw_file: Path, addr_file: Path, inst_file: Path) -> None:
+        """
+        Open the project's build cache and derive the cache keys from the input file contents
+        Every key includes the compiler fingerprint, so entries from another compiler build never match
+        """
+        self.cache = BuildCache(self.proj_dir / "Debug" / ".cache")
+        hashes = [hash_file(path) for path in (addw_file, addr_file, inst_file)]
+        proj_hash = hash_file(proj_path)
+        asm_hash = hash_file(self.proj_dir / f"{self.base_name}.ecfASM")
+
+        # A missing input can't be cached, the normal path reports it
+        self.cache_keys = {}
+        if None not in hashes:
+            self.cache_keys['tables'] = make_key('tables', *hashes)
+        if asm_hash is not None:
+            self.cache_keys['parsed'] = make_key('parsed', asm_hash)
+        if 'tables' in self.cache_keys and asm_hash is not None and proj_hash is not None:
+            # Results cached with dumps off carry no stage IR, so they must not serve a debug build
+            dumps = "dumps" if self.debug_manager.enabled else "no-dumps"
+            self.cache_keys['result'] = make_key('result', self.cache_keys['tables'], proj_hash, asm_hash, dumps)
+
+    def _load_cached(self, kind: str):
+        """Load a cache entry for the current project, None if caching is off or it misses"""
+        if self.cache is None or kind not in self.cache_keys:
+            return None
+        return self.cache.load(kind, self.cache_keys[kind])
+
+    def _store_cached(self, kind: str, value) -> None:
+        """Store a cache entry for the current project if caching is on"""
+        if self.cache is not None and kind in self.cache_keys:
+            self.cache.store(kind, self.cache_keys[kind], value)
+
+    def _load_cached_tables(self) -> bool:
+        """Restore the validated address tables and instruction set from the cache"""
+        tables = self._load_cached('tables')
+        if tables is None:
+            return False
+        self.write_addresses, self.read_addresses, self.instructions, self.instruction_set = tables
+        return True
+
+    def _load_cached_result(self) -> bool:
+        """Restore the whole compile result from the cache and write its stage dumps again"""
+        entry = self._load_cached('result')
+        if entry is None:
             return False
+        result, stages = entry
+
+        # Same contents may live under another path or name
+        result.project_name = self.base_name
+        result.source_file = self.proj_dir / f"{self.base_name}.ecfASM"
+        self.result = result
+        self.from_cache = True
+
+        # The dumps on disk may come from another compile, rewrite them from this result's stages
+        self.stage_renderers = {name: (lambda ir=ir, render=CACHED_STAGE_RENDERERS[name]: render(ir))
+                                for name, ir in stages.items()}
+        self.stage_renderers["IMPLEMENTED"] = lambda: render_implemented(result)
+        with self.profiler.stage("debug_dump"):
+            for name, render in self.stage_renderers.items():
+                self.debug_manager.save_rendered_stage(name, render)
+        self._save_log(info=["Compilation result loaded from build cache"])
+        return True
+
+    def _build_result(self, asm_file: Path, implemented, symbols: dict) -> CompileResult:
+        """Collect the encoded image and its metadata into a CompileResult"""
+        image = implemented.image
+        instruction_count = sum(1 for word in implemented.words.values() if isinstance(word, Opcode))
+        used_bytes = sum(end - start for start, end in image.used_ranges())
+
+        stats = {
+            'rom_size': len(image),
+            'memory_size': image.size,
+            'used_bytes': used_bytes,
+            'instructions': instruction_count,
+            'instruction_bytes': len(implemented.words),
+            'data_bytes': used_bytes - len(implemented.words),
+            'labels': len(symbols),
+        }
+
+        return CompileResult(self.base_name, asm_file, image, symbols,
+                             implemented.source_map, implemented.comments, stats)
 
     def _load_project_file(self, proj_path: Path) -> bool:
         """Load the .ecfproj settings file"""
@@ -302,13 +548,9 @@ class ECFCompiler:
                 f"  {addr}: {entry['name']} (len:{entry['length']}, nops:{entry['leading_nops']}) - {entry['description']}")
 
 
-# Test the compiler
+# Compile from the command line, same as "python -m core build"
 if __name__ == "__main__":
-    compiler = ECFCompiler()
-
-    # Test with your sample project file
-    if compiler.load_project("Poll7Seg.ecfProj"):
-        compiler.print_summary()
-    else:
-        print("Failed to load project")
-        compiler.print_errors()
\ No newline at end of file
+    import sys
+    from core.build import main
+
+    sys.exit(main(["build"] + sys.argv[1:]))
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+POLL_NONE = "none"  # Wait the full write cycle time
+POLL_DATA = "data"  # DATA polling: I/O7 reads inverted until the write completes
+POLL_TOGGLE = "toggle"  # Toggle bit: I/O6 toggles on every read until the write completes
+
+_POLL_CODES = {POLL_NONE: 0, POLL_DATA: 1, POLL_TOGGLE: 2}
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """Size and write timing of one parallel EEPROM part"""
+    name: str
+    size: int  # Bytes
+    page_size: int  # Bytes loaded per write cycle, 1 for byte-write-only parts
+    write_cycle_us: int  # Maximum write cycle time (tWC)
+    polling: str = POLL_NONE  # How the end of a write cycle is detected
+    description: str = ""
+
+    @property
+    def poll_code(self) -> int:
+        """Polling method as sent in the DEV command"""
+        return _POLL_CODES[self.polling]
+
+
+DEVICE_PROFILES: Dict[str, DeviceProfile] = {profile.name: profile for profile in (
+    DeviceProfile("AT28C64B", 8192, 64, 10000, POLL_DATA, "Microchip 64K (8K x 8), 64-byte pages"),
+    DeviceProfile("AT28C64", 8192, 1, 10000, POLL_DATA, "Microchip 64K (8K x 8), byte write"),
+    DeviceProfile("AT28C16", 2048, 1, 1000, POLL_DATA, "Microchip 16K (2K x 8), byte write"),
+    DeviceProfile("AT28C256", 32768, 64, 10000, POLL_DATA, "Microchip 256K (32K x 8), 64-byte pages"),
+    DeviceProfile("X28C64", 8192, 64, 5000, POLL_TOGGLE, "Xicor/Intersil 64K (8K x 8), 64-byte pages"),
+    DeviceProfile("GENERIC", 8192, 1, 10000, POLL_NONE, "Unknown 8K x 8 part, byte writes with the full wait"),
+)}
+
+DEFAULT_DEVICE = "AT28C64B"  # The part fitted on the programmer board
+
+
+def get_device_profile(name: Optional[str] = None) -> DeviceProfile:
+    """
+    Look up a device profile by name (case-insensitive)
+
+    Args:
+        name: Part name, None or empty for the default part
+
+    Returns:
+        The device profile
+
+    Raises:
+        ValueError: If the part is unknown
+    """
+    if not name:
+        return DEVICE_PROFILES[DEFAULT_DEVICE]
+    profile = DEVICE_PROFILES.get(str(name).strip().upper())
+    if profile is None:
+        raise ValueError(f"Unknown device '{name}', expected one of: {', '.join(DEVICE_PROFILES)}")
+    return profile
+
+
+def device_for_project(proj_file_path: Union[str, Path]) -> DeviceProfile:
+    """
+    Read the Device setting of an .ecfproj file
+
+    Args:
+        proj_file_path: Path to the .ecfproj file
+
+    Returns:
+        The project's device profile, the default part if the setting is missing
+
+    Raises:
+        ValueError: If the project names an unknown part
+    """
+    name = None
+    with open(proj_file_path, 'r') as f:
+        for line in f:
+            key, _, value = line.strip().partition('=')
+            if key == 'Device':
+                name = value
+    return get_device_profile(name)
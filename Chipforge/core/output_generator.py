@@ -2,53 +2,50 @@ import os
 from datetime import datetime
 
 
-def generate_output_files(implemented_file_path, project_name, project_dir):
-    print(f"Attempting to generate output files from: {implemented_file_path}")
-    if not os.path.exists(implemented_file_path):
-        print(f"Warning: Implemented file not found: {implemented_file_path}")
+def generate_output_files(result, project_dir, profiler=None):
+    """
+    Generate rom_data.h, the .ecfROM and .ecfSEG files and the MATLAB data from a compile result.
+
+    Args:
+        result: CompileResult returned by ECFCompiler
+        project_dir: Project directory, files are written to its Output folder
+        profiler: CompileProfiler to record the "emit" stage in (optional), result.profile is refreshed
+
+    Returns:
+        True if the files were written, False otherwise
+    """
+    image = result.image
+    if len(image) == 0:
+        print("Warning: Compile result contains no data")
         return False
 
     try:
-        rom_data = []
-        with open(implemented_file_path, 'r') as f:
-            lines = f.readlines()
-            print(f"Read {len(lines)} lines from {implemented_file_path}")
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    print("Skipping empty line")
-                    continue
-                number_str = line.split('//')[0].strip()
-                if number_str:
-                    try:
-                        rom_data.append(int(number_str))
-                        print(f"Parsed number: {number_str}")
-                    except ValueError:
-                        print(f"Warning: Could not convert '{number_str}' to integer")
-                else:
-                    print(f"Skipping line with no number: {line}")
-
-        if not rom_data:
-            print("Warning: No valid data found in implemented file")
-            return False
-        print(f"Extracted {len(rom_data)} valid numbers")
-
         output_dir = os.path.join(project_dir, "Output")
-        print(f"Creating output directory: {output_dir}")
         os.makedirs(output_dir, exist_ok=True)
 
-        generate_c_header(rom_data, implemented_file_path, output_dir)
-        generate_ecfrom(rom_data, project_name, output_dir)
-        generate_matlab(rom_data, output_dir)
+        if profiler is None:
+            _emit(result, output_dir)
+        else:
+            with profiler.stage("emit"):
+                _emit(result, output_dir)
+            result.profile = profiler.as_dict()
 
-        print(f"Generated output files in: {output_dir}")
+        print(f"Generated output files ({len(image)} bytes) in: {output_dir}")
         return True
 
     except Exception as e:
         print(f"Error generating output files: {e}")
         return False
 
-def generate_c_header(rom_data, source_file, output_dir):
+def _emit(result, output_dir):
+    image = result.image
+    generate_c_header(image, result.source_file, output_dir)
+    generate_ecfrom(image, result.project_name, output_dir)
+    generate_segments(image, result.project_name, output_dir)
+    generate_matlab(image, output_dir)
+
+
+def generate_c_header(image, source_file, output_dir):
     """
     Generate rom_data.h C header file.
     """
@@ -59,6 +56,7 @@ def generate_c_header(rom_data, source_file, output_dir):
     timestamp = now.strftime("%a %d/%m/%Y at %H:%M:%S")
 
     # Use actual data length (no padding)
+    rom_data = image.to_bytes()
     rom_size = len(rom_data)
 
     with open(output_path, 'w') as f:
@@ -70,15 +68,9 @@ def generate_c_header(rom_data, source_file, output_dir):
         f.write(f"#define ROM_DATA_SIZE {rom_size}\n")
         f.write(f"const uint8_t rom_data[{rom_size}] = {{\n")
 
-        # Write data in rows of 16 values
-        for i in range(0, len(rom_data), 16):
-            row = rom_data[i:i + 16]
-            row_str = ", ".join(str(val) for val in row)
-            # Add comma except for the last line
-            if i + 16 < len(rom_data):
-                f.write(f"{row_str},\n")
-            else:
-                f.write(f"{row_str}\n")
+        # Write data in rows of 16 values, comma after every row except the last
+        rows = (", ".join(str(val) for val in rom_data[i:i + 16]) for i in range(0, rom_size, 16))
+        f.write(",\n".join(rows) + "\n")
 
         f.write("};\n\n")
         f.write("// Array size\n\n")
@@ -87,20 +79,33 @@ def generate_c_header(rom_data, source_file, output_dir):
     print(f"Generated: {output_path}")
 
 
-def generate_ecfrom(rom_data, project_name, output_dir):
+def generate_ecfrom(image, project_name, output_dir):
     """
     Generate projectName.ecfROM file (one number per line, no comments).
+    Unused addresses below the highest used one are written as 0.
     """
     output_path = os.path.join(output_dir, f"{project_name}.ecfROM")
 
     with open(output_path, 'w') as f:
-        for value in rom_data:
-            f.write(f"{value}\n")
+        f.write("".join(f"{value}\n" for value in image.to_bytes()))
+
+    print(f"Generated: {output_path}")
+
+
+def generate_segments(image, project_name, output_dir):
+    """
+    Generate projectName.ecfSEG file (one "START<tab>LENGTH" line per used address range).
+    Lets the programmer skip the ORG padding the .ecfROM file fills with 0.
+    """
+    output_path = os.path.join(output_dir, f"{project_name}.ecfSEG")
+
+    with open(output_path, 'w') as f:
+        f.write("".join(f"{start}\t{end - start}\n" for start, end in image.used_ranges()))
 
     print(f"Generated: {output_path}")
 
 
-def generate_matlab(rom_data, output_dir):
+def generate_matlab(image, output_dir):
     """
     Generate rom_data.mat MATLAB file.
     """
@@ -111,18 +116,11 @@ def generate_matlab(rom_data, output_dir):
         from scipy.io import savemat
         import numpy as np
 
-        # Pad or trim to 8192 values
-        if len(rom_data) < 8192:
-            # Pad with zeros
-            padded_data = rom_data + [0] * (8192 - len(rom_data))
-        elif len(rom_data) > 8192:
-            # Trim to 8192
-            padded_data = rom_data[:8192]
-        else:
-            padded_data = rom_data
+        # Whole program memory, unused addresses are already zero
+        padded_data = bytes(image.data)
 
-        # Create column vector (8192x1) to match MATLAB format
-        rom_array = np.array(padded_data, dtype=np.uint8).reshape(-1, 1)
+        # Create column vector (e.g. 8192x1) to match MATLAB format
+        rom_array = np.frombuffer(padded_data, dtype=np.uint8).reshape(-1, 1)
 
         # Create MATLAB structure
         mat_data = {
@@ -137,13 +135,8 @@ def generate_matlab(rom_data, output_dir):
         print("Warning: scipy not available, creating .m file instead")
         output_path = os.path.join(output_dir, "load_rom_data.m")
 
-        # Pad or trim to 8192 values
-        if len(rom_data) < 8192:
-            padded_data = rom_data + [0] * (8192 - len(rom_data))
-        elif len(rom_data) > 8192:
-            padded_data = rom_data[:8192]
-        else:
-            padded_data = rom_data
+        # Whole program memory, unused addresses are already zero
+        padded_data = bytes(image.data)
 
         with open(output_path, 'w') as f:
             f.write("% Auto-generated ROM data loader\n")
@@ -152,11 +145,10 @@ def generate_matlab(rom_data, output_dir):
             f.write("rom_data = [\n")
 
             # Write data as column vector (one value per line for proper column vector)
-            for val in padded_data:
-                f.write(f"    {val}\n")
+            f.write("".join(f"    {val}\n" for val in padded_data))
 
             f.write("];\n\n")
-            f.write("% rom_data is now available as a column vector (8192x1)\n")
+            f.write(f"% rom_data is now available as a column vector ({image.size}x1)\n")
             f.write("fprintf('Loaded rom_data: %d values\\n', length(rom_data));\n")
 
         print(f"Generated: {output_path} (MATLAB script - run this in MATLAB to load data)")
\ No newline at end of file
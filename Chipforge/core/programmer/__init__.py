@@ -0,0 +1,89 @@
+"""
+ECF Programmer Package
+
+Host-side modules for the ECF_PRG programmer (STM32 USB CDC serial link):
+- transport: ProgrammerTransport interface, its pyserial backend, port detection and a pseudo-terminal bridge
+- protocol: Command formatting and response parsing for the firmware's line protocol
+- framing: COBS-framed binary protocol with CRC16, negotiated with the BIN command
+- pipeline: Sequence-numbered command window with retransmission, over ASCII lines or frames
+- block_writer: Page-aligned programming of the used address ranges with PB block-write commands
+- verify: Mode switching, CRC range checks with bisection to the differing bytes, and VA read-back
+- worker: Single I/O thread owning the port, running queued jobs with futures, progress and cancel
+- session: Reconnecting programmer sessions that resume interrupted writes from a checkpoint
+- repair: Targeted rewrite and re-verification of the addresses a validation flagged
+- differential: Per-programmer records of the last image and writes of only the changed pages
+- client: asyncio client running each programmer's commands on its own I/O thread, for scripts and tests
+- gang: Programming and validating one image on several programmers concurrently, with a pass/fail report
+- standin: In-process stand-in for the programmer firmware and its EEPROM
+
+The EEPROM part profiles live in core.devices, shared with the compiler, and are re-exported here.
+"""
+
+from .protocol import ProgrammerError, LinkError, ADDRESS_LIMIT, BLOCK_SIZE
+from .transport import (ProgrammerTransport, SerialTransport, PtyBridge, open_transport, programmer_id,
+                        find_ecf_programmer, STANDIN_NAME)
+from .framing import FrameError, FramedPort, enter_framing, leave_framing, framed_session
+from .pipeline import CommandPipeline, DEFAULT_WINDOW, run_command
+from core.devices import DeviceProfile, DEVICE_PROFILES, get_device_profile
+from .block_writer import configure_device, program_block, program_image, program_ranges
+from .verify import set_mode, read_range, range_crc, verify_ranges, group_addresses, format_ranges
+from .worker import ProgrammerWorker, JobContext, JobFuture, JobCancelled
+from .session import ProgrammingSession, WriteCheckpoint
+from .repair import RepairReport, repair_mismatches
+from .differential import DeviceRecord, DeviceRecordStore, ProgramReport, program_differential
+from .client import ProgrammerClient
+from .gang import GangResult, GangReport, gang_program, run_gang
+from .standin import ProgrammerStandIn
+
+__all__ = [
+    'ProgrammerError',
+    'LinkError',
+    'ADDRESS_LIMIT',
+    'BLOCK_SIZE',
+    'ProgrammerTransport',
+    'SerialTransport',
+    'PtyBridge',
+    'open_transport',
+    'programmer_id',
+    'find_ecf_programmer',
+    'STANDIN_NAME',
+    'FrameError',
+    'FramedPort',
+    'enter_framing',
+    'leave_framing',
+    'framed_session',
+    'CommandPipeline',
+    'DEFAULT_WINDOW',
+    'run_command',
+    'DeviceProfile',
+    'DEVICE_PROFILES',
+    'get_device_profile',
+    'configure_device',
+    'program_block',
+    'program_image',
+    'program_ranges',
+    'set_mode',
+    'read_range',
+    'range_crc',
+    'verify_ranges',
+    'group_addresses',
+    'format_ranges',
+    'ProgrammerWorker',
+    'JobContext',
+    'JobFuture',
+    'JobCancelled',
+    'ProgrammingSession',
+    'WriteCheckpoint',
+    'RepairReport',
+    'repair_mismatches',
+    'DeviceRecord',
+    'DeviceRecordStore',
+    'ProgramReport',
+    'program_differential',
+    'ProgrammerClient',
+    'GangResult',
+    'GangReport',
+    'gang_program',
+    'run_gang',
+    'ProgrammerStandIn'
+]
@@ -0,0 +1,116 @@
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .protocol import ProgrammerError, ADDRESS_LIMIT, BLOCK_SIZE, split_blocks
+from .pipeline import DEFAULT_WINDOW, codec_for, run_pipelined, run_command
+
+ProgressCallback = Callable[[int, int], None]  # (bytes done, bytes total)
+
+
+def configure_device(port, device: DeviceProfile) -> None:
+    """
+    Tell the programmer which EEPROM part is fitted (size, page size, write cycle and polling)
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn), or a FramedPort
+        device: Profile of the part
+
+    Raises:
+        ProgrammerError: If the programmer rejects the profile
+    """
+    # Parts larger than the address bus are programmed through its first 8 KiB
+    size = min(device.size, ADDRESS_LIMIT)
+    reply = run_command(port, codec_for(port).device(size, device.page_size, device.write_cycle_us,
+                                                     device.poll_code))
+    if reply != (size, device.page_size, device.write_cycle_us, device.poll_code):
+        raise ProgrammerError(f"Programmer kept a different device setup: {reply}")
+
+
+def block_size_for(device: Optional[DeviceProfile]) -> int:
+    """Bytes per PB command: one page for page-write parts, the protocol maximum for byte-write parts"""
+    if device is None or device.page_size <= 1:
+        return BLOCK_SIZE
+    return min(device.page_size, BLOCK_SIZE)
+
+
+def program_block(port, address: int, data: bytes) -> None:
+    """
+    Write one block with a PB command and check its acknowledgement
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn), or a FramedPort
+        address: First address of the block
+        data: 1 to BLOCK_SIZE bytes that don't cross a block boundary
+
+    Raises:
+        ProgrammerError: If the programmer rejects the block or acknowledges a different one
+    """
+    run_command(port, codec_for(port).program_block(address, data))
+
+
+def program_image(port, image: RomImage, device: Optional[DeviceProfile] = None,
+                  progress: Optional[ProgressCallback] = None, window: int = DEFAULT_WINDOW) -> int:
+    """
+    Program the image's used address ranges with block writes, skipping unused gaps
+    Blocks are aligned to the device's pages, the programmer waits (or polls) once per page
+
+    Args:
+        port: Open serial port in programming mode (or ProgrammerStandIn)
+        image: ROM image to write
+        device: EEPROM part, sent to the programmer first; None keeps the programmer's current setup
+        progress: Called with (bytes done, bytes total) after each block
+        window: PB commands in flight at most, see CommandPipeline
+
+    Returns:
+        Number of bytes written (the used bytes of the image)
+
+    Raises:
+        ProgrammerError: If the image doesn't fit the part, or when a block is still rejected,
+                         unacknowledged or mismatched after its retransmissions
+    """
+    total = len(image)
+    if device is not None:
+        capacity = min(device.size, ADDRESS_LIMIT)
+        if total > capacity:
+            raise ProgrammerError(f"Image needs {total} bytes but the {device.name} holds {capacity}")
+        configure_device(port, device)
+
+    return program_ranges(port, image, image.used_ranges(), device, progress, window)
+
+
+def program_ranges(port, data: Union[RomImage, bytes, bytearray], ranges: Iterable[Tuple[int, int]],
+                   device: Optional[DeviceProfile] = None, progress: Optional[ProgressCallback] = None,
+                   window: int = DEFAULT_WINDOW) -> int:
+    """
+    Program address ranges with block writes aligned to the device's pages
+
+    Args:
+        port: Open serial port in programming mode (or ProgrammerStandIn)
+        data: Image or bytes holding the contents from address 0
+        ranges: (start, end) pairs, end exclusive
+        device: EEPROM part, only used for its page size
+        progress: Called with (bytes done, bytes total) after each block
+        window: PB commands in flight at most, see CommandPipeline
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        ProgrammerError: When a block is still rejected, unacknowledged or mismatched after its retransmissions
+    """
+    block_size = block_size_for(device)
+    blocks = [block for start, end in ranges for block in split_blocks(start, end, block_size)]
+    to_write = sum(end - start for start, end in blocks)
+    written = 0
+
+    def block_done(index, acked):
+        nonlocal written
+        written += acked[1]
+        if progress is not None:
+            progress(written, to_write)
+
+    codec = codec_for(port)
+    commands = [codec.program_block(start, bytes(data[start:end])) for start, end in blocks]
+    run_pipelined(port, commands, window, block_done)
+    return written
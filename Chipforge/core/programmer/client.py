@@ -0,0 +1,196 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .protocol import read_line
+from .transport import ProgrammerTransport, DEFAULT_TIMEOUT, open_transport, programmer_id
+from .framing import framed_session
+from .block_writer import ProgressCallback
+from .verify import set_mode, read_range, verify_ranges
+from .worker import JobContext, ProgrammerWorker
+from .session import DEFAULT_RECONNECTS, ProgrammingSession
+from .differential import DeviceRecordStore, ProgramReport, program_differential
+
+BUS_COMMANDS = ("RDA", "RDD")
+
+
+class ProgrammerClient:
+    """
+    asyncio interface to one ECF_PRG programmer
+    Every command runs on the programmer's own ProgrammerWorker thread, so the blocking serial reads
+    never stall the event loop and several clients on one loop program their devices concurrently.
+    Cancelling an awaiting task stops a running write at its next page, as the GUI's Cancel button does
+    """
+
+    def __init__(self, transport: ProgrammerTransport, device_id: str,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Wrap an open transport, connect() opens one by name
+
+        Args:
+            transport: Open link to the programmer, owned by the client from here on
+            device_id: Stable programmer identity keying its DeviceRecord
+            loop: Loop the callbacks run on, defaults to the running one
+        """
+        self.transport = transport
+        self.device_id = device_id
+        self.loop = loop or asyncio.get_running_loop()
+        self._worker = ProgrammerWorker(transport, self._dispatch, name=f"programmer-io {transport.name}")
+
+    @classmethod
+    async def connect(cls, port_name: str, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                      device_id: Optional[str] = None) -> "ProgrammerClient":
+        """
+        Open a programmer by name
+
+        Args:
+            port_name: Serial device, or "standin[:option=value,...]" for the in-process stand-in
+            timeout: Seconds a read waits
+            device_id: Programmer identity, defaults to its USB serial number or port name
+
+        Returns:
+            The connected client
+
+        Raises:
+            OSError: If the serial port can't be opened
+            ProgrammerError: On bad stand-in options
+        """
+        loop = asyncio.get_running_loop()
+        transport = await loop.run_in_executor(None, open_transport, port_name, timeout)
+        if device_id is None:
+            device_id = await loop.run_in_executor(None, programmer_id, port_name)
+        return cls(transport, device_id, loop)
+
+    async def close(self) -> None:
+        """Cancel pending commands, stop the I/O thread and close the port"""
+        await self.loop.run_in_executor(None, self._worker.stop)
+        self.transport.close()
+
+    async def __aenter__(self) -> "ProgrammerClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def name(self) -> str:
+        return self.transport.name
+
+    async def run(self, job: Callable[[JobContext], Any], progress: Optional[ProgressCallback] = None) -> Any:
+        """
+        Run a blocking job on the programmer's I/O thread
+
+        Args:
+            job: Called with a JobContext, its return value is the result
+            progress: Called on the event loop with (done, total) when the job reports progress
+
+        Returns:
+            The job's result
+
+        Raises:
+            Whatever the job raised; asyncio.CancelledError when the awaiting task is cancelled
+        """
+        return await asyncio.wrap_future(self._worker.submit(job, progress), loop=self.loop)
+
+    async def set_mode(self, mode: str) -> str:
+        """
+        Switch the programmer's state machine
+
+        Args:
+            mode: "SNF", "EMU", "PRG", "VAL" or "DBG"
+
+        Returns:
+            The programmer's reply
+        """
+        return await self.run(lambda context: set_mode(context.port, mode))
+
+    async def read_bus(self, bus: str) -> str:
+        """
+        Read the address bus (RDA) or data bus (RDD)
+
+        Returns:
+            The reply, e.g. "RDD: 1111 1111 (255/0xFF)"
+        """
+        if bus not in BUS_COMMANDS:
+            raise ValueError(f"Unknown bus command {bus}, expected one of {', '.join(BUS_COMMANDS)}")
+
+        def exchange(context):
+            context.port.write(f"{bus}\n".encode('ascii'))
+            return read_line(context.port)
+
+        return await self.run(exchange)
+
+    async def program_image(self, image: RomImage, device: DeviceProfile,
+                            store: Optional[DeviceRecordStore] = None, verify: bool = True,
+                            fill_value: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+                            reconnects: int = DEFAULT_RECONNECTS) -> ProgramReport:
+        """
+        Program an image differentially, resuming after link failures, then reset the programmer FSM
+
+        Args:
+            image: ROM image to write
+            device: EEPROM part
+            store: Record store, defaults to ~/.ecf/device_records
+            verify: Read the written blocks back
+            fill_value: Byte the unused addresses should hold, see program_differential
+            progress: Called on the event loop with (bytes done, bytes total)
+            reconnects: Link failures survived before giving up
+
+        Returns:
+            ProgramReport describing the write
+
+        Raises:
+            ProgrammerError: On a communication error or when verification finds mismatches
+        """
+        def program(context):
+            with ProgrammingSession(context.port, self.transport.reopen, device, reconnects=reconnects) as session:
+                report = program_differential(session.port, image, device, self.device_id, store, verify,
+                                              fill_value, context.progress, session)
+            set_mode(session.serial, "SNF")
+            set_mode(session.serial, "PRG")
+            return report
+
+        return await self.run(program, progress)
+
+    async def validate_image(self, image: RomImage,
+                             ranges: Optional[List[Tuple[int, int]]] = None) -> List[int]:
+        """
+        Compare the device with an image, one CRC per range and bisection of the differing ones
+
+        Args:
+            image: Expected contents
+            ranges: (start, end) pairs to check, defaults to the image's used ranges
+
+        Returns:
+            Mismatching addresses in order, empty when the device matches
+        """
+        ranges = image.used_ranges() if ranges is None else ranges
+
+        def validate(context):
+            with framed_session(context.port) as link:
+                set_mode(link, "VAL")
+                return verify_ranges(link, image, ranges)
+
+        return await self.run(validate)
+
+    async def dump(self, start: int, end: int) -> bytes:
+        """
+        Read an address range back
+
+        Args:
+            start: First address
+            end: One past the last address
+
+        Returns:
+            The bytes read
+        """
+        def read(context):
+            with framed_session(context.port) as link:
+                set_mode(link, "VAL")
+                return read_range(link, start, end)
+
+        return await self.run(read)
+
+    def _dispatch(self, callback: Callable[[], None]) -> None:
+        self.loop.call_soon_threadsafe(callback)
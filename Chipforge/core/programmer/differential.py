@@ -0,0 +1,301 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+import base64
+import hashlib
+import json
+import os
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .protocol import ProgrammerError, ADDRESS_LIMIT
+from .block_writer import ProgressCallback, configure_device, block_size_for, program_ranges
+from .verify import set_mode, ranges_match, verify_ranges
+from .session import ProgrammingSession
+
+DEFAULT_RECORD_DIR = Path.home() / ".ecf" / "device_records"
+
+MODE_FULL = "full"
+MODE_DIFFERENTIAL = "differential"
+MODE_UNCHANGED = "unchanged"
+
+
+@dataclass
+class DeviceRecord:
+    """Last image known to be in one programmer's EEPROM"""
+    device_id: str  # USB serial number of the programmer, or its port name
+    device_name: str  # DeviceProfile name of the part
+    data: bytes  # Contents from address 0
+    validated: bool = False  # Read back and compared after it was written
+    updated: str = ""  # ISO timestamp of the last write or validation
+    known: Optional[List[Tuple[int, int]]] = None  # Ranges of data actually on the device, None for all of it
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    def known_mask(self) -> bytearray:
+        """One byte per address of data, 1 where the device contents are known"""
+        if self.known is None:
+            return bytearray(b"\x01" * len(self.data))
+        return ranges_to_mask(self.known, len(self.data))
+
+
+@dataclass
+class ProgramReport:
+    """What program_differential did"""
+    mode: str  # MODE_FULL, MODE_DIFFERENTIAL or MODE_UNCHANGED
+    bytes_written: int = 0
+    blocks: List[Tuple[int, int]] = field(default_factory=list)  # Blocks written, end exclusive
+    reason: str = ""  # Why a full write was needed
+
+
+class DeviceRecordStore:
+    """
+    One JSON file per programmer holding the last image written to it
+    Files are written atomically so a crash never leaves a half-written record
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Initialize the store
+
+        Args:
+            directory: Folder for the records, defaults to ~/.ecf/device_records
+        """
+        self.directory = Path(directory) if directory is not None else DEFAULT_RECORD_DIR
+
+    def load(self, device_id: str) -> Optional[DeviceRecord]:
+        """Return the device's record, or None if it is missing, unreadable or corrupt"""
+        try:
+            with open(self._path(device_id), 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            known = stored.get("known")
+            record = DeviceRecord(stored["device_id"], stored["device_name"], base64.b64decode(stored["data"]),
+                                  stored["validated"], stored.get("updated", ""),
+                                  None if known is None else [(start, end) for start, end in known])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if record.device_id != device_id or record.digest != stored.get("sha256"):
+            return None
+        return record
+
+    def save(self, record: DeviceRecord) -> bool:
+        """
+        Store a record, replacing the device's previous one
+
+        Returns:
+            True if written, False if the folder isn't writable
+        """
+        record.updated = datetime.now().isoformat(timespec='seconds')
+        stored = {
+            "device_id": record.device_id,
+            "device_name": record.device_name,
+            "validated": record.validated,
+            "updated": record.updated,
+            "sha256": record.digest,
+            "known": record.known,
+            "data": base64.b64encode(record.data).decode('ascii'),
+        }
+        path = self._path(record.device_id)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(stored, f)
+            os.replace(temp_path, path)
+            return True
+        except OSError:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return False
+
+    def forget(self, device_id: str) -> None:
+        """Drop a device's record, e.g. when its contents are no longer known"""
+        try:
+            self._path(device_id).unlink()
+        except OSError:
+            pass
+
+    def _path(self, device_id: str) -> Path:
+        # Port names like COM3 or /dev/ttyACM0 aren't safe file names
+        return self.directory / f"{hashlib.sha1(device_id.encode()).hexdigest()[:16]}.json"
+
+
+def ranges_to_mask(ranges: List[Tuple[int, int]], size: int) -> bytearray:
+    """One byte per address below size, 1 inside the ranges"""
+    mask = bytearray(size)
+    for start, end in ranges:
+        end = min(end, size)
+        if start < end:
+            mask[start:end] = b"\x01" * (end - start)
+    return mask
+
+
+def mask_to_ranges(mask: bytearray) -> List[Tuple[int, int]]:
+    """(start, end) ranges of the set addresses of a mask, end exclusive"""
+    ranges = []
+    start = None
+    for address, bit in enumerate(mask):
+        if bit and start is None:
+            start = address
+        elif not bit and start is not None:
+            ranges.append((start, address))
+            start = None
+    if start is not None:
+        ranges.append((start, len(mask)))
+    return ranges
+
+
+def changed_blocks(old: bytes, new: bytes, block_size: int, known: Optional[bytearray] = None,
+                   wanted: Optional[bytearray] = None) -> List[Tuple[int, int]]:
+    """
+    Find the blocks to write to turn old into new
+    Within each block only the span from its first to its last changed byte is kept; a block never
+    spans an address outside wanted, so ORG gaps between used ranges are never written
+
+    Args:
+        old: Device contents from address 0 (addresses past its end count as changed)
+        new: Contents to program from address 0
+        block_size: Page size the blocks must not cross
+        known: Mask over old, addresses outside it count as changed (None: all of old is known)
+        wanted: Mask over new, addresses outside it are left alone (None: all of new is wanted)
+
+    Returns:
+        (start, end) blocks in address order, end exclusive
+    """
+    blocks = []
+    current_page = None
+    for address, value in enumerate(new):
+        if wanted is not None and not wanted[address]:
+            current_page = None  # The next changed byte starts a new block past the gap
+            continue
+        if address < len(old) and old[address] == value and (known is None or known[address]):
+            continue
+        page = address // block_size
+        if page == current_page:
+            blocks[-1] = (blocks[-1][0], address + 1)
+        else:
+            blocks.append((address, address + 1))
+            current_page = page
+    return blocks
+
+
+def _check_record(port, record: Optional[DeviceRecord], device: DeviceProfile,
+                  blocks: List[Tuple[int, int]]) -> str:
+    """
+    Decide whether the record can be trusted for a differential write
+
+    Returns:
+        Empty string if it can, otherwise the reason for a full write
+    """
+    if record is None:
+        return "no record of this programmer"
+    if record.device_name != device.name:
+        return f"last written as {record.device_name}"
+    if not record.validated:
+        return "last image was never validated"
+
+    # CRC the known addresses the write won't touch, a swapped or externally written part fails here
+    written = ranges_to_mask(blocks, len(record.data))
+    known = record.known_mask()
+    untouched = mask_to_ranges(bytearray(k and not w for k, w in zip(known, written)))
+    if untouched:
+        set_mode(port, "VAL")
+        if not ranges_match(port, record.data, untouched):
+            return "device differs from the record"
+    return ""
+
+
+def program_differential(port, image: RomImage, device: DeviceProfile, device_id: str,
+                         store: Optional[DeviceRecordStore] = None, verify: bool = True,
+                         fill_value: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+                         session: Optional[ProgrammingSession] = None) -> ProgramReport:
+    """
+    Program only the blocks of the image's used ranges that differ from the last image validated
+    on this programmer. Falls back to writing every used range when there is no usable record
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn), left in PRG mode
+        image: ROM image to write
+        device: EEPROM part
+        device_id: Stable programmer identity (USB serial number, else port name)
+        store: Record store, defaults to ~/.ecf/device_records
+        verify: Read the written blocks back; the record is only marked validated if they match
+        fill_value: Byte the unused addresses of the device should hold; None leaves them alone.
+                    Only the first write to a device pays for filling them
+        progress: Called with (bytes done, bytes total) after each block
+        session: Write through this session so a link failure reconnects and resumes the write;
+                 port must be the session's port, the session's current one is used after the write
+
+    Returns:
+        ProgramReport describing the write
+
+    Raises:
+        ProgrammerError: On a communication error or when verification finds mismatches
+    """
+    store = store if store is not None else DeviceRecordStore()
+    total = len(image)
+    capacity = min(device.size, ADDRESS_LIMIT)
+    if total > capacity:
+        raise ProgrammerError(f"Image needs {total} bytes but the {device.name} holds {capacity}")
+
+    block_size = block_size_for(device)
+    if fill_value is None:
+        target = bytes(image.data[:total])
+        wanted = ranges_to_mask(image.used_ranges(), total)
+    else:
+        filled = bytearray([fill_value]) * capacity
+        for start, end in image.used_ranges():
+            filled[start:end] = image.data[start:end]
+        target = bytes(filled)
+        wanted = None
+
+    record = store.load(device_id)
+    blocks = []
+    if record is not None:
+        blocks = changed_blocks(record.data, target, block_size, record.known_mask(), wanted)
+    reason = _check_record(port, record, device, blocks)
+
+    if reason:
+        report = ProgramReport(MODE_FULL, reason=reason)
+        blocks = changed_blocks(b"", target, block_size, wanted=wanted)
+        old_data, known = b"", bytearray(len(target))
+    else:
+        report = ProgramReport(MODE_DIFFERENTIAL if blocks else MODE_UNCHANGED)
+        old_data, known = record.data, record.known_mask()
+
+    # The device contents are uncertain from the first write until the record is saved again
+    if blocks:
+        store.forget(device_id)
+
+    set_mode(port, "PRG")
+    configure_device(port, device)
+    if session is not None:
+        report.bytes_written = session.program(target, blocks, progress)
+        port = session.port
+    else:
+        report.bytes_written = program_ranges(port, target, blocks, device, progress)
+    report.blocks = blocks
+
+    validated = report.mode == MODE_UNCHANGED
+    if verify and blocks:
+        set_mode(port, "VAL")
+        mismatches = verify_ranges(port, target, blocks)
+        set_mode(port, "PRG")
+        if mismatches:
+            raise ProgrammerError(f"{len(mismatches)} bytes did not verify, first at address {mismatches[0]}")
+        validated = True
+
+    # Written blocks now hold the target, everything else keeps what the record says
+    size = max(len(old_data), len(target))
+    data = bytearray(old_data) + bytearray(size - len(old_data))
+    known.extend(bytearray(size - len(known)))
+    for start, end in blocks:
+        data[start:end] = target[start:end]
+        known[start:end] = b"\x01" * (end - start)
+    store.save(DeviceRecord(device_id, device.name, bytes(data), validated, known=mask_to_ranges(known)))
+    return report
@@ -0,0 +1,216 @@
+import binascii
+import struct
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from .protocol import ProgrammerError, LinkError
+
+FRAMING_VERSION = 1
+FRAME_DELIMITER = b"\x00"
+FRAME_MAX_PAYLOAD = 66  # Address plus one 64-byte block
+
+# Command ids, replies carry the same id (or FRAME_ERROR with an ASCII message)
+FRAME_MODE = 0x01  # STATE -> STATE, CHANGED
+FRAME_DEVICE = 0x02  # SIZE16, PAGE8, TWC32, POLL8 -> the same
+FRAME_PROGRAM_BLOCK = 0x03  # ADDR16, DATA... -> ADDR16, LEN8
+FRAME_READ_BLOCK = 0x04  # ADDR16, LEN8 -> ADDR16, DATA...
+FRAME_RANGE_CRC = 0x05  # ADDR16, LEN16 -> ADDR16, LEN16, CRC32
+FRAME_EXIT = 0x0F  # -> (empty), back to ASCII lines
+FRAME_ERROR = 0x7F
+
+READ_BLOCK_MAX = 64  # Bytes per FRAME_READ_BLOCK
+MODE_STATES = ("SNF", "EMU", "PRG", "VAL", "DBG")  # FRAME_MODE state numbers, the firmware's SystemState_t
+
+_HEADER = struct.Struct("<BH")  # Command id, sequence number
+_CRC = struct.Struct("<H")
+
+
+class FrameError(LinkError):
+    """A frame failed its COBS decoding, length or CRC check"""
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), as the firmware's Crc16"""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data: bytes) -> bytes:
+    """
+    Consistent Overhead Byte Stuffing: the result holds no zero bytes
+
+    Args:
+        data: Bytes to encode
+
+    Returns:
+        The encoded bytes, without the frame delimiter
+    """
+    encoded = bytearray(b"\x00")
+    code_index = 0
+    for byte in data:
+        if byte == 0:
+            encoded[code_index] = len(encoded) - code_index
+            code_index = len(encoded)
+            encoded.append(0)
+        else:
+            encoded.append(byte)
+            if len(encoded) - code_index == 0xFF:
+                encoded[code_index] = 0xFF
+                code_index = len(encoded)
+                encoded.append(0)
+    encoded[code_index] = len(encoded) - code_index
+    return bytes(encoded)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    """
+    Undo cobs_encode
+
+    Raises:
+        FrameError: If the data is not valid COBS
+    """
+    decoded = bytearray()
+    index = 0
+    while index < len(data):
+        code = data[index]
+        index += 1
+        if code == 0 or index + code - 1 > len(data):
+            raise FrameError("Corrupt frame (bad COBS code)")
+        decoded.extend(data[index:index + code - 1])
+        index += code - 1
+        if code < 0xFF and index < len(data):
+            decoded.append(0)
+    return bytes(decoded)
+
+
+def encode_frame(command: int, sequence: int, payload: bytes = b"") -> bytes:
+    """
+    Build one frame: COBS(CMD, SEQ16, PAYLOAD, CRC16) followed by the 0x00 delimiter
+
+    Args:
+        command: Command id (FRAME_*)
+        sequence: Sequence number, 0-65535
+        payload: Command arguments
+
+    Returns:
+        The encoded frame
+    """
+    if len(payload) > FRAME_MAX_PAYLOAD:
+        raise ValueError(f"Frame payload must be at most {FRAME_MAX_PAYLOAD} bytes, got {len(payload)}")
+    body = _HEADER.pack(command, sequence) + payload
+    return cobs_encode(body + _CRC.pack(crc16(body))) + FRAME_DELIMITER
+
+
+def decode_frame(frame: bytes) -> Tuple[int, int, bytes]:
+    """
+    Check and unpack one frame
+
+    Args:
+        frame: Frame with or without its trailing delimiter
+
+    Returns:
+        (command id, sequence number, payload)
+
+    Raises:
+        FrameError: If the frame is corrupt
+    """
+    body = cobs_decode(frame.rstrip(FRAME_DELIMITER))
+    if len(body) < _HEADER.size + _CRC.size:
+        raise FrameError(f"Frame too short ({len(body)} bytes)")
+    (crc,) = _CRC.unpack_from(body, len(body) - _CRC.size)
+    body = body[:-_CRC.size]
+    if crc16(body) != crc:
+        raise FrameError("Frame CRC mismatch")
+    command, sequence = _HEADER.unpack_from(body)
+    return command, sequence, body[_HEADER.size:]
+
+
+class FramedPort:
+    """
+    A serial port switched to the framed binary protocol
+    Pipelined commands (see CommandPipeline) are sent as frames while it is in use
+    """
+
+    def __init__(self, port):
+        """
+        Initialize the wrapper, enter_framing does the negotiation
+
+        Args:
+            port: Open serial port (or ProgrammerStandIn) already in framed mode
+        """
+        self.port = port
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def write_frame(self, command: int, sequence: int, payload: bytes = b"") -> None:
+        frame = encode_frame(command, sequence, payload)
+        self.bytes_sent += len(frame)
+        self.port.write(frame)
+
+    def read_frame(self) -> Optional[bytes]:
+        """Return the next raw frame, or None if the port timed out first"""
+        frame = self.port.read_until(FRAME_DELIMITER)
+        self.bytes_received += len(frame)
+        if not frame.endswith(FRAME_DELIMITER):
+            return None
+        return frame
+
+    def reset_input_buffer(self) -> None:
+        self.port.reset_input_buffer()
+
+
+def enter_framing(port) -> Optional[FramedPort]:
+    """
+    Ask the programmer to switch to the framed protocol
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn) using ASCII lines
+
+    Returns:
+        FramedPort on success, None if the firmware doesn't support framing
+    """
+    port.write(b"BIN\n")
+    line = port.readline().decode('ascii', errors='replace').strip()
+    if line != f"BIN: Framed v{FRAMING_VERSION}":
+        return None
+    return FramedPort(port)
+
+
+def leave_framing(framed: FramedPort) -> None:
+    """
+    Switch the programmer back to ASCII lines
+
+    Raises:
+        LinkError: If the programmer doesn't confirm
+    """
+    framed.write_frame(FRAME_EXIT, 0)
+    while True:
+        frame = framed.read_frame()
+        if frame is None:
+            raise LinkError("No response from programmer (timeout)")
+        try:
+            command, _, _ = decode_frame(frame)
+        except FrameError:
+            continue
+        if command == FRAME_EXIT:
+            return  # Late replies to earlier commands are skipped
+
+
+@contextmanager
+def framed_session(port) -> Iterator:
+    """
+    Use the framed protocol for the duration of a with block when the firmware supports it
+
+    Yields:
+        A FramedPort, or the port itself when framing isn't available (ASCII is used then)
+    """
+    framed = enter_framing(port)
+    if framed is None:
+        yield port
+        return
+    try:
+        yield framed
+    finally:
+        try:
+            leave_framing(framed)
+        except ProgrammerError:
+            pass  # Reopening the port resets the firmware to ASCII anyway
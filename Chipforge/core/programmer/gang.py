@@ -0,0 +1,167 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .protocol import ProgrammerError
+from .transport import DEFAULT_TIMEOUT, programmer_id
+from .differential import DeviceRecordStore, ProgramReport
+from .client import ProgrammerClient
+
+STATUS_WAITING = "waiting"
+STATUS_CONNECTING = "connecting"
+STATUS_PROGRAMMING = "programming"
+STATUS_VALIDATING = "validating"
+STATUS_PASSED = "passed"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class GangResult:
+    """One programmer's part of a gang run, updated while it runs"""
+    port_name: str
+    device_id: str = ""
+    status: str = STATUS_WAITING
+    done: int = 0  # Bytes done in the current stage
+    total: int = 0
+    report: Optional[ProgramReport] = None
+    mismatches: List[int] = field(default_factory=list)  # Addresses the final validation flagged
+    error: str = ""
+    seconds: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return self.status == STATUS_PASSED
+
+    def describe(self) -> str:
+        """One line for progress displays and the report"""
+        if self.status in (STATUS_PROGRAMMING, STATUS_VALIDATING) and self.total:
+            return f"{self.port_name}: {self.status} {self.done}/{self.total}"
+        if self.status == STATUS_PASSED:
+            written = f"{self.report.bytes_written} bytes written, {self.report.mode}" if self.report else "validated"
+            return f"{self.port_name}: passed ({written}, {self.seconds:.1f}s)"
+        if self.status == STATUS_FAILED:
+            return f"{self.port_name}: FAILED - {self.error}"
+        return f"{self.port_name}: {self.status}"
+
+
+@dataclass
+class GangReport:
+    """Aggregate of a gang run"""
+    results: List[GangResult]
+    seconds: float = 0.0
+
+    @property
+    def passed(self) -> List[GangResult]:
+        return [result for result in self.results if result.passed]
+
+    @property
+    def failed(self) -> List[GangResult]:
+        return [result for result in self.results if not result.passed]
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.results) and not self.failed
+
+    def summary(self) -> str:
+        """Pass/fail headline followed by one line per programmer"""
+        verdict = "PASS" if self.ok else "FAIL"
+        lines = [f"{verdict}: {len(self.passed)} of {len(self.results)} programmers passed in {self.seconds:.1f}s"]
+        lines.extend(result.describe() for result in self.results)
+        return "\n".join(lines)
+
+
+GangCallback = Callable[[GangResult], None]  # Called on the event loop whenever a result changes
+
+
+async def _program_one(result: GangResult, image: RomImage, device: DeviceProfile, store: DeviceRecordStore,
+                       validate: bool, fill_value: Optional[int], full: bool, timeout: Optional[float],
+                       on_update: Optional[GangCallback]) -> None:
+    """Program and validate one programmer, recording the outcome in its result instead of raising"""
+    def update(status: Optional[str] = None, done: int = 0, total: int = 0) -> None:
+        if status is not None:
+            result.status = status
+        result.done, result.total = done, total
+        if on_update is not None:
+            on_update(result)
+
+    started = time.perf_counter()
+    if full:
+        store.forget(result.device_id)  # Without a record every used page is written
+    try:
+        update(STATUS_CONNECTING)
+        async with await ProgrammerClient.connect(result.port_name, timeout, result.device_id) as client:
+            update(STATUS_PROGRAMMING)
+            result.report = await client.program_image(image, device, store, fill_value=fill_value,
+                                                       progress=lambda done, total: update(None, done, total))
+            if validate:
+                # The differential write only read back what it wrote, this covers the whole image
+                update(STATUS_VALIDATING)
+                result.mismatches = await client.validate_image(image)
+                if result.mismatches:
+                    store.forget(result.device_id)
+                    raise ProgrammerError(f"{len(result.mismatches)} bytes differ, "
+                                          f"first at address {result.mismatches[0]}")
+    except Exception as e:  # One board failing, however it fails, must not stop the others
+        result.error = str(e)
+        result.seconds = time.perf_counter() - started
+        update(STATUS_FAILED)
+        return
+    result.seconds = time.perf_counter() - started
+    update(STATUS_PASSED)
+
+
+def _unique_device_ids(port_names: List[str]) -> List[str]:
+    """Programmer identities, numbered where several ports share one (only stand-ins do)"""
+    ids = [programmer_id(name) for name in port_names]
+    return [device_id if ids.count(device_id) == 1 else f"{device_id}#{ids[:index].count(device_id) + 1}"
+            for index, device_id in enumerate(ids)]
+
+
+async def gang_program(port_names: List[str], image: RomImage, device: DeviceProfile,
+                       store: Optional[DeviceRecordStore] = None, validate: bool = True,
+                       fill_value: Optional[int] = None, full: bool = False,
+                       timeout: Optional[float] = DEFAULT_TIMEOUT, on_update: Optional[GangCallback] = None) -> GangReport:
+    """
+    Program the same image into the devices on several programmers at once
+    Each programmer runs on its own I/O thread; one failing doesn't stop the others
+
+    Args:
+        port_names: Programmer ports, "standin[:options]" for stand-ins
+        image: ROM image to write
+        device: EEPROM part fitted to every programmer
+        store: Record store, defaults to ~/.ecf/device_records
+        validate: CRC-check the whole image on every device after programming
+        fill_value: Byte the unused addresses should hold, see program_differential
+        full: Write every used page even where the device records say it already holds the image
+        timeout: Seconds a read waits
+        on_update: Called on the event loop with a programmer's result when its status or progress changes
+
+    Returns:
+        GangReport with one result per port, in the order given
+    """
+    store = store if store is not None else DeviceRecordStore()
+    results = [GangResult(name, device_id) for name, device_id in zip(port_names, _unique_device_ids(port_names))]
+    started = time.perf_counter()
+    await asyncio.gather(*(_program_one(result, image, device, store, validate, fill_value, full, timeout,
+                                        on_update)
+                           for result in results))
+    return GangReport(results, time.perf_counter() - started)
+
+
+def run_gang(port_names: List[str], image: RomImage, device: DeviceProfile, **options) -> GangReport:
+    """
+    gang_program for callers without an event loop, blocks until every programmer finished
+
+    Args:
+        port_names: Programmer ports
+        image: ROM image to write
+        device: EEPROM part
+        **options: Further gang_program arguments; on_update runs on this call's event loop thread
+
+    Returns:
+        GangReport with one result per port
+    """
+    return asyncio.run(gang_program(port_names, image, device, **options))
@@ -0,0 +1,292 @@
+import itertools
+import re
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .protocol import (ProgrammerError, LinkError, format_program_block, format_configure_device, format_validate_address,
+                       format_range_crc, parse_block_ack, parse_device_reply, parse_validate_reply,
+                       parse_crc_reply)
+from .framing import (FramedPort, FrameError, decode_frame, FRAME_MODE, FRAME_DEVICE, FRAME_PROGRAM_BLOCK,
+                      FRAME_READ_BLOCK, FRAME_RANGE_CRC, FRAME_ERROR, READ_BLOCK_MAX, MODE_STATES)
+
+DEFAULT_WINDOW = 8  # Commands in flight, enough to hide a USB round trip behind EEPROM write cycles
+DEFAULT_RETRIES = 3  # Retransmissions per command before giving up
+SEQUENCE_MODULO = 0x10000  # The firmware echoes sequence numbers modulo 2^16
+
+ReplyParser = Callable[[Any], Any]  # Turns a reply into a result, raises ProgrammerError if it is wrong
+PipelineCommand = Tuple[Any, ReplyParser]  # (codec-specific request, reply parser)
+
+_SEQUENCED_REPLY = re.compile(r'^#(\d+) (.*)$')
+_MODE_REPLIES = {"SNF": "STATE: Sniffer Mode", "EMU": "STATE: Emulator Mode", "PRG": "STATE: Programmer Mode",
+                 "VAL": "STATE: Validator Mode", "DBG": "STATE: Debug Mode"}
+
+# Shared by every pipeline, so a late reply to a finished run never matches a new command
+_sequences = itertools.count()
+
+
+def _check_block(address: int, length: int, acked: Tuple[int, int]) -> Tuple[int, int]:
+    if acked != (address, length):
+        raise ProgrammerError(f"Programmer acknowledged {acked[1]} bytes at {acked[0]}, "
+                              f"sent {length} bytes at {address}")
+    return acked
+
+
+def _check_range(start: int, length: int, replied: Tuple[int, int], what: str) -> None:
+    if replied != (start, length):
+        raise ProgrammerError(f"Programmer answered {what} for {replied[1]} bytes at {replied[0]}, "
+                              f"asked for {length} bytes at {start}")
+
+
+class LineCodec:
+    """ASCII lines, pipelined as "#SEQ CMD" with "#SEQ REPLY" answers"""
+    max_read = 1  # Bytes per VA command
+
+    def send(self, port, sequence: int, request: bytes) -> None:
+        port.write(b"#%d " % sequence + request.rstrip(b"\r\n") + b"\n")
+
+    def receive(self, port) -> Optional[Tuple[Optional[int], Any, Optional[str]]]:
+        """
+        Read one reply
+
+        Returns:
+            None on a timeout, else (sequence or None if it isn't a sequenced reply, reply, error message or None)
+        """
+        raw = port.readline()
+        if not raw:
+            return None
+        match = _SEQUENCED_REPLY.match(raw.decode('ascii', errors='replace').strip())
+        if not match:
+            return None, None, None
+        reply = match.group(2)
+        return int(match.group(1)), reply, reply if reply.startswith("ERROR") else None
+
+    def mode(self, mode: str) -> PipelineCommand:
+        return f"{mode}\n".encode('ascii'), lambda reply: reply
+
+    def device(self, size: int, page_size: int, write_cycle_us: int, poll_code: int) -> PipelineCommand:
+        return format_configure_device(size, page_size, write_cycle_us, poll_code), parse_device_reply
+
+    def program_block(self, address: int, data: bytes) -> PipelineCommand:
+        return (format_program_block(address, data),
+                lambda reply: _check_block(address, len(data), parse_block_ack(reply)))
+
+    def read_block(self, address: int, length: int) -> PipelineCommand:
+        if length != 1:
+            raise ValueError("ASCII VA commands read one byte")
+
+        def parse(reply: str) -> bytes:
+            replied, data = parse_validate_reply(reply)
+            if replied != address:
+                raise ProgrammerError(f"Programmer answered for address {replied}, asked for {address}")
+            return bytes([data])
+        return format_validate_address(address), parse
+
+    def range_crc(self, start: int, end: int) -> PipelineCommand:
+        def parse(reply: str) -> int:
+            replied = parse_crc_reply(reply)
+            _check_range(start, end - start, replied[:2], "CRC")
+            return replied[2]
+        return format_range_crc(start, end - start), parse
+
+
+class FrameCodec:
+    """Framed binary protocol (see framing), requests are (command id, payload)"""
+    max_read = READ_BLOCK_MAX
+
+    def send(self, port: FramedPort, sequence: int, request: Tuple[int, bytes]) -> None:
+        port.write_frame(request[0], sequence, request[1])
+
+    def receive(self, port: FramedPort) -> Optional[Tuple[Optional[int], Any, Optional[str]]]:
+        """See LineCodec.receive, corrupt frames count as noise"""
+        frame = port.read_frame()
+        if frame is None:
+            return None
+        try:
+            command, sequence, payload = decode_frame(frame)
+        except FrameError:
+            return None, None, None
+        if command == FRAME_ERROR:
+            return sequence, (command, payload), payload.decode('ascii', errors='replace')
+        return sequence, (command, payload), None
+
+    @staticmethod
+    def _payload(reply: Tuple[int, bytes], command: int, length: Optional[int] = None) -> bytes:
+        replied, payload = reply
+        if replied != command or (length is not None and len(payload) != length):
+            raise ProgrammerError(f"Unexpected reply frame {replied:#04x} ({len(payload)} bytes) "
+                                  f"to command {command:#04x}")
+        return payload
+
+    def mode(self, mode: str) -> PipelineCommand:
+        def parse(reply) -> str:
+            state, changed = self._payload(reply, FRAME_MODE, 2)
+            if MODE_STATES[state] != mode:
+                raise ProgrammerError(f"Programmer stayed in {MODE_STATES[state]}, asked for {mode}")
+            # Same text as the ASCII reply, so callers don't depend on the protocol
+            return _MODE_REPLIES[mode] if changed else "Already in requested state"
+        return (FRAME_MODE, bytes([MODE_STATES.index(mode)])), parse
+
+    def device(self, size: int, page_size: int, write_cycle_us: int, poll_code: int) -> PipelineCommand:
+        def parse(reply) -> Tuple[int, int, int, int]:
+            return struct.unpack("<HBIB", self._payload(reply, FRAME_DEVICE, 8))
+        return (FRAME_DEVICE, struct.pack("<HBIB", size, page_size, write_cycle_us, poll_code)), parse
+
+    def program_block(self, address: int, data: bytes) -> PipelineCommand:
+        def parse(reply) -> Tuple[int, int]:
+            return _check_block(address, len(data), struct.unpack("<HB", self._payload(reply, FRAME_PROGRAM_BLOCK, 3)))
+        return (FRAME_PROGRAM_BLOCK, struct.pack("<H", address) + bytes(data)), parse
+
+    def read_block(self, address: int, length: int) -> PipelineCommand:
+        def parse(reply) -> bytes:
+            payload = self._payload(reply, FRAME_READ_BLOCK, 2 + length)
+            _check_range(address, length, (struct.unpack_from("<H", payload)[0], len(payload) - 2), "VA")
+            return payload[2:]
+        return (FRAME_READ_BLOCK, struct.pack("<HB", address, length)), parse
+
+    def range_crc(self, start: int, end: int) -> PipelineCommand:
+        def parse(reply) -> int:
+            replied_start, replied_length, crc = struct.unpack("<HHI", self._payload(reply, FRAME_RANGE_CRC, 8))
+            _check_range(start, end - start, (replied_start, replied_length), "CRC")
+            return crc
+        return (FRAME_RANGE_CRC, struct.pack("<HH", start, end - start)), parse
+
+
+LINE_CODEC = LineCodec()
+FRAME_CODEC = FrameCodec()
+
+
+def codec_for(port):
+    """The codec matching how the port talks: frames for a FramedPort, ASCII lines otherwise"""
+    return FRAME_CODEC if isinstance(port, FramedPort) else LINE_CODEC
+
+
+@dataclass
+class _InFlight:
+    """One command waiting for its reply"""
+    index: int  # Position in the caller's command list
+    sequence: int
+    request: Any
+    parse: ReplyParser
+    attempts: int = 0
+    stamp: int = 0  # Transmission order of the latest send
+
+
+class CommandPipeline:
+    """
+    Keeps a window of sequence-numbered commands in flight on one port
+    The firmware answers in order, echoing each command's sequence number. A command is sent again
+    when its reply is missing (a later command answered first, or the port timed out), is an ERROR,
+    or fails its parser. Only for commands that can safely run twice (modes, PB, PA, VA, CRC, DEV)
+    """
+
+    def __init__(self, port, window: int = DEFAULT_WINDOW, retries: int = DEFAULT_RETRIES):
+        """
+        Initialize the pipeline
+
+        Args:
+            port: Open serial port (or ProgrammerStandIn), or a FramedPort for the binary protocol
+            window: Commands in flight at most, 1 is stop-and-wait
+            retries: Retransmissions per command before giving up
+        """
+        if window < 1:
+            raise ValueError(f"Window must be at least 1, got {window}")
+        self.port = port
+        self.codec = codec_for(port)
+        self.window = window
+        self.retries = retries
+        self.retransmissions = 0  # Over the pipeline's lifetime
+        self._stamp = 0
+
+    def run(self, commands: Sequence[PipelineCommand],
+            on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        """
+        Run commands with up to window of them in flight
+
+        Args:
+            commands: (request, reply parser) pairs built by this port's codec
+            on_result: Called with (command index, result) as each command completes
+
+        Returns:
+            The parsed results in command order
+
+        Raises:
+            LinkError: If a command's reply is still missing after its retries
+            ProgrammerError: If a command is still rejected (ERROR) or answered wrongly after its retries
+        """
+        results = [None] * len(commands)
+        in_flight = OrderedDict()  # sequence -> _InFlight, oldest transmission first
+        next_index = 0
+        completed = 0
+        try:
+            while completed < len(commands):
+                while next_index < len(commands) and len(in_flight) < self.window:
+                    request, parse = commands[next_index]
+                    command = _InFlight(next_index, next(_sequences) % SEQUENCE_MODULO, request, parse)
+                    in_flight[command.sequence] = command
+                    self._send(command)
+                    next_index += 1
+
+                received = self.codec.receive(self.port)
+                if received is None:
+                    # Timed out: every reply still outstanding went missing
+                    for command in list(in_flight.values()):
+                        self._resend(command, in_flight, "no reply", LinkError)
+                    continue
+
+                sequence, reply, error = received
+                command = in_flight.get(sequence)
+                if command is None:
+                    continue  # Noise, or a late duplicate of a reply already taken
+
+                # Replies come back in order, so anything sent before this command lost its reply
+                for earlier in list(in_flight.values()):
+                    if earlier.stamp >= command.stamp:
+                        break
+                    self._resend(earlier, in_flight, "reply missing", LinkError)
+
+                try:
+                    if error is not None:
+                        raise ProgrammerError(error)
+                    result = command.parse(reply)
+                except ProgrammerError as e:
+                    self._resend(command, in_flight, str(e))
+                    continue
+
+                del in_flight[command.sequence]
+                results[command.index] = result
+                completed += 1
+                if on_result is not None:
+                    on_result(command.index, result)
+        except ProgrammerError:
+            # Replies still in flight would confuse the next command
+            self.port.reset_input_buffer()
+            raise
+        return results
+
+    def _send(self, command: _InFlight) -> None:
+        self._stamp += 1
+        command.stamp = self._stamp
+        self.codec.send(self.port, command.sequence, command.request)
+
+    def _resend(self, command: _InFlight, in_flight: OrderedDict, reason: str,
+                error_type: type = ProgrammerError) -> None:
+        """Send a command again, or raise error_type once its retries are spent"""
+        command.attempts += 1
+        if command.attempts > self.retries:
+            raise error_type(f"Command failed after {command.attempts} attempts: {reason}")
+        self.retransmissions += 1
+        in_flight.move_to_end(command.sequence)
+        self._send(command)
+
+
+def run_pipelined(port, commands: Sequence[PipelineCommand], window: int = DEFAULT_WINDOW,
+                  on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+    """Run commands through a one-off CommandPipeline, see CommandPipeline.run"""
+    return CommandPipeline(port, window).run(commands, on_result)
+
+
+def run_command(port, command: PipelineCommand) -> Any:
+    """Run a single command (stop-and-wait, with retransmission) and return its result"""
+    return run_pipelined(port, [command], 1)[0]
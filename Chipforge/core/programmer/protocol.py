@@ -0,0 +1,146 @@
+import re
+from typing import Iterator, Tuple
+
+ADDRESS_LIMIT = 8192  # 13-bit address bus of the programmer
+BLOCK_SIZE = 64  # Payload bytes per PB command (one AT28C64B page, the firmware maximum)
+
+_BLOCK_ACK = re.compile(r'^PB: Addr=(\d+) Len=(\d+)$')
+_DEVICE_REPLY = re.compile(r'^DEV: Size=(\d+) Page=(\d+) Twc=(\d+) Poll=(\d+)$')
+_VALIDATE_REPLY = re.compile(r'^VA: Addr=(\d+) Data=(\d+)')
+_CRC_REPLY = re.compile(r'^CRC: Addr=(\d+) Len=(\d+) Crc=([0-9A-F]{8})$')
+
+
+class ProgrammerError(Exception):
+    """The programmer rejected a command, answered unexpectedly or didn't answer"""
+
+
+class LinkError(ProgrammerError):
+    """The link lost or garbled a reply (timeout, corrupt frame, replies out of sequence), worth a reconnect"""
+
+
+def format_program_address(address: int, value: int) -> bytes:
+    """Build a single-byte PA;ADDRESS;DATA command"""
+    return f"PA;{address};{value}\n".encode('ascii')
+
+
+def format_program_block(address: int, data: bytes) -> bytes:
+    """
+    Build a PB;ADDRESS;LENGTH;HEXDATA block-write command
+
+    Args:
+        address: First address to write
+        data: 1 to BLOCK_SIZE bytes
+
+    Returns:
+        The encoded command line
+    """
+    if not 0 < len(data) <= BLOCK_SIZE:
+        raise ValueError(f"Block must hold 1-{BLOCK_SIZE} bytes, got {len(data)}")
+    if address < 0 or address + len(data) > ADDRESS_LIMIT:
+        raise ValueError(f"Block {address}-{address + len(data) - 1} is outside 0-{ADDRESS_LIMIT - 1}")
+    return f"PB;{address};{len(data)};{data.hex().upper()}\n".encode('ascii')
+
+
+def format_configure_device(size: int, page_size: int, write_cycle_us: int, poll_code: int) -> bytes:
+    """Build a DEV;SIZE;PAGE;TWC_US;POLL command selecting the EEPROM part's geometry and timing"""
+    return f"DEV;{size};{page_size};{write_cycle_us};{poll_code}\n".encode('ascii')
+
+
+def format_validate_address(address: int) -> bytes:
+    """Build a VA;ADDRESS read-back command"""
+    return f"VA;{address}\n".encode('ascii')
+
+
+def format_range_crc(address: int, length: int) -> bytes:
+    """Build a CRC;ADDRESS;LENGTH command asking for the CRC-32 of a range"""
+    return f"CRC;{address};{length}\n".encode('ascii')
+
+
+def read_line(port) -> str:
+    """
+    Read one response line
+    Late replies to pipelined commands ("#SEQ ...") are skipped
+
+    Raises:
+        LinkError: On a timeout
+        ProgrammerError: On an ERROR reply
+    """
+    line = port.readline().decode('ascii', errors='replace').strip()
+    while line.startswith("#"):
+        line = port.readline().decode('ascii', errors='replace').strip()
+    if not line:
+        raise LinkError("No response from programmer (timeout)")
+    if line.startswith("ERROR"):
+        raise ProgrammerError(line)
+    return line
+
+
+def parse_block_ack(line: str) -> Tuple[int, int]:
+    """
+    Parse a "PB: Addr=A Len=N" acknowledgement
+
+    Returns:
+        (address, length)
+    """
+    match = _BLOCK_ACK.match(line)
+    if not match:
+        raise ProgrammerError(f"Unexpected response to PB: {line}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_device_reply(line: str) -> Tuple[int, int, int, int]:
+    """
+    Parse a "DEV: Size=S Page=P Twc=T Poll=M" reply
+
+    Returns:
+        (size, page size, write cycle in us, poll code)
+    """
+    match = _DEVICE_REPLY.match(line)
+    if not match:
+        raise ProgrammerError(f"Unexpected response to DEV: {line}")
+    return tuple(int(group) for group in match.groups())
+
+
+def parse_validate_reply(line: str) -> Tuple[int, int]:
+    """
+    Parse a "VA: Addr=A Data=D (0xDD)" reply
+
+    Returns:
+        (address, data)
+    """
+    match = _VALIDATE_REPLY.match(line)
+    if not match:
+        raise ProgrammerError(f"Unexpected response to VA: {line}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_crc_reply(line: str) -> Tuple[int, int, int]:
+    """
+    Parse a "CRC: Addr=A Len=N Crc=XXXXXXXX" reply
+
+    Returns:
+        (address, length, crc) with the CRC-32 as zlib.crc32 computes it
+    """
+    match = _CRC_REPLY.match(line)
+    if not match:
+        raise ProgrammerError(f"Unexpected response to CRC: {line}")
+    return int(match.group(1)), int(match.group(2)), int(match.group(3), 16)
+
+
+def split_blocks(start: int, end: int, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, int]]:
+    """
+    Split an address range into blocks that never cross a block_size boundary
+
+    Args:
+        start: First address
+        end: One past the last address
+        block_size: Block (and alignment) size
+
+    Yields:
+        (block start, block end) with end exclusive
+    """
+    address = start
+    while address < end:
+        block_end = min((address // block_size + 1) * block_size, end)
+        yield address, block_end
+        address = block_end
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .block_writer import ProgressCallback, configure_device, program_ranges
+from .verify import set_mode, group_addresses, verify_ranges
+
+DEFAULT_REPAIR_ATTEMPTS = 3  # Rewrites of the still-mismatching bytes before giving up
+
+
+@dataclass
+class RepairReport:
+    """What repair_mismatches did"""
+    ranges: List[Tuple[int, int]]  # Ranges rewritten on the first attempt, end exclusive
+    bytes_written: int = 0  # Over all attempts
+    attempts: int = 0
+    remaining: List[int] = field(default_factory=list)  # Addresses still mismatching after the last attempt
+
+    @property
+    def repaired(self) -> bool:
+        return not self.remaining
+
+
+def repair_mismatches(port, expected: Union[RomImage, bytes, bytearray], mismatches: Iterable[int],
+                      device: Optional[DeviceProfile] = None, attempts: int = DEFAULT_REPAIR_ATTEMPTS,
+                      progress: Optional[ProgressCallback] = None) -> RepairReport:
+    """
+    Re-program only the mismatching addresses found by a validation and verify them again
+    Bytes that still differ are rewritten until they match or the attempts run out
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn), left in VAL mode
+        expected: Image or bytes holding the expected contents from address 0
+        mismatches: Addresses that failed validation
+        device: EEPROM part, sent to the programmer first; None keeps the programmer's current setup
+        attempts: Write and verify passes at most
+        progress: Called with (bytes done, bytes total) after each block
+
+    Returns:
+        RepairReport, check its repaired flag
+
+    Raises:
+        ProgrammerError: On a communication error
+    """
+    addresses = sorted(set(mismatches))
+    report = RepairReport(group_addresses(addresses), remaining=addresses)
+    while report.remaining and report.attempts < attempts:
+        set_mode(port, "PRG")
+        if device is not None and report.attempts == 0:
+            configure_device(port, device)
+        pending = group_addresses(report.remaining)
+        report.bytes_written += program_ranges(port, expected, pending, device, progress)
+        report.attempts += 1
+
+        set_mode(port, "VAL")
+        report.remaining = verify_ranges(port, expected, pending)
+    return report
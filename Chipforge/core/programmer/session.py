@@ -0,0 +1,186 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from core.compiler.rom_image import RomImage
+from core.devices import DeviceProfile
+from .protocol import LinkError, split_blocks
+from .framing import enter_framing, leave_framing, FramedPort
+from .pipeline import DEFAULT_WINDOW, codec_for, run_pipelined
+from .block_writer import ProgressCallback, configure_device, block_size_for
+from .verify import set_mode, verify_ranges
+from .worker import JobCancelled
+
+DEFAULT_RECONNECTS = 3  # Link failures survived per session before giving up
+DEFAULT_RECONNECT_DELAY = 1.0  # Seconds to let the USB device re-enumerate before reopening
+
+# pyserial's SerialException is an OSError. A plain ProgrammerError is the firmware rejecting a command
+# (an ERROR reply) or answering it wrongly, which a reconnect wouldn't change
+LinkErrors = (LinkError, OSError)
+
+
+@dataclass
+class WriteCheckpoint:
+    """How far a session's current write got"""
+    blocks: List[Tuple[int, int]]  # Every block of the write, end exclusive
+    done: int = 0  # Blocks acknowledged in order from the first
+    resumes: int = 0  # Times the write continued after a reconnect
+    rewritten: int = 0  # Blocks written again because their re-verification failed
+
+    @property
+    def last_address(self) -> Optional[int]:
+        """Last address acknowledged in order, None before the first block"""
+        return self.blocks[self.done - 1][1] - 1 if self.done else None
+
+    @property
+    def bytes_done(self) -> int:
+        return sum(end - start for start, end in self.blocks[:self.done])
+
+    @property
+    def complete(self) -> bool:
+        return self.done == len(self.blocks)
+
+
+class ProgrammingSession:
+    """
+    A programmer connection that survives transient link failures
+    Writes are checkpointed at the last block acknowledged in order; when the link drops, the port is
+    reopened, the programmer is set up again and the write resumes there after re-verifying that block
+    """
+
+    def __init__(self, serial_port, reconnect: Callable[[], Any], device: Optional[DeviceProfile] = None,
+                 framed: bool = True, reconnects: int = DEFAULT_RECONNECTS,
+                 reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+                 on_reconnect: Optional[Callable[[Exception, int], None]] = None):
+        """
+        Initialize the session, the with statement (or open) negotiates framing
+
+        Args:
+            serial_port: Open serial port (or ProgrammerStandIn) using ASCII lines
+            reconnect: Closes the old port if needed and returns a newly opened one for the same programmer
+            device: EEPROM part, sent to the programmer again after every reconnect
+            framed: Use the framed protocol when the firmware supports it
+            reconnects: Link failures survived before the error is raised
+            reconnect_delay: Seconds to wait before each reopen
+            on_reconnect: Called with (error, reconnect number) before each reopen
+        """
+        self.serial = serial_port
+        self.port = serial_port  # FramedPort while framing is in use
+        self.device = device
+        self.framed = framed
+        self.reconnects = reconnects
+        self.reconnect_delay = reconnect_delay
+        self.reconnections = 0  # Over the session's lifetime
+        self.checkpoint: Optional[WriteCheckpoint] = None
+        self._reconnect = reconnect
+        self._on_reconnect = on_reconnect
+
+    def __enter__(self) -> "ProgrammingSession":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Switch the current port to the framed protocol if enabled and supported"""
+        if self.framed:
+            self.port = enter_framing(self.serial) or self.serial
+
+    def close(self) -> None:
+        """Switch back to ASCII lines, the serial port itself stays open"""
+        if isinstance(self.port, FramedPort):
+            try:
+                leave_framing(self.port)
+            except LinkErrors:
+                pass  # Reopening the port resets the firmware to ASCII anyway
+        self.port = self.serial
+
+    def reconnect(self, error: Exception) -> None:
+        """
+        Reopen the link after a failure, retrying the reopen itself within the reconnect budget
+
+        Args:
+            error: The failure that lost the link
+
+        Raises:
+            The last error once the reconnect budget is spent
+        """
+        while True:
+            if self.reconnections >= self.reconnects:
+                raise error
+            self.reconnections += 1
+            if self._on_reconnect is not None:
+                self._on_reconnect(error, self.reconnections)
+            time.sleep(self.reconnect_delay)
+            try:
+                self.serial = self._reconnect()
+                self.port = self.serial
+                self.open()
+                return
+            except LinkErrors as e:
+                error = e
+
+    def program(self, data: Union[RomImage, bytes, bytearray], ranges: List[Tuple[int, int]],
+                progress: Optional[ProgressCallback] = None, window: int = DEFAULT_WINDOW) -> int:
+        """
+        Program address ranges with block writes, resuming after link failures
+
+        Args:
+            data: Image or bytes holding the contents from address 0
+            ranges: (start, end) pairs, end exclusive
+            progress: Called with (bytes done, bytes total) after each block
+            window: PB commands in flight at most, see CommandPipeline
+
+        Returns:
+            Number of bytes written, blocks written again after a reconnect count once
+
+        Raises:
+            LinkError: When the link still fails after the reconnect budget is spent
+            ProgrammerError: When the programmer rejects a block, without reconnecting
+            OSError: When the port can't be reopened
+        """
+        block_size = block_size_for(self.device)
+        blocks = [block for start, end in ranges for block in split_blocks(start, end, block_size)]
+        checkpoint = self.checkpoint = WriteCheckpoint(blocks)
+        while True:
+            try:
+                self._write(data, checkpoint, progress, window)
+                return checkpoint.bytes_done
+            except JobCancelled:
+                raise
+            except LinkErrors as e:
+                self.reconnect(e)
+                checkpoint.resumes += 1
+
+    def _write(self, data, checkpoint: WriteCheckpoint, progress: Optional[ProgressCallback], window: int) -> None:
+        """Write the blocks after the checkpoint, advancing it as acknowledgements arrive"""
+        port = self.port
+        if checkpoint.resumes:
+            # The programmer may have reset with the link, so set it up again
+            if checkpoint.done:
+                # The last acknowledged block might not have survived the glitch
+                set_mode(port, "VAL")
+                if verify_ranges(port, data, [checkpoint.blocks[checkpoint.done - 1]]):
+                    checkpoint.done -= 1
+                    checkpoint.rewritten += 1
+            set_mode(port, "PRG")
+            if self.device is not None:
+                configure_device(port, self.device)
+
+        first = checkpoint.done
+        pending = checkpoint.blocks[first:]
+        acknowledged = [False] * len(pending)
+        total = sum(end - start for start, end in checkpoint.blocks)
+
+        def block_done(index, acked):
+            acknowledged[index] = True
+            # Blocks can complete out of order after a retransmission, only an unbroken run counts
+            while checkpoint.done - first < len(pending) and acknowledged[checkpoint.done - first]:
+                checkpoint.done += 1
+            if progress is not None:
+                progress(checkpoint.bytes_done, total)
+
+        codec = codec_for(port)
+        commands = [codec.program_block(start, bytes(data[start:end])) for start, end in pending]
+        run_pipelined(port, commands, window, block_done)
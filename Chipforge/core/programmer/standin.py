@@ -0,0 +1,509 @@
+import argparse
+import random
+import re
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from typing import List, Optional, Tuple
+
+from .protocol import ADDRESS_LIMIT
+from .transport import ProgrammerTransport, PtyBridge
+from .framing import (FrameError, decode_frame, encode_frame, FRAMING_VERSION, FRAME_DELIMITER, FRAME_MODE,
+                      FRAME_DEVICE, FRAME_PROGRAM_BLOCK, FRAME_READ_BLOCK, FRAME_RANGE_CRC, FRAME_EXIT,
+                      FRAME_ERROR, READ_BLOCK_MAX, MODE_STATES)
+
+PB_MAX_LENGTH = 64
+CRC_READ_TIME = 2e-6  # Seconds per byte the firmware spends reading for a CRC or READ_BLOCK command
+POLL_NONE, POLL_DATA, POLL_TOGGLE = 0, 1, 2  # DEV command poll codes
+
+_SEQUENCE_PREFIX = re.compile(r'^#(\d+) *')
+
+_STATE_NAMES = {
+    "SNF": ("Sniffer", "STATE: Sniffer Mode"),
+    "EMU": ("Emulator", "STATE: Emulator Mode"),
+    "PRG": ("Programmer", "STATE: Programmer Mode"),
+    "VAL": ("Validator", "STATE: Validator Mode"),
+    "DBG": ("Debug", "STATE: Debug Mode"),
+}
+
+
+def _strtoul(text: str, base: int = 10) -> int:
+    """C strtoul: leading digits only, 0 when there are none"""
+    text = text.lstrip()
+    if base == 16 and text[:2] in ("0x", "0X"):
+        text = text[2:]
+    match = re.match(r'[0-9A-Fa-f]*' if base == 16 else r'\d*', text)
+    return int(match.group(0), base) if match.group(0) else 0
+
+
+class ProgrammerStandIn(ProgrammerTransport):
+    """
+    In-process stand-in for the ECF_PRG firmware (Programmer/USB_DEVICE/App/usbd_cdc_if.c)
+    Offers the write()/readline()/read_until() subset of pyserial, so it can replace the serial port anywhere
+    Replies are the firmware's, byte for byte, and an AT28C64B-like EEPROM array is emulated
+    """
+
+    def __init__(self, size: int = ADDRESS_LIMIT, latency: float = 0.0, write_cycle: float = 0.0,
+                 timeout: Optional[float] = 1, reply_loss: float = 0.0, link_rate: Optional[float] = None):
+        """
+        Initialize the stand-in
+
+        Args:
+            size: EEPROM size in bytes
+            latency: Round-trip USB latency per command in seconds
+            write_cycle: Actual EEPROM write cycle in seconds; writes issued while a previous
+                         cycle is still running are ignored, as on the real part. The firmware
+                         waits this long when polling, the configured tWC (if longer) otherwise
+            timeout: Kept for pyserial compatibility, readline() never blocks on an empty queue
+            reply_loss: Fraction of replies dropped (the command still runs), to exercise retransmission
+            link_rate: Bytes per second the link carries each way, None for no transfer time
+        """
+        self.memory = bytearray(b'\xff' * size)  # Erased EEPROM reads 0xFF
+        self.latency = latency
+        self.write_cycle = write_cycle
+        self.timeout = timeout
+        self.name = self.port = "standin"
+        self.is_open = True
+        self.state = "SNF"  # Safe startup state
+        self.address_bus = 0
+        self.data_bus = 0
+        self.commands = 0  # Command lines and frames processed
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.corrupt_frames = 0  # Frames dropped by the COBS or CRC check
+        self.framed = False  # Switched to the framed protocol by BIN
+        self.link_rate = link_rate
+        self.drop_after: Optional[int] = None  # Commands processed before the link drops once, see reopen()
+        self.ignored_writes = 0  # Writes dropped because the EEPROM was busy
+        self.reply_loss = reply_loss
+        self.lost_replies = 0
+        self._loss_random = random.Random(0)  # Repeatable losses
+
+        # Firmware device setup (DEV command), defaults are the AT28C64B
+        self.device_size = size
+        self.page_size = 64
+        self.write_cycle_us = 10000
+        self.polling = POLL_DATA
+
+        self._rx = bytearray()
+        self._responses = deque()  # (ready time, encoded line or frame)
+        self._busy_until = 0.0  # Firmware finishes its current command
+        self._host_link_free = 0.0  # Host -> programmer link finishes its current transfer
+        self._device_link_free = 0.0  # Programmer -> host link finishes its current transfer
+        self._eeprom_busy_until = 0.0  # EEPROM finishes its write cycle
+
+    # ------------------------------------------------------------------
+    # pyserial-compatible interface
+    # ------------------------------------------------------------------
+
+    def write(self, data: bytes) -> int:
+        """Receive bytes from the host, processing each complete line (or frame, once framed)"""
+        self._check_open()
+        self.bytes_received += len(data)
+        self._rx.extend(data)
+        while True:
+            if self.drop_after is not None and self.commands >= self.drop_after:
+                self._drop_link()
+            if self.framed:
+                end = self._rx.find(FRAME_DELIMITER)
+                if end < 0:
+                    break
+                frame = bytes(self._rx[:end])
+                del self._rx[:end + 1]
+                if frame:
+                    self._receive_frame(frame)
+                continue
+            end = min((i for i in (self._rx.find(b'\n'), self._rx.find(b'\r')) if i >= 0), default=-1)
+            if end < 0:
+                break
+            line = self._rx[:end].decode('ascii', errors='replace')
+            del self._rx[:end + 1]
+            self._receive_line(line)
+        return len(data)
+
+    def readline(self) -> bytes:
+        """Return the next reply line, waiting for its simulated latency (b"" if none is pending)"""
+        self._check_open()
+        if not self._responses:
+            return b""
+        ready, line = self._responses.popleft()
+        delay = ready - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return line
+
+    def read_until(self, expected: bytes = b"\n") -> bytes:
+        """Return the next reply (a frame, once framed), like readline"""
+        return self.readline()
+
+    @property
+    def in_waiting(self) -> int:
+        now = time.perf_counter()
+        return sum(len(line) for ready, line in self._responses if ready <= now)
+
+    def reset_input_buffer(self) -> None:
+        self._responses.clear()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.is_open = False
+
+    def reopen(self, reset: bool = False) -> "ProgrammerStandIn":
+        """
+        Open the port again after close() or a dropped link; the EEPROM keeps its contents
+
+        Args:
+            reset: The programmer restarted too, back to Sniffer mode and the default device setup
+
+        Returns:
+            The stand-in itself, so it can serve as a reconnect callable
+        """
+        self.is_open = True
+        self.framed = False  # Opening the port changes the control lines, which leaves framed mode
+        self._rx.clear()
+        self._responses.clear()
+        if reset:
+            self.state = "SNF"
+            self.device_size = len(self.memory)
+            self.page_size = 64
+            self.write_cycle_us = 10000
+            self.polling = POLL_DATA
+        return self
+
+    def _check_open(self) -> None:
+        if not self.is_open:
+            raise OSError("Port is closed")
+
+    def _drop_link(self) -> None:
+        """Lose the link as a USB glitch would: unsent commands and unread replies are gone"""
+        self.drop_after = None
+        self.is_open = False
+        self._rx.clear()
+        self._responses.clear()
+        raise OSError("Programmer disconnected")
+
+    # ------------------------------------------------------------------
+    # Firmware emulation
+    # ------------------------------------------------------------------
+
+    def _arrival(self, length: int) -> float:
+        """When a command of length bytes written now is ready for the firmware"""
+        now = time.perf_counter()
+        if self.link_rate:
+            now = self._host_link_free = max(now, self._host_link_free) + length / self.link_rate
+        # Commands are processed one after another once they arrive over USB
+        return max(now + self.latency / 2, self._busy_until)
+
+    def _queue_reply(self, reply: bytes) -> None:
+        """Queue a reply sent when the current command finishes, unless it gets lost"""
+        if self.reply_loss and self._loss_random.random() < self.reply_loss:
+            self.lost_replies += 1
+            return
+        sent = self._busy_until
+        if self.link_rate:
+            sent = self._device_link_free = max(sent, self._device_link_free) + len(reply) / self.link_rate
+        self.bytes_sent += len(reply)
+        self._responses.append((sent + self.latency / 2, reply))
+
+    def _receive_line(self, line: str) -> None:
+        """Process one command line and queue its reply with simulated timing"""
+        self.commands += 1
+        start = self._arrival(len(line) + 1)
+        # "#SEQ " in front of a command comes back in front of its reply
+        prefix = ""
+        match = _SEQUENCE_PREFIX.match(line)
+        if match:
+            prefix = f"#{int(match.group(1)) & 0xFFFF} "
+            line = line[match.end():]
+        reply, duration = self._process(line, start)
+        self._busy_until = start + duration
+        self._queue_reply((prefix + reply).encode('ascii') + b"\r\n")
+
+    def _receive_frame(self, frame: bytes) -> None:
+        """Process one frame and queue its reply frame, corrupt frames are dropped as ProcessFrame does"""
+        start = self._arrival(len(frame) + 1)
+        try:
+            command, sequence, payload = decode_frame(frame)
+        except FrameError:
+            self.corrupt_frames += 1
+            return
+        self.commands += 1
+        reply_command, reply, duration = self._process_frame(command, payload, start)
+        self._busy_until = start + duration
+        self._queue_reply(encode_frame(reply_command, sequence, reply))
+
+    def _process(self, line: str, now: float):
+        """
+        Run one command as USB_ProcessReceivedData does
+
+        Returns:
+            (reply line without CRLF, seconds the firmware spends on it)
+        """
+        cmd = line[:15].upper()  # The firmware copies into cmd[16]
+
+        if cmd in _STATE_NAMES:
+            return self._transition(cmd), 0.0
+        if cmd == "RDA":
+            bits = f"{self.address_bus:013b}"
+            return f"RDA: {bits[0:4]} {bits[4:8]} {bits[8:12]} {bits[12]} ({self.address_bus})", 0.0
+        if cmd == "RDD":
+            value = self._read_data_bus()
+            bits = f"{value:08b}"
+            return f"RDD: {bits[0:4]} {bits[4:8]} ({value}/0x{value:02X})", 0.0
+        if cmd.startswith("DEV"):
+            return self._configure_device(line), 0.0
+        if cmd.startswith("PB"):
+            return self._program_block(line, now)
+        if cmd.startswith("PA"):
+            return self._program_address(cmd, now)
+        if cmd.startswith("WDB"):
+            return self._write_data_bus(cmd), 0.0
+        if cmd.startswith("CRC"):
+            return self._range_crc(line)
+        if cmd.startswith("VA"):
+            return self._validate_address(cmd), 0.0
+        if cmd in ("STATUS", "?"):
+            return f"Current State: {_STATE_NAMES[self.state][0]}", 0.0
+        if cmd == "BIN":
+            # The reply still goes out as a line, everything after it is framed
+            self.framed = True
+            return f"BIN: Framed v{FRAMING_VERSION}", 0.0
+        return "ERROR: Unknown command", 0.0
+
+    def _process_frame(self, command: int, payload: bytes, now: float) -> Tuple[int, bytes, float]:
+        """
+        Run one frame as ProcessFrame does
+
+        Returns:
+            (reply command id, reply payload, seconds the firmware spends on it)
+        """
+        def error(message: str) -> Tuple[int, bytes, float]:
+            return FRAME_ERROR, message.encode('ascii'), 0.0
+
+        if command == FRAME_MODE:
+            if len(payload) != 1 or payload[0] >= len(MODE_STATES):
+                return error("ERROR: Invalid state")
+            changed = MODE_STATES[payload[0]] != self.state
+            self._transition(MODE_STATES[payload[0]])
+            return FRAME_MODE, bytes([payload[0], changed]), 0.0
+        if command == FRAME_DEVICE:
+            if len(payload) != 8:
+                return error("ERROR: Device frame needs SIZE16 PAGE8 TWC32 POLL8")
+            message = self._set_device(*struct.unpack("<HBIB", payload))
+            if message:
+                return error(message)
+            return FRAME_DEVICE, struct.pack("<HBIB", self.device_size, self.page_size,
+                                             self.write_cycle_us, self.polling), 0.0
+        if command == FRAME_PROGRAM_BLOCK:
+            if self.state != "PRG":
+                return error("ERROR: PB command only available in Programmer mode")
+            if len(payload) < 3 or len(payload) > 2 + PB_MAX_LENGTH:
+                return error("ERROR: Length must be 1-64")
+            (address,) = struct.unpack_from("<H", payload)
+            data = payload[2:]
+            if address + len(data) > self.device_size:
+                return error(self._address_error())
+            duration = self._write_block(address, data, now)
+            return FRAME_PROGRAM_BLOCK, struct.pack("<HB", address, len(data)), duration
+        if command == FRAME_READ_BLOCK:
+            if self.state != "VAL":
+                return error("ERROR: VA command only available in Validator mode")
+            if len(payload) != 3 or payload[2] == 0 or payload[2] > READ_BLOCK_MAX:
+                return error("ERROR: Length must be 1-64")
+            address, length = struct.unpack("<HB", payload)
+            if address + length > self.device_size:
+                return error(self._address_error())
+            self.address_bus = address + length - 1
+            return (FRAME_READ_BLOCK, payload[:2] + bytes(self.memory[address:address + length]),
+                    length * CRC_READ_TIME)
+        if command == FRAME_RANGE_CRC:
+            if self.state != "VAL":
+                return error("ERROR: CRC command only available in Validator mode")
+            if len(payload) != 4:
+                return error("ERROR: Bad payload length")
+            address, length = struct.unpack("<HH", payload)
+            if length == 0:
+                return error("ERROR: Length must be at least 1")
+            if address >= self.device_size or length > self.device_size - address:
+                return error(self._address_error())
+            self.address_bus = address + length - 1
+            crc = zlib.crc32(self.memory[address:address + length])
+            return FRAME_RANGE_CRC, struct.pack("<HHI", address, length, crc), length * CRC_READ_TIME
+        if command == FRAME_EXIT:
+            self.framed = False
+            return FRAME_EXIT, b"", 0.0
+        return error("ERROR: Unknown command")
+
+    def _transition(self, state: str) -> str:
+        if state == self.state:
+            return "Already in requested state"
+        self.state = state
+        return _STATE_NAMES[state][1]
+
+    def _read_data_bus(self) -> int:
+        # The EEPROM drives the data lines whenever its output is enabled
+        if self.state in ("SNF", "VAL"):
+            return self.memory[self.address_bus % len(self.memory)]
+        return self.data_bus
+
+    def _address_error(self) -> str:
+        return f"ERROR: Address must be 0-{self.device_size - 1}"
+
+    def _cycle_wait(self) -> float:
+        """Seconds the firmware waits after each write: the real cycle when polling, else the configured tWC"""
+        if self.polling == POLL_NONE:
+            return max(self.write_cycle_us / 1e6, self.write_cycle)
+        return self.write_cycle
+
+    def _write_byte(self, address: int, value: int, now: float) -> None:
+        """Byte write, ignored while the EEPROM is still busy with the previous cycle"""
+        self.address_bus = address
+        self.data_bus = value
+        if now < self._eeprom_busy_until:
+            self.ignored_writes += 1
+            return
+        self.memory[address] = value
+        self._eeprom_busy_until = now + self.write_cycle
+
+    def _configure_device(self, line: str) -> str:
+        parts = line.split(";")
+        if len(parts) > 1:
+            if len(parts) < 5:
+                return "ERROR: Format is DEV;SIZE;PAGE;TWC_US;POLL (e.g., DEV;8192;64;10000;1)"
+            message = self._set_device(*(_strtoul(part) for part in parts[1:5]))
+            if message:
+                return message
+        return (f"DEV: Size={self.device_size} Page={self.page_size} "
+                f"Twc={self.write_cycle_us} Poll={self.polling}")
+
+    def _set_device(self, size: int, page_size: int, write_cycle_us: int, polling: int) -> Optional[str]:
+        """Apply a device setup as SetDevice does, returning its error message if the values are invalid"""
+        if size == 0 or size > ADDRESS_LIMIT:
+            return "ERROR: Size must be 1-8192"
+        if page_size == 0 or page_size > PB_MAX_LENGTH or page_size & (page_size - 1):
+            return "ERROR: Page size must be a power of two up to 64"
+        if write_cycle_us == 0 or write_cycle_us > 100000:
+            return "ERROR: Write cycle must be 1-100000 us"
+        if polling > POLL_TOGGLE:
+            return "ERROR: Poll must be 0 (none), 1 (data) or 2 (toggle)"
+        self.device_size, self.page_size, self.write_cycle_us, self.polling = (
+            size, page_size, write_cycle_us, polling)
+        return None
+
+    def _program_address(self, cmd: str, now: float):
+        if self.state != "PRG":
+            return "ERROR: PA command only available in Programmer mode", 0.0
+        parts = cmd.split(";")
+        if len(parts) < 3:
+            return "ERROR: Format is PA;ADDRESS;DATA (e.g., PA;4096;215)", 0.0
+        address = _strtoul(parts[1])
+        data = _strtoul(parts[2])
+        if address >= self.device_size:
+            return self._address_error(), 0.0
+        if data > 255:
+            return "ERROR: Data must be 0-255", 0.0
+        self._write_byte(address, data, now)
+        # The firmware waits for the write cycle before answering
+        return f"DB:{data} AB: {address}", self._cycle_wait()
+
+    def _program_block(self, line: str, now: float):
+        if self.state != "PRG":
+            return "ERROR: PB command only available in Programmer mode", 0.0
+        parts = line.split(";", 3)
+        if len(parts) < 4:
+            return "ERROR: Format is PB;ADDRESS;LENGTH;HEXDATA (e.g., PB;64;3;0A1BFF)", 0.0
+        address = _strtoul(parts[1])
+        length = _strtoul(parts[2])
+        hex_data = parts[3]
+        if length == 0 or length > PB_MAX_LENGTH:
+            return "ERROR: Length must be 1-64", 0.0
+        if address + length > self.device_size:
+            return self._address_error(), 0.0
+        if len(hex_data) != length * 2:
+            return "ERROR: Data length does not match LENGTH", 0.0
+        try:
+            payload = bytes.fromhex(hex_data)
+        except ValueError:
+            return "ERROR: Data must be hex bytes", 0.0
+        return f"PB: Addr={address} Len={length}", self._write_block(address, payload, now)
+
+    def _write_block(self, address: int, payload: bytes, now: float) -> float:
+        """Write a checked block as WritePages does, returning the seconds it takes"""
+        # One write cycle per page touched, the firmware waits for each before the next
+        length = len(payload)
+        pages = (address + length - 1) // self.page_size - address // self.page_size + 1
+        duration = pages * self._cycle_wait()
+        # The firmware waits out every cycle, so the EEPROM is always idle afterwards
+        self.memory[address:address + length] = payload
+        self.address_bus = address + length - 1
+        self.data_bus = payload[-1]
+        self._eeprom_busy_until = now + duration
+        return duration
+
+    def _write_data_bus(self, cmd: str) -> str:
+        if ";" not in cmd:
+            return "ERROR: Format is WDB;VALUE (e.g., WDB;123 or WDB;0xFF)"
+        text = cmd.split(";", 1)[1]
+        value = _strtoul(text, 16 if text[:2] in ("0X", "0x") else 10)
+        if value > 255:
+            return "ERROR: Value must be 0-255"
+        if self.state != "DBG":
+            return "ERROR: WDB command only available in Debug mode"
+        self.data_bus = value
+        return f"WDB: Written {value} (0x{value:02X}) to data bus"
+
+    def _range_crc(self, line: str):
+        if self.state != "VAL":
+            return "ERROR: CRC command only available in Validator mode", 0.0
+        parts = line.split(";")
+        if len(parts) < 3:
+            return "ERROR: Format is CRC;ADDRESS;LENGTH (e.g., CRC;0;8192)", 0.0
+        address = _strtoul(parts[1])
+        length = _strtoul(parts[2])
+        if length == 0:
+            return "ERROR: Length must be at least 1", 0.0
+        if address >= self.device_size or length > self.device_size - address:
+            return self._address_error(), 0.0
+        self.address_bus = address + length - 1
+        crc = zlib.crc32(self.memory[address:address + length])
+        return f"CRC: Addr={address} Len={length} Crc={crc:08X}", length * CRC_READ_TIME
+
+    def _validate_address(self, cmd: str) -> str:
+        if self.state != "VAL":
+            return "ERROR: VA command only available in Validator mode"
+        if ";" not in cmd:
+            return "ERROR: Format is VA;ADDRESS (e.g., VA;4096)"
+        address = _strtoul(cmd.split(";", 1)[1])
+        if address >= self.device_size:
+            return self._address_error()
+        self.address_bus = address
+        data = self.memory[address]
+        return f"VA: Addr={address} Data={data} (0x{data:02X})"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Serve a stand-in on a pseudo-terminal until interrupted, so tools that need a device name can use it"""
+    parser = argparse.ArgumentParser(prog="python -m core.programmer.standin",
+                                     description="ECF_PRG firmware stand-in on a pseudo-terminal")
+    parser.add_argument("--latency", type=float, default=0.0, help="round-trip latency in seconds")
+    parser.add_argument("--write-cycle", type=float, default=0.0, help="EEPROM write cycle in seconds")
+    parser.add_argument("--reply-loss", type=float, default=0.0, help="fraction of replies dropped")
+    args = parser.parse_args(argv)
+
+    standin = ProgrammerStandIn(latency=args.latency, write_cycle=args.write_cycle, reply_loss=args.reply_loss)
+    with PtyBridge(standin) as bridge:
+        print(f"Stand-in programmer on {bridge.device} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import os
+import threading
+import time
+from typing import List, Optional
+
+from .protocol import ProgrammerError
+
+STANDIN_NAME = "standin"  # Port name that opens the in-process firmware stand-in
+DEFAULT_BAUDRATE = 115200  # Ignored by the USB CDC link, kept for pyserial
+DEFAULT_TIMEOUT = 1  # Seconds readline waits for a reply
+STM32_VID = 0x0483  # STMicroelectronics
+STM32_PID = 0x5740  # STM32 Virtual COM Port
+
+
+class ProgrammerTransport:
+    """
+    Byte link to an ECF_PRG programmer
+    The pyserial subset the programmer modules use (write, readline, read_until, reset_input_buffer),
+    so a backend can stand in for the serial port anywhere. Backends override every method
+    """
+    name = ""  # Port name shown to the user
+    is_open = False
+
+    def write(self, data: bytes) -> int:
+        """Send bytes to the programmer, returns the number written"""
+        raise NotImplementedError
+
+    def readline(self) -> bytes:
+        """Return the next line including its terminator, b"" (or a partial line) on a timeout"""
+        raise NotImplementedError
+
+    def read_until(self, expected: bytes = b"\n") -> bytes:
+        """Return bytes up to and including expected, fewer on a timeout"""
+        raise NotImplementedError
+
+    def reset_input_buffer(self) -> None:
+        """Discard received bytes not read yet"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def reopen(self) -> "ProgrammerTransport":
+        """
+        Open the link again after close() or a failure
+
+        Returns:
+            The transport itself, so it can serve as a reconnect callable
+        """
+        raise NotImplementedError
+
+    def __enter__(self) -> "ProgrammerTransport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SerialTransport(ProgrammerTransport):
+    """The programmer's USB CDC port through pyserial"""
+
+    def __init__(self, port_name: str, baudrate: int = DEFAULT_BAUDRATE, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        """
+        Open the port
+
+        Args:
+            port_name: Serial device, e.g. COM3 or /dev/ttyACM0
+            baudrate: Line speed, ignored by USB CDC
+            timeout: Seconds a read waits
+
+        Raises:
+            OSError: If the port can't be opened (pyserial's SerialException)
+        """
+        self.name = port_name
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.serial = None
+        self.reopen()
+
+    @property
+    def is_open(self) -> bool:
+        return self.serial is not None and self.serial.is_open
+
+    def write(self, data: bytes) -> int:
+        return self.serial.write(data)
+
+    def readline(self) -> bytes:
+        return self.serial.readline()
+
+    def read_until(self, expected: bytes = b"\n") -> bytes:
+        return self.serial.read_until(expected)
+
+    def reset_input_buffer(self) -> None:
+        self.serial.reset_input_buffer()
+
+    def close(self) -> None:
+        if self.serial is not None:
+            self.serial.close()
+
+    def reopen(self) -> "SerialTransport":
+        import serial
+        self.close()
+        self.serial = serial.Serial(port=self.name, baudrate=self.baudrate, timeout=self.timeout)
+        return self
+
+
+def parse_standin_options(spec: str) -> dict:
+    """
+    Stand-in options from a port name like "standin:latency=0.001,write_cycle=0.0005"
+
+    Args:
+        spec: Port name starting with STANDIN_NAME
+
+    Returns:
+        Keyword arguments for ProgrammerStandIn
+
+    Raises:
+        ProgrammerError: On an unknown or malformed option
+    """
+    options = {}
+    _, _, text = spec.partition(":")
+    for item in filter(None, text.split(",")):
+        key, separator, value = item.partition("=")
+        key = key.strip().replace("-", "_")
+        if not separator or key not in ("size", "latency", "write_cycle", "reply_loss", "link_rate"):
+            raise ProgrammerError(f"Unknown stand-in option '{item}' (size, latency, write_cycle, "
+                                  f"reply_loss, link_rate)")
+        try:
+            options[key] = int(value) if key == "size" else float(value)
+        except ValueError:
+            raise ProgrammerError(f"Stand-in option {key} must be a number, got '{value}'")
+    return options
+
+
+def open_transport(port_name: str, timeout: Optional[float] = DEFAULT_TIMEOUT) -> ProgrammerTransport:
+    """
+    Open a programmer link by name
+
+    Args:
+        port_name: Serial device, or "standin[:option=value,...]" for the in-process stand-in
+        timeout: Seconds a read waits
+
+    Returns:
+        The open transport
+
+    Raises:
+        OSError: If the serial port can't be opened
+        ProgrammerError: On bad stand-in options
+    """
+    if port_name.split(":", 1)[0] == STANDIN_NAME:
+        from .standin import ProgrammerStandIn
+        return ProgrammerStandIn(timeout=timeout, **parse_standin_options(port_name))
+    return SerialTransport(port_name, timeout=timeout)
+
+
+class PtyBridge:
+    """
+    Serves a transport (normally a ProgrammerStandIn) on a pseudo-terminal, POSIX only
+    Tools that only take a serial device name, pyserial included, can then reach the stand-in
+    """
+
+    def __init__(self, transport: ProgrammerTransport):
+        """
+        Create the pseudo-terminal, start() begins serving it
+
+        Args:
+            transport: Link the terminal's bytes are forwarded to
+        """
+        import tty
+        self.transport = transport
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # No echo or line editing, bytes pass unchanged
+        self.device = os.ttyname(self._slave)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> "PtyBridge":
+        for target in (self._forward_commands, self._forward_replies):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self) -> "PtyBridge":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _forward_commands(self) -> None:
+        import select
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            data = os.read(self._master, 4096)
+            try:
+                self.transport.write(data)
+            except OSError:
+                self.transport.reopen()  # A dropped link comes back, as when the host reopens the port
+
+    def _forward_replies(self) -> None:
+        while not self._stop.is_set():
+            try:
+                reply = self.transport.readline()
+            except OSError:
+                reply = b""
+            if reply:
+                os.write(self._master, reply)
+            else:
+                time.sleep(0.001)
+
+
+def find_ecf_programmer(verbose: bool = False) -> List[dict]:
+    """
+    Scan the serial ports for programmers: 'ECF_PRG' in the product string or description,
+    or the STM32 Virtual COM Port VID/PID
+
+    Args:
+        verbose: Print every port checked and why it matched
+
+    Returns:
+        One dict per programmer with its 'port', 'description' and 'product'; empty without pyserial
+    """
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return []
+
+    ecf_ports = []
+    for port in list_ports.comports():
+        match_reason = ""
+        if port.product and 'ECF_PRG' in port.product.upper():
+            match_reason = "Product string contains ECF_PRG"
+        elif port.description and 'ECF_PRG' in port.description.upper():
+            match_reason = "Description contains ECF_PRG"
+        elif port.vid == STM32_VID and port.pid == STM32_PID:
+            match_reason = "STM32 VID/PID match (0x0483:0x5740)"
+
+        if verbose:
+            vid = f"0x{port.vid:04X}" if port.vid is not None else "None"
+            pid = f"0x{port.pid:04X}" if port.pid is not None else "None"
+            print(f"Checking {port.device}: VID {vid}, PID {pid}, product '{port.product}', "
+                  f"description '{port.description}' -> {match_reason or 'no match'}")
+        if match_reason:
+            ecf_ports.append({
+                'port': port.device,
+                'description': f"{port.description} [{match_reason}]",
+                'product': port.product if port.product else 'STM32 Device'
+            })
+    return ecf_ports
+
+
+def programmer_id(port_name: str) -> str:
+    """
+    Stable identity of the programmer on a port, keys its DeviceRecord
+    Uses the USB serial number when the port reports one, otherwise the port name
+
+    Args:
+        port_name: Serial device or stand-in name the programmer was opened with
+
+    Returns:
+        "usb:<serial number>" or "port:<port name>"
+    """
+    if port_name.split(":", 1)[0] != STANDIN_NAME:
+        try:
+            from serial.tools import list_ports
+        except ImportError:
+            list_ports = None
+        if list_ports is not None:
+            for port in list_ports.comports():
+                if port.device == port_name and port.serial_number:
+                    return f"usb:{port.serial_number}"
+    return f"port:{port_name}"
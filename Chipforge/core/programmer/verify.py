@@ -0,0 +1,149 @@
+from typing import Iterable, List, Tuple, Union
+import zlib
+
+from core.compiler.rom_image import RomImage
+from .pipeline import DEFAULT_WINDOW, codec_for, run_pipelined, run_command
+
+MODE_COMMANDS = ("SNF", "EMU", "PRG", "VAL", "DBG")
+READ_BACK_SIZE = 8  # Ranges this short are read byte by byte instead of bisected further
+
+
+def set_mode(port, mode: str) -> str:
+    """
+    Switch the programmer's state machine
+
+    Args:
+        port: Open serial port (or ProgrammerStandIn), or a FramedPort
+        mode: "SNF", "EMU", "PRG", "VAL" or "DBG"
+
+    Returns:
+        The programmer's reply ("STATE: ..." or "Already in requested state")
+    """
+    if mode not in MODE_COMMANDS:
+        raise ValueError(f"Unknown mode {mode}, expected one of {', '.join(MODE_COMMANDS)}")
+    return run_command(port, codec_for(port).mode(mode))
+
+
+def read_address(port, address: int) -> int:
+    """Read one byte back (programmer must be in VAL mode)"""
+    return run_command(port, codec_for(port).read_block(address, 1))[0]
+
+
+def read_range(port, start: int, end: int, window: int = DEFAULT_WINDOW) -> bytes:
+    """
+    Read an address range back, up to window commands in flight
+    ASCII reads one byte per VA command, frames up to READ_BLOCK_MAX bytes per command
+
+    Args:
+        port: Open serial port in VAL mode, or a FramedPort
+        start: First address
+        end: One past the last address
+        window: Commands in flight at most, see CommandPipeline
+
+    Returns:
+        The bytes read
+    """
+    codec = codec_for(port)
+    commands = [codec.read_block(address, min(codec.max_read, end - address))
+                for address in range(start, end, codec.max_read)]
+    return b"".join(run_pipelined(port, commands, window))
+
+
+def group_addresses(addresses: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Collapse addresses into the fewest contiguous ranges
+
+    Args:
+        addresses: Addresses in any order, duplicates allowed
+
+    Returns:
+        (start, end) pairs in address order, end exclusive
+    """
+    ranges = []
+    for address in sorted(set(addresses)):
+        if ranges and ranges[-1][1] == address:
+            ranges[-1] = (ranges[-1][0], address + 1)
+        else:
+            ranges.append((address, address + 1))
+    return ranges
+
+
+def format_ranges(ranges: Iterable[Tuple[int, int]], limit: int = 0) -> str:
+    """
+    Describe ranges compactly, e.g. "5, 777-778, 5999"
+
+    Args:
+        ranges: (start, end) pairs, end exclusive
+        limit: Ranges to list before summarizing the rest, 0 lists all
+
+    Returns:
+        Comma-separated ranges with inclusive ends
+    """
+    ranges = list(ranges)
+    shown = ranges[:limit] if limit else ranges
+    text = ", ".join(str(start) if end - start == 1 else f"{start}-{end - 1}" for start, end in shown)
+    if len(shown) < len(ranges):
+        text += f", ... ({len(ranges) - len(shown)} more)"
+    return text
+
+
+def range_crc(port, start: int, end: int) -> int:
+    """
+    Ask the programmer for the CRC-32 of an address range (programmer must be in VAL mode)
+
+    Args:
+        port: Open serial port in VAL mode
+        start: First address
+        end: One past the last address
+
+    Returns:
+        The CRC-32 as zlib.crc32 computes it
+    """
+    return run_command(port, codec_for(port).range_crc(start, end))
+
+
+def _differing_ranges(port, expected, ranges: List[Tuple[int, int]], window: int) -> List[Tuple[int, int]]:
+    """CRC every range with the commands pipelined, return the ranges whose CRC differs"""
+    codec = codec_for(port)
+    commands = [codec.range_crc(start, end) for start, end in ranges]
+    crcs = run_pipelined(port, commands, window)
+    return [(start, end) for (start, end), crc in zip(ranges, crcs) if crc != zlib.crc32(bytes(expected[start:end]))]
+
+
+def ranges_match(port, expected: Union[RomImage, bytes, bytearray], ranges: Iterable[Tuple[int, int]],
+                 window: int = DEFAULT_WINDOW) -> bool:
+    """Check address ranges with one CRC command each, without locating mismatches"""
+    return not _differing_ranges(port, expected, list(ranges), window)
+
+
+def _find_mismatches(port, expected, start: int, end: int, mismatches: List[int], window: int) -> None:
+    """Bisect a range whose CRC differs down to the bytes that differ"""
+    if end - start <= READ_BACK_SIZE:
+        actual = read_range(port, start, end, window)
+        wanted = expected[start:end]
+        mismatches.extend(start + i for i, (a, e) in enumerate(zip(actual, wanted)) if a != e)
+        return
+    middle = (start + end) // 2
+    for half_start, half_end in _differing_ranges(port, expected, [(start, middle), (middle, end)], window):
+        _find_mismatches(port, expected, half_start, half_end, mismatches, window)
+
+
+def verify_ranges(port, expected: Union[RomImage, bytes, bytearray],
+                  ranges: Iterable[Tuple[int, int]], window: int = DEFAULT_WINDOW) -> List[int]:
+    """
+    Compare address ranges of the device with the expected contents
+    Each range costs one CRC command when it matches, only mismatching halves are bisected
+
+    Args:
+        port: Open serial port in VAL mode
+        expected: Image or bytes holding the expected contents from address 0
+        ranges: (start, end) pairs, end exclusive
+        window: Commands in flight at most, see CommandPipeline
+
+    Returns:
+        Every mismatching address in ascending order (empty if the ranges match)
+    """
+    mismatches = []
+    for start, end in _differing_ranges(port, expected, list(ranges), window):
+        _find_mismatches(port, expected, start, end, mismatches, window)
+    return sorted(mismatches)
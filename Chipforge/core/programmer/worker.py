@@ -0,0 +1,180 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from .protocol import ProgrammerError
+
+CANCEL_SETTLE_TIME = 0.2  # Seconds for replies to commands still in flight to arrive before they're discarded
+
+Dispatcher = Callable[[Callable[[], None]], None]  # Runs a callback on the caller's thread (e.g. Tk's)
+
+
+class JobCancelled(ProgrammerError):
+    """A job stopped because its future was cancelled"""
+
+
+class JobFuture(Future):
+    """Future of a ProgrammerWorker job, cancel() also stops a running job at its next progress report"""
+
+    def __init__(self):
+        super().__init__()
+        self.cancel_requested = threading.Event()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job
+
+        Returns:
+            True if it won't run or was asked to stop, False if it already finished
+        """
+        if self.done():
+            return False
+        self.cancel_requested.set()
+        return super().cancel() or self.running()
+
+
+class JobContext:
+    """What a job gets: the port and a progress reporter that also checks for cancellation"""
+
+    def __init__(self, port, future: JobFuture, on_progress: Optional[Callable[[int, int], None]],
+                 dispatch: Dispatcher):
+        self.port = port
+        self.future = future
+        self._on_progress = on_progress
+        self._dispatch = dispatch
+        self._latest = None  # Progress not shown yet
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancel_requested.is_set()
+
+    def check_cancelled(self) -> None:
+        """
+        Raises:
+            JobCancelled: If the job's future was cancelled
+        """
+        if self.cancelled:
+            raise JobCancelled("Cancelled")
+
+    def progress(self, done: int, total: int) -> None:
+        """
+        Report progress, usable as a ProgressCallback
+        Reports arriving faster than the dispatcher runs them are merged into the latest one
+
+        Raises:
+            JobCancelled: If the job's future was cancelled
+        """
+        self.check_cancelled()
+        if self._on_progress is None:
+            return
+        with self._lock:
+            pending = self._latest is not None
+            self._latest = (done, total)
+        if not pending:
+            self._dispatch(self._show_progress)
+
+    def dispatch(self, callback: Callable[[], None]) -> None:
+        """Run a callback through the worker's dispatcher, e.g. to show a status message on the GUI thread"""
+        self._dispatch(callback)
+
+    def _show_progress(self) -> None:
+        with self._lock:
+            latest, self._latest = self._latest, None
+        if latest is not None:
+            self._on_progress(*latest)
+
+
+def _run_now(callback: Callable[[], None]) -> None:
+    callback()
+
+
+class ProgrammerWorker:
+    """
+    Single thread owning the programmer port
+    Jobs from any thread run one at a time in submission order. Each returns a JobFuture; progress and
+    completion callbacks go through the dispatcher, so a GUI can have them run on its own thread
+    """
+
+    def __init__(self, port, dispatch: Optional[Dispatcher] = None, name: str = "programmer-io"):
+        """
+        Start the worker thread
+
+        Args:
+            port: Open transport (or serial port) the jobs use
+            dispatch: Runs callbacks on the thread that should see them; default runs them on the worker
+            name: Thread name
+        """
+        self.port = port
+        self._dispatch = dispatch or _run_now
+        self._jobs = queue.Queue()
+        self._current: Optional[JobFuture] = None  # Future of the running job
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable[[JobContext], Any], on_progress: Optional[Callable[[int, int], None]] = None,
+               on_done: Optional[Callable[[JobFuture], None]] = None) -> JobFuture:
+        """
+        Queue a job
+
+        Args:
+            job: Called on the worker thread with a JobContext, its return value is the future's result
+            on_progress: Called through the dispatcher with (done, total) when the job reports progress
+            on_done: Called through the dispatcher with the future once the job finished, failed or was cancelled
+
+        Returns:
+            JobFuture of the job's result
+        """
+        future = JobFuture()
+        if on_done is not None:
+            future.add_done_callback(lambda done: self._dispatch(lambda: on_done(done)))
+        self._jobs.put((future, job, on_progress))
+        return future
+
+    def stop(self, wait: bool = True) -> None:
+        """Cancel queued jobs, ask the running one to stop and end the thread"""
+        while True:
+            try:
+                future, _, _ = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+        current = self._current
+        if current is not None:
+            current.cancel()
+        self._jobs.put(None)
+        if wait and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            future, job, on_progress = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._current = future
+            context = JobContext(self.port, future, on_progress, self._dispatch)
+            try:
+                result = job(context)
+            except JobCancelled as e:
+                # Replies to commands already sent would confuse the next job
+                time.sleep(CANCEL_SETTLE_TIME)
+                try:
+                    self.port.reset_input_buffer()
+                except OSError:
+                    pass
+                future.set_exception(e)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                self._current = None
@@ -0,0 +1,17 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+HELLO_WORLD = Path(__file__).resolve().parents[2] / "Design" / "Code" / "HelloWorld"
+
+
+@pytest.fixture
+def project(tmp_path) -> Path:
+    """Copy of the HelloWorld project without its old Debug and Output folders"""
+    project_dir = tmp_path / "HelloWorld"
+    project_dir.mkdir()
+    shutil.copy(HELLO_WORLD / "HelloWorld.ecfproj", project_dir)
+    shutil.copy(HELLO_WORLD / "HelloWorld.ecfASM", project_dir)
+    shutil.copytree(HELLO_WORLD / "Source", project_dir / "source")
+    return project_dir / "HelloWorld.ecfproj"
@@ -0,0 +1,80 @@
+from contextlib import nullcontext
+
+import pytest
+
+from core.compiler.rom_image import RomImage
+from core.programmer import (LinkError, ProgrammerError, ProgrammerStandIn, framed_session, get_device_profile,
+                             program_block, program_image, set_mode)
+from core.programmer.protocol import read_line
+
+
+def _programmer(size: int = 8192) -> ProgrammerStandIn:
+    port = ProgrammerStandIn(size)
+    set_mode(port, "PRG")
+    return port
+
+
+def _image() -> RomImage:
+    """Two ranges with an ORG gap, the first one crossing a page boundary"""
+    image = RomImage()
+    image.write_block(10, bytes(range(1, 101)))
+    image.write_block(300, [0xAA, 0x55, 0x00])
+    return image
+
+
+@pytest.mark.parametrize("framed", [False, True])
+def test_program_image_writes_used_ranges(framed):
+    port = _programmer()
+    image = _image()
+    with framed_session(port) if framed else nullcontext(port) as link:
+        assert program_image(link, image, get_device_profile("AT28C64B")) == 103
+    assert port.memory[10:110] == bytes(range(1, 101))
+    assert port.memory[300:303] == b"\xaa\x55\x00"
+    assert port.memory[:10] == b"\xff" * 10
+    assert port.memory[110:300] == b"\xff" * 190  # The gap is never written
+
+
+def test_program_image_splits_blocks_at_pages():
+    port = _programmer()
+    progress = []
+    program_image(port, _image(), get_device_profile("AT28C64B"), lambda done, total: progress.append(done))
+    # 10-64, 64-110 and 300-303: one PB per page touched
+    assert progress == [54, 100, 103]
+
+
+def test_over_long_block_is_refused():
+    port = _programmer()
+    with pytest.raises(ValueError, match="1-64"):
+        program_block(port, 0, bytes(65))
+    # The firmware refuses it too when a host sends one anyway
+    port.write(b"PB;0;65;" + b"00" * 65 + b"\n")
+    with pytest.raises(ProgrammerError, match="Length must be 1-64"):
+        read_line(port)
+    assert port.memory[:65] == b"\xff" * 65
+
+
+def test_out_of_range_block_is_rejected():
+    port = _programmer()
+    program_image(port, RomImage.from_values([1]), get_device_profile("AT28C16"))  # 2 KiB part
+    with pytest.raises(ProgrammerError, match="Address must be 0-2047") as raised:
+        program_block(port, 2040, bytes(16))
+    assert not isinstance(raised.value, LinkError)
+    with pytest.raises(ValueError, match="outside"):
+        program_block(port, 8190, bytes(4))
+
+
+def test_image_larger_than_device_is_refused():
+    port = _programmer()
+    image = RomImage()
+    image.write_block(4000, [1, 2, 3])
+    with pytest.raises(ProgrammerError, match="holds 2048"):
+        program_image(port, image, get_device_profile("AT28C16"))
+    assert port.memory[4000:4003] == b"\xff\xff\xff"
+
+
+def test_block_outside_programmer_mode_is_rejected():
+    port = ProgrammerStandIn()
+    with pytest.raises(ProgrammerError, match="Programmer mode"):
+        program_block(port, 0, b"\x01")
+    assert port.memory[0] == 0xFF
+
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from core.compiler.build_cache import BuildCache
+from core.compiler_main import ECFCompiler
+
+STAGES = ("PARSED", "SPACED", "ADDRESSED", "IMPLEMENTED")
+
+_unpickled = []  # Set when a _Payload gets unpickled
+
+
+def _mark() -> str:
+    _unpickled.append(True)
+    return "ran"
+
+
+class _Payload:
+    """Runs _mark when unpickled, as a planted cache entry would run its code"""
+
+    def __reduce__(self):
+        return _mark, ()
+
+
+def _compile(proj_file: Path, debug_output=None) -> ECFCompiler:
+    compiler = ECFCompiler(debug_output=debug_output)
+    assert compiler.compile_project(str(proj_file)) is not None, compiler.get_errors()
+    return compiler
+
+
+def _dumps(proj_file: Path) -> dict:
+    debug_dir = proj_file.parent / "Debug"
+    return {stage: (debug_dir / f"{proj_file.stem}_{stage}.txt").read_text(encoding='utf-8') for stage in STAGES}
+
+
+def test_cache_hit_rewrites_stage_dumps(project):
+    asm_file = project.with_suffix(".ecfASM")
+    source_a = asm_file.read_text()
+    _compile(project)
+    dumps_a = _dumps(project)
+
+    asm_file.write_text(source_a + "\nJMPA PollTH\n")
+    _compile(project)
+    assert _dumps(project) != dumps_a
+
+    asm_file.write_text(source_a)
+    compiler = _compile(project)
+    assert compiler.from_cache
+    assert _dumps(project) == dumps_a
+
+
+def test_release_result_does_not_serve_debug_build(project):
+    _compile(project, debug_output="off")
+    assert not (project.parent / "Debug" / f"{project.stem}_IMPLEMENTED.txt").exists()
+
+    compiler = _compile(project)
+    assert not compiler.from_cache
+    assert all(_dumps(project).values())
+
+
+def test_compiler_does_not_load_programmer_package():
+    # Programmer edits must neither be needed by a compile nor invalidate its cache entries
+    check = "import sys, core.compiler_main; sys.exit(any(m.startswith('core.programmer') for m in sys.modules))"
+    assert subprocess.run([sys.executable, "-c", check], cwd=Path(__file__).resolve().parents[1]).returncode == 0
+
+
+def test_entries_signed_with_another_key_are_not_unpickled(tmp_path):
+    BuildCache(tmp_path, secret=b"a" * 32).store("result", "key", _Payload())
+    cache = BuildCache(tmp_path, secret=b"b" * 32)
+    assert cache.load("result", "key") is None
+    assert not _unpickled
+    assert not list(tmp_path.iterdir())  # The foreign entry is dropped
+
+
+def test_tampered_entries_are_rejected(tmp_path):
+    cache = BuildCache(tmp_path, secret=b"a" * 32)
+    cache.store("parsed", "key", ["statement", 1])
+    assert cache.load("parsed", "key") == ["statement", 1]
+    (entry_path,) = tmp_path.iterdir()
+    entry = bytearray(entry_path.read_bytes())
+    entry[-2] ^= 0xFF
+    entry_path.write_bytes(bytes(entry))
+    assert cache.load("parsed", "key") is None
@@ -0,0 +1,36 @@
+import asyncio
+
+from core.compiler.rom_image import RomImage
+from core.programmer import DeviceRecordStore, ProgrammerClient, get_device_profile
+
+
+def _image() -> RomImage:
+    image = RomImage()
+    image.write_block(0, bytes(range(1, 130)))
+    image.write_block(1000, b"\x10\x20\x30")
+    return image
+
+
+def test_client_programs_and_validates(tmp_path):
+    image = _image()
+    store = DeviceRecordStore(tmp_path)
+
+    async def session():
+        progress = []
+        async with await ProgrammerClient.connect("standin") as client:
+            report = await client.program_image(image, get_device_profile("AT28C64B"), store,
+                                                progress=lambda done, total: progress.append((done, total)))
+            mismatches = await client.validate_image(image)
+            again = await client.program_image(image, get_device_profile("AT28C64B"), store)
+            client.transport.memory[1001] = 0
+            changed = await client.validate_image(image)
+            dumped = await client.dump(1000, 1003)
+        return report, progress, mismatches, again, changed, dumped
+
+    report, progress, mismatches, again, changed, dumped = asyncio.run(session())
+    assert report.bytes_written == 132
+    assert progress[-1] == (132, 132)
+    assert mismatches == []
+    assert again.bytes_written == 0  # The device record already matches the image
+    assert changed == [1001]
+    assert dumped == b"\x10\x00\x30"
@@ -0,0 +1,35 @@
+from core.compiler.rom_image import RomImage
+from core.programmer import ProgrammerStandIn, get_device_profile
+from core.programmer.differential import DeviceRecordStore, changed_blocks, program_differential, ranges_to_mask
+
+
+def _gapped_image() -> RomImage:
+    """Image using only 0-3 and 60-63, one ORG gap inside the first page"""
+    image = RomImage()
+    image.write_block(0, [1, 2, 3, 4])
+    image.write_block(60, [5, 6, 7, 8])
+    return image
+
+
+def test_changed_blocks_skip_unwanted_gaps():
+    image = _gapped_image()
+    target = bytes(image.data[:len(image)])
+    wanted = ranges_to_mask(image.used_ranges(), len(target))
+    assert changed_blocks(b"", target, 64, wanted=wanted) == [(0, 4), (60, 64)]
+
+
+def test_changed_blocks_span_whole_page_without_mask():
+    target = bytes([1] * 4 + [0] * 56 + [2] * 4)
+    assert changed_blocks(b"", target, 64) == [(0, 64)]
+
+
+def test_program_differential_never_writes_gaps(tmp_path):
+    image = _gapped_image()
+    device = get_device_profile("AT28C64B")
+    port = ProgrammerStandIn()
+    report = program_differential(port, image, device, "port:test", DeviceRecordStore(tmp_path))
+    assert report.bytes_written == 8
+    assert report.blocks == [(0, 4), (60, 64)]
+    assert port.memory[0:4] == bytes([1, 2, 3, 4])
+    assert port.memory[60:64] == bytes([5, 6, 7, 8])
+    assert port.memory[4:60] == b"\xff" * 56  # Erased, never written
@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+CHIPFORGE = Path(__file__).resolve().parents[1]
+
+
+def _flash(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "core", "flash", *map(str, args)], cwd=CHIPFORGE,
+                          capture_output=True, text=True)
+
+
+def test_flash_standin_passes_and_rewrites_an_erased_device(project, tmp_path):
+    records = tmp_path / "records"
+    first = _flash(project, "--port", "standin", "--records", records, "--format", "json")
+    assert first.returncode == 0, first.stderr
+    report = json.loads(first.stdout)
+    assert report["ok"] and report["build"]["ok"]
+    (programmer,) = report["programmers"]
+    assert programmer["ok"] and programmer["bytes_written"] == report["image_bytes"] > 0
+    assert programmer["mismatches"] == 0
+
+    # A fresh stand-in is erased, so the record no longer matches and the image is written again
+    second = _flash(project, "--port", "standin", "--records", records, "--no-compile")
+    assert second.returncode == 0, second.stderr
+    assert second.stdout.startswith("PASS: 1 of 1 programmers passed")
+
+
+def test_flash_exit_codes(project, tmp_path):
+    records = tmp_path / "records"
+    assert _flash(tmp_path / "empty", "--port", "standin").returncode == 2  # No project
+    assert _flash(project, "--port", "standin", "--device", "NO_SUCH_PART").returncode == 2
+    assert _flash(project, "--port", "standin", "--no-compile").returncode == 1  # Nothing compiled yet
+    # Every reply lost: the programmer never answers, so programming fails
+    failed = _flash(project, "--port", "standin:reply_loss=1", "--records", records, "--format", "json")
+    assert failed.returncode == 4
+    (programmer,) = json.loads(failed.stdout)["programmers"]
+    assert not programmer["ok"] and programmer["error"]
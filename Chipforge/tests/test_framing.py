@@ -0,0 +1,66 @@
+import pytest
+
+from core.programmer import FrameError, FramedPort, ProgrammerStandIn, enter_framing, leave_framing, set_mode
+from core.programmer.framing import (FRAME_ERROR, FRAME_MODE, FRAME_RANGE_CRC, MODE_STATES, cobs_decode,
+                                     cobs_encode, crc16, decode_frame, encode_frame)
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00", b"\x00\x00", b"\x11\x22\x00\x33", bytes(range(256)),
+                                  b"\x01" * 254, b"\x01" * 255, b"\x01" * 254 + b"\x00" + b"\x02" * 300])
+def test_cobs_round_trip(data):
+    encoded = cobs_encode(data)
+    assert b"\x00" not in encoded
+    assert cobs_decode(encoded) == data
+
+
+def test_crc16_check_value():
+    assert crc16(b"123456789") == 0x29B1  # CRC-16/CCITT-FALSE check value
+
+
+def test_frame_round_trip():
+    frame = encode_frame(FRAME_RANGE_CRC, 0xBEEF, b"\x00\x10\x00\x01")
+    assert frame.endswith(b"\x00") and frame.count(b"\x00") == 1
+    assert decode_frame(frame) == (FRAME_RANGE_CRC, 0xBEEF, b"\x00\x10\x00\x01")
+
+
+def test_corrupt_frames_are_rejected():
+    frame = bytearray(encode_frame(FRAME_MODE, 7, b"\x03"))
+    frame[2] ^= 0x01
+    with pytest.raises(FrameError, match="CRC"):
+        decode_frame(bytes(frame))
+    with pytest.raises(FrameError, match="too short"):
+        decode_frame(cobs_encode(b"\x01\x02") + b"\x00")
+    with pytest.raises(FrameError, match="COBS"):
+        decode_frame(b"\x05\x01\x00")
+
+
+def test_bin_negotiation_and_exit():
+    port = ProgrammerStandIn()
+    framed = enter_framing(port)
+    assert isinstance(framed, FramedPort)
+    assert port.framed
+    assert set_mode(framed, "PRG")
+    leave_framing(framed)
+    assert not port.framed
+    assert set_mode(port, "VAL")  # ASCII lines work again
+    assert port.state == "VAL"
+
+
+def test_standin_drops_corrupt_frames():
+    port = ProgrammerStandIn()
+    framed = enter_framing(port)
+    frame = bytearray(encode_frame(FRAME_MODE, 1, bytes([MODE_STATES.index("PRG")])))
+    frame[3] ^= 0x40
+    port.write(bytes(frame))
+    assert port.corrupt_frames == 1
+    assert framed.read_frame() is None  # No reply, the host times out and resends
+    assert port.state == "SNF"
+
+
+def test_range_crc_rejects_bad_payload_length():
+    port = ProgrammerStandIn()
+    framed = enter_framing(port)
+    set_mode(framed, "VAL")
+    framed.write_frame(FRAME_RANGE_CRC, 9, b"\x00\x00")
+    command, sequence, payload = decode_frame(framed.read_frame())
+    assert (command, sequence, payload) == (FRAME_ERROR, 9, b"ERROR: Bad payload length")
@@ -0,0 +1,29 @@
+import pytest
+
+from core.programmer import LinkError, ProgrammerError, ProgrammerStandIn, ProgrammingSession, set_mode
+
+
+def _session(port: ProgrammerStandIn) -> ProgrammingSession:
+    return ProgrammingSession(port, port.reopen, reconnect_delay=0.0)
+
+
+def test_rejected_write_is_raised_without_reconnecting():
+    port = ProgrammerStandIn()  # Still in Sniffer mode, so every PB is answered with an ERROR
+    with _session(port) as session:
+        with pytest.raises(ProgrammerError) as raised:
+            session.program(bytes(64), [(0, 64)])
+    assert not isinstance(raised.value, LinkError)
+    assert "Programmer mode" in str(raised.value)
+    assert session.reconnections == 0
+
+
+def test_dropped_link_resumes_the_write():
+    port = ProgrammerStandIn()
+    set_mode(port, "PRG")
+    data = bytes(range(256))
+    with _session(port) as session:
+        port.drop_after = port.commands + 2
+        assert session.program(data, [(0, 256)]) == 256
+    assert session.reconnections == 1
+    assert session.checkpoint.resumes == 1
+    assert port.memory[:256] == data
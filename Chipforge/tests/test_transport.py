@@ -0,0 +1,82 @@
+import pytest
+
+from core.programmer import (ProgrammerError, ProgrammerStandIn, ProgrammerTransport, open_transport,
+                             programmer_id)
+from core.programmer.protocol import (format_program_address, format_validate_address, parse_validate_reply,
+                                      read_line)
+
+
+def _exchange(port, command) -> str:
+    port.write(command if isinstance(command, bytes) else f"{command}\n".encode('ascii'))
+    return read_line(port)
+
+
+def test_open_standin_by_name():
+    port = open_transport("standin:size=2048,latency=0", timeout=0.5)
+    assert isinstance(port, ProgrammerStandIn) and isinstance(port, ProgrammerTransport)
+    assert (port.name, port.is_open, len(port.memory), port.timeout) == ("standin", True, 2048, 0.5)
+    assert programmer_id("standin:size=2048") == "port:standin:size=2048"
+
+
+def test_bad_standin_option():
+    with pytest.raises(ProgrammerError, match="Unknown stand-in option"):
+        open_transport("standin:speed=9600")
+    with pytest.raises(ProgrammerError, match="must be a number"):
+        open_transport("standin:latency=fast")
+
+
+def test_mode_changes():
+    port = open_transport("standin")
+    assert _exchange(port, "STATUS") == "Current State: Sniffer"
+    for mode, reply in (("EMU", "STATE: Emulator Mode"), ("DBG", "STATE: Debug Mode"),
+                        ("VAL", "STATE: Validator Mode"), ("PRG", "STATE: Programmer Mode")):
+        assert _exchange(port, mode) == reply
+    assert _exchange(port, "PRG") == "Already in requested state"
+    with pytest.raises(ProgrammerError, match="Unknown command"):
+        _exchange(port, "JUMP")
+
+
+def test_program_and_read_back_single_bytes():
+    port = open_transport("standin")
+    with pytest.raises(ProgrammerError, match="PA command only available in Programmer mode"):
+        _exchange(port, format_program_address(100, 215))
+    _exchange(port, "PRG")
+    assert _exchange(port, format_program_address(100, 215)) == "DB:215 AB: 100"
+    with pytest.raises(ProgrammerError, match="Address must be 0-8191"):
+        _exchange(port, format_program_address(8192, 1))
+    _exchange(port, "VAL")
+    assert parse_validate_reply(_exchange(port, format_validate_address(100))) == (100, 215)
+    assert parse_validate_reply(_exchange(port, format_validate_address(101))) == (101, 0xFF)
+
+
+def test_bus_reads_follow_the_last_access():
+    port = open_transport("standin")
+    _exchange(port, "PRG")
+    _exchange(port, format_program_address(0x155, 0xA5))
+    _exchange(port, "VAL")
+    _exchange(port, format_validate_address(0x155))
+    assert _exchange(port, "RDA") == "RDA: 0000 1010 1010 1 (341)"
+    assert _exchange(port, "RDD") == "RDD: 1010 0101 (165/0xA5)"
+
+
+def test_reopen_keeps_the_eeprom():
+    port = open_transport("standin")
+    _exchange(port, "PRG")
+    _exchange(port, format_program_address(7, 42))
+    port.close()
+    with pytest.raises(OSError):
+        port.write(b"STATUS\n")
+    assert port.reopen() is port and port.is_open
+    assert _exchange(port, "STATUS") == "Current State: Programmer"
+    assert port.memory[7] == 42
+
+
+def test_dropped_link_and_reset():
+    port = open_transport("standin")
+    _exchange(port, "PRG")
+    port.drop_after = port.commands
+    with pytest.raises(OSError, match="disconnected"):
+        port.write(b"STATUS\n")
+    assert not port.is_open
+    port.reopen(reset=True)
+    assert _exchange(port, "STATUS") == "Current State: Sniffer"
@@ -0,0 +1,46 @@
+import pytest
+
+from core.compiler.rom_image import RomImage
+from core.programmer import ProgrammerStandIn, framed_session, get_device_profile, program_image, set_mode
+from core.programmer import verify_ranges
+
+
+def _programmed(port: ProgrammerStandIn) -> RomImage:
+    """Program a small image and leave the stand-in in Programmer mode"""
+    image = RomImage()
+    image.write_block(0, bytes(range(100)))
+    image.write_block(200, [7, 8, 9])
+    set_mode(port, "PRG")
+    program_image(port, image, get_device_profile("AT28C64B"))
+    set_mode(port, "PRG")
+    return image
+
+
+def test_validate_from_programmer_mode():
+    # As the GUI's "Validate whole device" job: switch to VAL on the link, then check the used ranges
+    port = ProgrammerStandIn()
+    image = _programmed(port)
+    assert port.state == "PRG"
+    with framed_session(port) as link:
+        set_mode(link, "VAL")
+        assert verify_ranges(link, image, image.used_ranges()) == []
+    assert port.state == "VAL"
+
+
+def test_validate_finds_changed_bytes():
+    port = ProgrammerStandIn()
+    image = _programmed(port)
+    port.memory[5] ^= 0xFF
+    port.memory[201] ^= 0xFF
+    with framed_session(port) as link:
+        set_mode(link, "VAL")
+        assert verify_ranges(link, image, image.used_ranges()) == [5, 201]
+
+
+def test_gui_job_uses_the_programmer_set_mode():
+    # The validate dialog defines its own set_mode(mode_code, response_label) for the mode button
+    pytest.importorskip("serial")
+    from core import programmer
+    from Gui.Programmer import validate
+    assert validate.set_programmer_mode is programmer.set_mode
+    assert validate.set_mode is not programmer.set_mode
@@ -38,7 +38,52 @@
 #define RX_BUFFER_SIZE 2048
 
 static char rxBuffer[RX_BUFFER_SIZE];
-static uint8_t rxIndex = 0;
+static uint16_t rxIndex = 0;
+
+// Pipelined commands: "#SEQ CMD" lines get "#SEQ " in front of their reply
+// Replies are queued, so commands arriving back to back never lose one to a busy IN endpoint
+#define TX_RING_SIZE         1024
+
+static char txRing[TX_RING_SIZE];
+static uint16_t txHead = 0;              // Next free byte
+static uint16_t txTail = 0;              // Next byte to transmit
+static uint8_t txLineStart = 1;          // Next queued byte starts a reply line
+static int32_t replySequence = -1;       // Sequence number of the command being processed, -1 when unnumbered
+
+// Framed binary protocol, entered with the BIN command and left with FRAME_EXIT or by reopening the port
+// Frame: COBS(CMD, SEQ_LO, SEQ_HI, PAYLOAD..., CRC16_LO, CRC16_HI) followed by a 0x00 delimiter
+// The CRC-16 (CCITT, init 0xFFFF) covers CMD, SEQ and PAYLOAD; frames that fail it are dropped
+#define FRAMING_VERSION      1
+#define FRAME_HEADER_SIZE    3      // CMD + SEQ
+#define FRAME_CRC_SIZE       2
+#define FRAME_MAX_PAYLOAD    (2 + PB_MAX_LENGTH)
+#define FRAME_MODE           0x01   // STATE -> STATE, CHANGED
+#define FRAME_DEVICE         0x02   // SIZE16, PAGE8, TWC32, POLL8 -> the same
+#define FRAME_PROGRAM_BLOCK  0x03   // ADDR16, DATA... -> ADDR16, LEN8
+#define FRAME_READ_BLOCK     0x04   // ADDR16, LEN8 -> ADDR16, DATA...
+#define FRAME_RANGE_CRC      0x05   // ADDR16, LEN16 -> ADDR16, LEN16, CRC32
+#define FRAME_EXIT           0x0F   // -> (empty), back to ASCII lines
+#define FRAME_ERROR          0x7F   // -> ASCII message
+
+static uint8_t framedMode = 0;
+
+// Block write (PB command)
+#define PB_MAX_LENGTH        64     // Payload bytes per PB command
+#define ADDRESS_BUS_SIZE     8192   // A1-A13
+
+// Range checksum (CRC command), CRC-32 as in zlib
+#define CRC32_POLY           0xEDB88320UL
+
+// End-of-write detection
+#define POLL_NONE            0      // Wait the full write cycle time
+#define POLL_DATA            1      // DATA polling on I/O7
+#define POLL_TOGGLE          2      // Toggle bit on I/O6
+
+// EEPROM part, set by the host with the DEV command (defaults are the AT28C64B)
+static uint32_t deviceSize = 8192;
+static uint32_t devicePageSize = 64;
+static uint32_t deviceWriteCycleUs = 10000;  // tWC (max), also the polling timeout
+static uint8_t devicePolling = POLL_DATA;
 
 
 
@@ -144,10 +189,24 @@ static int8_t CDC_TransmitCplt_FS(uint8_t *pbuf, uint32_t *Len, uint8_t epnum);
 
 /* USER CODE BEGIN PRIVATE_FUNCTIONS_DECLARATION */
 static void USB_SendString(const char* str);
+static void QueueReply(const char* str);
+static void FlushReplies(void);
+static void TakeSequenceNumber(void);
+static void QueueBytes(const uint8_t* data, uint16_t length);
+static void ProcessFrame(uint8_t* frame, uint16_t length);
+static void SendFrame(uint8_t cmd, uint16_t sequence, const uint8_t* payload, uint16_t length);
+static void SendFrameError(uint16_t sequence, const char* message);
+static void SendFrameAddressError(uint16_t sequence);
+static uint16_t Crc16(const uint8_t* data, uint16_t length);
+static int32_t WritePages(uint32_t address, const uint8_t* data, uint32_t length);
+static const char* SetDevice(const uint32_t values[4]);
+static uint8_t ReadValidatorByte(uint16_t address);
+static uint32_t ComputeRangeCrc(uint32_t address, uint32_t length);
 // Forward declaration
 void USB_ProcessReceivedData(void);
 
 static void ValidateAddress(uint16_t address);
+static void RangeCrc(void);
 
 static void ReadDataBus(void);
 static void SetDataBusValue(uint8_t data);
@@ -157,7 +216,17 @@ static uint8_t GetDataBusValue(void);
 static void ReadAddressBus(void);
 static uint16_t GetAddressBusValue(void);
 static void ProgramAddress(uint16_t address, uint8_t data);
+static void ProgramBlock(void);
+static void LoadByte(uint16_t address, uint8_t data);
+static uint8_t WaitWriteComplete(uint16_t address, uint8_t data);
+static uint8_t ReadEepromByte(void);
+static void SetDataBusDirection(uint32_t mode);
+static void ConfigureDevice(void);
+static void SendAddressError(void);
+static int ParseHexByte(const char* hex);
 static inline void delay_short(void);
+static void delay_us(uint32_t us);
+static void EnableCycleCounter(void);
 /* USER CODE END PRIVATE_FUNCTIONS_DECLARATION */
 
 /**
@@ -257,7 +326,9 @@ static int8_t CDC_Control_FS(uint8_t cmd, uint8_t* pbuf, uint16_t length)
     break;
 
     case CDC_SET_CONTROL_LINE_STATE:
-
+        // A host opening or closing the port always starts with ASCII lines
+        framedMode = 0;
+        rxIndex = 0;
     break;
 
     case CDC_SEND_BREAK:
@@ -294,6 +365,20 @@ static int8_t CDC_Receive_FS(uint8_t* Buf, uint32_t *Len)
     {
         char c = Buf[i];
 
+        if (framedMode)
+        {
+            if (c == 0)
+            {
+                ProcessFrame((uint8_t*)rxBuffer, rxIndex);
+                rxIndex = 0;
+            }
+            else if (rxIndex < RX_BUFFER_SIZE)
+            {
+                rxBuffer[rxIndex++] = c;
+            }
+            continue;
+        }
+
         if (c == '\n' || c == '\r' || rxIndex >= RX_BUFFER_SIZE - 1)
         {
             rxBuffer[rxIndex] = '\0';   // null terminate
@@ -358,6 +443,9 @@ static int8_t CDC_TransmitCplt_FS(uint8_t *Buf, uint32_t *Len, uint8_t epnum)
   UNUSED(Buf);
   UNUSED(Len);
   UNUSED(epnum);
+
+  // Send whatever was queued while the endpoint was busy
+  FlushReplies();
   /* USER CODE END 13 */
   return result;
 }
@@ -572,6 +660,9 @@ static void TransitionToState(SystemState_t newState)
 
 void USB_ProcessReceivedData(void)
 {
+    // Strip an optional "#SEQ " prefix, the reply carries it back
+    TakeSequenceNumber();
+
     // Convert to uppercase for easier comparison
     char cmd[16];
     strncpy(cmd, rxBuffer, sizeof(cmd) - 1);
@@ -612,7 +703,16 @@ void USB_ProcessReceivedData(void)
     else if (strcmp(cmd, "RDD") == 0) //Read Data
     {
     	ReadDataBus();
-    }else if (strncmp(cmd, "PA", 2) == 0)  // Program Address
+    }else if (strncmp(cmd, "DEV", 3) == 0)  // Device profile
+    {
+        ConfigureDevice();
+    }
+    else if (strncmp(cmd, "PB", 2) == 0)  // Program Block
+    {
+        // Payload is longer than cmd, so it is parsed from rxBuffer
+        ProgramBlock();
+    }
+    else if (strncmp(cmd, "PA", 2) == 0)  // Program Address
     {
         // Expected format: "PA;4096;215" or "PA;5;4"
 
@@ -644,9 +744,9 @@ void USB_ProcessReceivedData(void)
         uint32_t data = strtoul(token2, NULL, 10);
 
         // Bounds checking
-        if (address > 8191)
+        if (address >= deviceSize)
         {
-            USB_SendString("ERROR: Address must be 0-8191\r\n");
+            SendAddressError();
             return;
         }
 
@@ -693,6 +793,15 @@ void USB_ProcessReceivedData(void)
         }
 
         WriteDataBus((uint8_t)value);
+    }else if (strcmp(cmd, "BIN") == 0)  // Switch to framed binary protocol
+    {
+        char response[32];
+        snprintf(response, sizeof(response), "BIN: Framed v%u\r\n", FRAMING_VERSION);
+        USB_SendString(response);
+        framedMode = 1;
+    }else if (strncmp(cmd, "CRC", 3) == 0)  // Range checksum
+    {
+        RangeCrc();
     }else if (strncmp(cmd, "VA", 2) == 0)  // Validate Address
     {
         // Expected format: "VA;4096" or "VA;0"
@@ -716,9 +825,9 @@ void USB_ProcessReceivedData(void)
         uint32_t address = strtoul(token, NULL, 10);
 
         // Bounds checking
-        if (address > 8191)
+        if (address >= deviceSize)
         {
-            USB_SendString("ERROR: Address must be 0-8191\r\n");
+            SendAddressError();
             return;
         }
 
@@ -741,7 +850,93 @@ void USB_ProcessReceivedData(void)
 
 static void USB_SendString(const char* str)
 {
-    CDC_Transmit_FS((uint8_t*)str, strlen(str));
+    // Framed replies are sent by SendFrame, text from handlers shared with ASCII mode is dropped
+    if (framedMode)
+    {
+        return;
+    }
+
+    if (txLineStart && replySequence >= 0)
+    {
+        char prefix[16];
+        snprintf(prefix, sizeof(prefix), "#%ld ", replySequence);
+        QueueReply(prefix);
+    }
+
+    QueueReply(str);
+    size_t length = strlen(str);
+    if (length > 0)
+    {
+        txLineStart = (str[length - 1] == '\n');
+    }
+
+    FlushReplies();
+}
+
+
+static void QueueReply(const char* str)
+{
+    QueueBytes((const uint8_t*)str, (uint16_t)strlen(str));
+}
+
+
+static void QueueBytes(const uint8_t* data, uint16_t length)
+{
+    // A reply that doesn't fit is dropped whole, the host retransmits the command
+    uint16_t used = (txHead + TX_RING_SIZE - txTail) % TX_RING_SIZE;
+    if (length > TX_RING_SIZE - 1 - used)
+    {
+        return;
+    }
+
+    for (uint16_t i = 0; i < length; i++)
+    {
+        txRing[txHead] = (char)data[i];
+        txHead = (txHead + 1) % TX_RING_SIZE;
+    }
+}
+
+
+static void FlushReplies(void)
+{
+    // Runs in the USB interrupt (receive and transmit complete), so the ring needs no locking
+    USBD_CDC_HandleTypeDef *hcdc = (USBD_CDC_HandleTypeDef*)hUsbDeviceFS.pClassData;
+    if (hcdc == NULL || hcdc->TxState != 0 || txTail == txHead)
+    {
+        return;
+    }
+
+    uint16_t length = 0;
+    while (txTail != txHead && length < APP_TX_DATA_SIZE)
+    {
+        UserTxBufferFS[length++] = (uint8_t)txRing[txTail];
+        txTail = (txTail + 1) % TX_RING_SIZE;
+    }
+    CDC_Transmit_FS(UserTxBufferFS, length);
+}
+
+
+static void TakeSequenceNumber(void)
+{
+    replySequence = -1;
+    if (rxBuffer[0] != '#')
+    {
+        return;
+    }
+
+    char *end;
+    uint32_t sequence = strtoul(&rxBuffer[1], &end, 10);
+    if (end == &rxBuffer[1])
+    {
+        return;  // Not a number, reported as an unknown command
+    }
+    while (*end == ' ')
+    {
+        end++;
+    }
+
+    replySequence = (int32_t)(sequence & 0xFFFF);
+    memmove(rxBuffer, end, strlen(end) + 1);
 }
 
 
@@ -961,9 +1156,9 @@ static void ProgramAddress(uint16_t address, uint8_t data)
     }
 
     // Bounds check
-    if (address > 8191)
+    if (address >= deviceSize)
     {
-        USB_SendString("ERROR: Address must be 0-8191\r\n");
+        SendAddressError();
         return;
     }
 
@@ -986,8 +1181,14 @@ static void ProgramAddress(uint16_t address, uint8_t data)
 
     HAL_GPIO_WritePin(CE_STM_GPIO_Port, CE_STM_Pin, GPIO_PIN_SET);
 
-    // For the write cycle completion, we might need a longer delay
-    // But do it AFTER responding to USB
+    // Wait for the write cycle so the host doesn't have to sleep between bytes
+    if (!WaitWriteComplete(address, data))
+    {
+        char error[64];
+        snprintf(error, sizeof(error), "ERROR: Write timeout at %u\r\n", address);
+        USB_SendString(error);
+        return;
+    }
 
     HAL_GPIO_TogglePin(Sanity_led_GPIO_Port, Sanity_led_Pin);
 
@@ -998,11 +1199,298 @@ static void ProgramAddress(uint16_t address, uint8_t data)
 }
 
 
+// ============================================================================
+// PROGRAM BLOCK COMMAND WITH EEPROM PAGE WRITES
+// ============================================================================
+
+static void ProgramBlock(void)
+{
+    // Expected format: "PB;ADDRESS;LENGTH;HEXDATA" (e.g., PB;64;3;0A1BFF)
+    static uint8_t payload[PB_MAX_LENGTH];
+
+    if (currentState != STATE_PROGRAMMER)
+    {
+        USB_SendString("ERROR: PB command only available in Programmer mode\r\n");
+        return;
+    }
+
+    char *token1 = strchr(rxBuffer, ';');
+    char *token2 = token1 ? strchr(token1 + 1, ';') : NULL;
+    char *token3 = token2 ? strchr(token2 + 1, ';') : NULL;
+    if (token3 == NULL)
+    {
+        USB_SendString("ERROR: Format is PB;ADDRESS;LENGTH;HEXDATA (e.g., PB;64;3;0A1BFF)\r\n");
+        return;
+    }
+
+    uint32_t address = strtoul(token1 + 1, NULL, 10);
+    uint32_t length = strtoul(token2 + 1, NULL, 10);
+    char *hex = token3 + 1;
+
+    if (length == 0 || length > PB_MAX_LENGTH)
+    {
+        USB_SendString("ERROR: Length must be 1-64\r\n");
+        return;
+    }
+
+    if (address + length > deviceSize)
+    {
+        SendAddressError();
+        return;
+    }
+
+    if (strlen(hex) != length * 2)
+    {
+        USB_SendString("ERROR: Data length does not match LENGTH\r\n");
+        return;
+    }
+
+    // Decode everything before touching the EEPROM so a bad line writes nothing
+    for (uint32_t i = 0; i < length; i++)
+    {
+        int value = ParseHexByte(&hex[i * 2]);
+        if (value < 0)
+        {
+            USB_SendString("ERROR: Data must be hex bytes\r\n");
+            return;
+        }
+        payload[i] = (uint8_t)value;
+    }
+
+    int32_t failed = WritePages(address, payload, length);
+    if (failed >= 0)
+    {
+        char error[64];
+        snprintf(error, sizeof(error), "ERROR: Write timeout at %ld\r\n", failed);
+        USB_SendString(error);
+        return;
+    }
+
+    char response[64];
+    snprintf(response, sizeof(response), "PB: Addr=%lu Len=%lu\r\n", address, length);
+    USB_SendString(response);
+}
+
+
+static int32_t WritePages(uint32_t address, const uint8_t* data, uint32_t length)
+{
+    // Load each page back to back, then wait for its write cycle
+    // Returns -1 when every page completed, otherwise the address whose write cycle timed out
+    uint32_t i = 0;
+    while (i < length)
+    {
+        uint32_t page_end = ((address + i) / devicePageSize + 1) * devicePageSize;
+        while (i < length && address + i < page_end)
+        {
+            LoadByte((uint16_t)(address + i), data[i]);
+            i++;
+        }
+
+        if (!WaitWriteComplete((uint16_t)(address + i - 1), data[i - 1]))
+        {
+            return (int32_t)(address + i - 1);
+        }
+    }
+
+    HAL_GPIO_TogglePin(Sanity_led_GPIO_Port, Sanity_led_Pin);
+    return -1;
+}
+
+
+static void LoadByte(uint16_t address, uint8_t data)
+{
+    // One byte of a page load, consecutive loads must be less than tBLC (150us) apart
+    SetAddressBusValue(address);
+    SetDataBusValue(data);
+    delay_us(1);
+
+    HAL_GPIO_WritePin(CE_STM_GPIO_Port, CE_STM_Pin, GPIO_PIN_RESET);
+    HAL_GPIO_WritePin(WE_STM_GPIO_Port, WE_STM_Pin, GPIO_PIN_RESET);
+    delay_us(1);
+
+    HAL_GPIO_WritePin(WE_STM_GPIO_Port, WE_STM_Pin, GPIO_PIN_SET);
+    HAL_GPIO_WritePin(CE_STM_GPIO_Port, CE_STM_Pin, GPIO_PIN_SET);
+    delay_us(1);
+}
+
+
+static uint8_t WaitWriteComplete(uint16_t address, uint8_t data)
+{
+    if (devicePolling == POLL_NONE)
+    {
+        delay_us(deviceWriteCycleUs);
+        return 1;
+    }
+
+    // Read the last byte written back until the part reports the end of the cycle
+    SetDataBusDirection(GPIO_MODE_INPUT);
+    SetAddressBusValue(address);
+    HAL_GPIO_WritePin(DIR_STM_GPIO_Port, DIR_STM_Pin, GPIO_PIN_RESET); //From Eeprom to Datalines
+    HAL_GPIO_WritePin(CE_STM_GPIO_Port, CE_STM_Pin, GPIO_PIN_RESET);
+
+    EnableCycleCounter();
+    uint32_t start = DWT->CYCCNT;
+    uint32_t timeout = 2 * deviceWriteCycleUs * (SystemCoreClock / 1000000);
+    uint8_t previous = ReadEepromByte();
+    uint8_t done = 0;
+
+    while (!done && (DWT->CYCCNT - start) < timeout)
+    {
+        uint8_t value = ReadEepromByte();
+        if (devicePolling == POLL_DATA)
+            done = ((value ^ data) & 0x80) == 0;      // I/O7 is inverted until the write completes
+        else
+            done = ((value ^ previous) & 0x40) == 0;  // I/O6 stops toggling when the write completes
+        previous = value;
+    }
+
+    // Back to driving the EEPROM
+    HAL_GPIO_WritePin(CE_STM_GPIO_Port, CE_STM_Pin, GPIO_PIN_SET);
+    HAL_GPIO_WritePin(DIR_STM_GPIO_Port, DIR_STM_Pin, GPIO_PIN_SET); //From Datalines to Eeprom
+    SetDataBusDirection(GPIO_MODE_OUTPUT_PP);
+    return done;
+}
+
+
+static uint8_t ReadEepromByte(void)
+{
+    // Each read is a separate OE pulse, the toggle bit only changes between reads
+    HAL_GPIO_WritePin(OE_STM_GPIO_Port, OE_STM_Pin, GPIO_PIN_RESET);
+    delay_us(1);
+    uint8_t value = GetDataBusValue();
+    HAL_GPIO_WritePin(OE_STM_GPIO_Port, OE_STM_Pin, GPIO_PIN_SET);
+    delay_us(1);
+    return value;
+}
+
+
+static void SetDataBusDirection(uint32_t mode)
+{
+    GPIO_InitTypeDef GPIO_InitStruct = {0};
+
+    GPIO_InitStruct.Pin = D1_Pin|D2_Pin|D3_Pin|D4_Pin|D5_Pin|D6_Pin|D7_Pin|D8_Pin;
+    GPIO_InitStruct.Mode = mode;
+    GPIO_InitStruct.Pull = GPIO_NOPULL;
+    GPIO_InitStruct.Speed = GPIO_SPEED_FREQ_HIGH;
+    HAL_GPIO_Init(GPIOB, &GPIO_InitStruct);
+}
+
+
+static const char* SetDevice(const uint32_t values[4])
+{
+    // values: size, page size, write cycle (us), poll code; returns NULL when accepted
+    if (values[0] == 0 || values[0] > ADDRESS_BUS_SIZE)
+    {
+        return "ERROR: Size must be 1-8192";
+    }
+
+    if (values[1] == 0 || values[1] > PB_MAX_LENGTH || (values[1] & (values[1] - 1)) != 0)
+    {
+        return "ERROR: Page size must be a power of two up to 64";
+    }
+
+    if (values[2] == 0 || values[2] > 100000)
+    {
+        return "ERROR: Write cycle must be 1-100000 us";
+    }
+
+    if (values[3] > POLL_TOGGLE)
+    {
+        return "ERROR: Poll must be 0 (none), 1 (data) or 2 (toggle)";
+    }
+
+    deviceSize = values[0];
+    devicePageSize = values[1];
+    deviceWriteCycleUs = values[2];
+    devicePolling = (uint8_t)values[3];
+    return NULL;
+}
+
+
+static void ConfigureDevice(void)
+{
+    // Expected format: "DEV;SIZE;PAGE;TWC_US;POLL" (e.g., DEV;8192;64;10000;1), "DEV" reports the current part
+    char *token = strchr(rxBuffer, ';');
+
+    if (token != NULL)
+    {
+        uint32_t values[4];
+        for (int i = 0; i < 4; i++)
+        {
+            if (token == NULL)
+            {
+                USB_SendString("ERROR: Format is DEV;SIZE;PAGE;TWC_US;POLL (e.g., DEV;8192;64;10000;1)\r\n");
+                return;
+            }
+            values[i] = strtoul(token + 1, NULL, 10);
+            token = strchr(token + 1, ';');
+        }
+
+        const char *error = SetDevice(values);
+        if (error != NULL)
+        {
+            USB_SendString(error);
+            USB_SendString("\r\n");
+            return;
+        }
+    }
+
+    char response[64];
+    snprintf(response, sizeof(response), "DEV: Size=%lu Page=%lu Twc=%lu Poll=%u\r\n",
+             deviceSize, devicePageSize, deviceWriteCycleUs, devicePolling);
+    USB_SendString(response);
+}
+
+
+static void SendAddressError(void)
+{
+    char response[64];
+    snprintf(response, sizeof(response), "ERROR: Address must be 0-%lu\r\n", deviceSize - 1);
+    USB_SendString(response);
+}
+
+
+static int ParseHexByte(const char* hex)
+{
+    int value = 0;
+    for (int i = 0; i < 2; i++)
+    {
+        char c = hex[i];
+        value <<= 4;
+        if (c >= '0' && c <= '9') value |= c - '0';
+        else if (c >= 'A' && c <= 'F') value |= c - 'A' + 10;
+        else if (c >= 'a' && c <= 'f') value |= c - 'a' + 10;
+        else return -1;
+    }
+    return value;
+}
+
+
 static inline void delay_short(void)
 {
     for (volatile int i = 0; i < 10000; i++);  // ~few microseconds
 }
 
+static void delay_us(uint32_t us)
+{
+    // Busy wait on the cycle counter, commands run in the USB interrupt so HAL_Delay can't be used
+    EnableCycleCounter();
+
+    uint32_t start = DWT->CYCCNT;
+    uint32_t cycles = us * (SystemCoreClock / 1000000);
+    while ((DWT->CYCCNT - start) < cycles);
+}
+
+static void EnableCycleCounter(void)
+{
+    if (!(DWT->CTRL & DWT_CTRL_CYCCNTENA_Msk))
+    {
+        CoreDebug->DEMCR |= CoreDebug_DEMCR_TRCENA_Msk;
+        DWT->CYCCNT = 0;
+        DWT->CTRL |= DWT_CTRL_CYCCNTENA_Msk;
+    }
+}
+
 static void ValidateAddress(uint16_t address)
 {
     // State check - only allow in VALIDATOR mode
@@ -1013,20 +1501,13 @@ static void ValidateAddress(uint16_t address)
     }
 
     // Bounds check
-    if (address > 8191)
+    if (address >= deviceSize)
     {
-        USB_SendString("ERROR: Address must be 0-8191\r\n");
+        SendAddressError();
         return;
     }
 
-    // Set the address on the address bus
-    SetAddressBusValue(address);
-
-    // Small delay for address to propagate and EEPROM to respond
-    for (volatile int i = 0; i < 100; i++);
-
-    // Read the data from the data bus
-    uint8_t data = GetDataBusValue();
+    uint8_t data = ReadValidatorByte(address);
 
     char responseBuffer[64];
     // Send response using static buffer
@@ -1035,6 +1516,362 @@ static void ValidateAddress(uint16_t address)
     USB_SendString(responseBuffer);
 }
 
+
+// ============================================================================
+// RANGE CHECKSUM COMMAND
+// ============================================================================
+
+static void RangeCrc(void)
+{
+    // Expected format: "CRC;ADDRESS;LENGTH" (e.g., CRC;0;8192), replies with the CRC-32 of the range
+    if (currentState != STATE_VALIDATOR)
+    {
+        USB_SendString("ERROR: CRC command only available in Validator mode\r\n");
+        return;
+    }
+
+    char *token1 = strchr(rxBuffer, ';');
+    char *token2 = token1 ? strchr(token1 + 1, ';') : NULL;
+    if (token2 == NULL)
+    {
+        USB_SendString("ERROR: Format is CRC;ADDRESS;LENGTH (e.g., CRC;0;8192)\r\n");
+        return;
+    }
+
+    uint32_t address = strtoul(token1 + 1, NULL, 10);
+    uint32_t length = strtoul(token2 + 1, NULL, 10);
+
+    if (length == 0)
+    {
+        USB_SendString("ERROR: Length must be at least 1\r\n");
+        return;
+    }
+
+    if (address >= deviceSize || length > deviceSize - address)
+    {
+        SendAddressError();
+        return;
+    }
+
+    uint32_t crc = ComputeRangeCrc(address, length);
+
+    char response[64];
+    snprintf(response, sizeof(response), "CRC: Addr=%lu Len=%lu Crc=%08lX\r\n", address, length, crc);
+    USB_SendString(response);
+}
+
+
+static uint8_t ReadValidatorByte(uint16_t address)
+{
+    // The EEPROM drives the bus in Validator mode, a read only needs the address access time
+    SetAddressBusValue(address);
+
+    // Small delay for address to propagate and EEPROM to respond
+    for (volatile int i = 0; i < 100; i++);
+
+    return GetDataBusValue();
+}
+
+
+static uint32_t ComputeRangeCrc(uint32_t address, uint32_t length)
+{
+    uint32_t crc = 0xFFFFFFFFUL;
+    for (uint32_t i = 0; i < length; i++)
+    {
+        crc ^= ReadValidatorByte((uint16_t)(address + i));
+        for (int bit = 0; bit < 8; bit++)
+        {
+            crc = (crc >> 1) ^ (CRC32_POLY & (0UL - (crc & 1UL)));
+        }
+    }
+    return crc ^ 0xFFFFFFFFUL;
+}
+
+
+// ============================================================================
+// FRAMED BINARY PROTOCOL
+// ============================================================================
+
+static void ProcessFrame(uint8_t* frame, uint16_t length)
+{
+    // COBS decode in place, the output is never longer than the input; corrupt frames are dropped
+    uint16_t read = 0;
+    uint16_t write = 0;
+    while (read < length)
+    {
+        uint8_t code = frame[read++];
+        if (read + code - 1 > length)
+        {
+            return;
+        }
+        for (uint8_t i = 1; i < code; i++)
+        {
+            frame[write++] = frame[read++];
+        }
+        if (code < 0xFF && read < length)
+        {
+            frame[write++] = 0;
+        }
+    }
+
+    if (write < FRAME_HEADER_SIZE + FRAME_CRC_SIZE)
+    {
+        return;
+    }
+
+    uint16_t bodyLength = write - FRAME_CRC_SIZE;
+    uint16_t crc = frame[bodyLength] | (frame[bodyLength + 1] << 8);
+    if (Crc16(frame, bodyLength) != crc)
+    {
+        return;
+    }
+
+    uint8_t cmd = frame[0];
+    uint16_t sequence = frame[1] | (frame[2] << 8);
+    uint8_t *payload = &frame[FRAME_HEADER_SIZE];
+    uint16_t payloadLength = bodyLength - FRAME_HEADER_SIZE;
+    uint8_t reply[FRAME_MAX_PAYLOAD];
+
+    switch (cmd)
+    {
+        case FRAME_MODE:
+        {
+            if (payloadLength != 1 || payload[0] > STATE_DEBUG)
+            {
+                SendFrameError(sequence, "ERROR: Invalid state");
+                return;
+            }
+            SystemState_t previous = currentState;
+            TransitionToState((SystemState_t)payload[0]);
+            reply[0] = (uint8_t)currentState;
+            reply[1] = (currentState != previous);
+            SendFrame(FRAME_MODE, sequence, reply, 2);
+            break;
+        }
+
+        case FRAME_DEVICE:
+        {
+            if (payloadLength != 8)
+            {
+                SendFrameError(sequence, "ERROR: Device frame needs SIZE16 PAGE8 TWC32 POLL8");
+                return;
+            }
+            uint32_t values[4] = {
+                payload[0] | (payload[1] << 8),
+                payload[2],
+                payload[3] | (payload[4] << 8) | ((uint32_t)payload[5] << 16) | ((uint32_t)payload[6] << 24),
+                payload[7]
+            };
+            const char *error = SetDevice(values);
+            if (error != NULL)
+            {
+                SendFrameError(sequence, error);
+                return;
+            }
+            reply[0] = deviceSize & 0xFF;
+            reply[1] = deviceSize >> 8;
+            reply[2] = (uint8_t)devicePageSize;
+            reply[3] = deviceWriteCycleUs & 0xFF;
+            reply[4] = (deviceWriteCycleUs >> 8) & 0xFF;
+            reply[5] = (deviceWriteCycleUs >> 16) & 0xFF;
+            reply[6] = deviceWriteCycleUs >> 24;
+            reply[7] = devicePolling;
+            SendFrame(FRAME_DEVICE, sequence, reply, 8);
+            break;
+        }
+
+        case FRAME_PROGRAM_BLOCK:
+        {
+            if (currentState != STATE_PROGRAMMER)
+            {
+                SendFrameError(sequence, "ERROR: PB command only available in Programmer mode");
+                return;
+            }
+            if (payloadLength < 3 || payloadLength > 2 + PB_MAX_LENGTH)
+            {
+                SendFrameError(sequence, "ERROR: Length must be 1-64");
+                return;
+            }
+            uint32_t address = payload[0] | (payload[1] << 8);
+            uint32_t blockLength = payloadLength - 2;
+            if (address + blockLength > deviceSize)
+            {
+                SendFrameAddressError(sequence);
+                return;
+            }
+            int32_t failed = WritePages(address, &payload[2], blockLength);
+            if (failed >= 0)
+            {
+                char error[48];
+                snprintf(error, sizeof(error), "ERROR: Write timeout at %ld", failed);
+                SendFrameError(sequence, error);
+                return;
+            }
+            reply[0] = address & 0xFF;
+            reply[1] = address >> 8;
+            reply[2] = (uint8_t)blockLength;
+            SendFrame(FRAME_PROGRAM_BLOCK, sequence, reply, 3);
+            break;
+        }
+
+        case FRAME_READ_BLOCK:
+        {
+            if (currentState != STATE_VALIDATOR)
+            {
+                SendFrameError(sequence, "ERROR: VA command only available in Validator mode");
+                return;
+            }
+            if (payloadLength != 3 || payload[2] == 0 || payload[2] > PB_MAX_LENGTH)
+            {
+                SendFrameError(sequence, "ERROR: Length must be 1-64");
+                return;
+            }
+            uint32_t address = payload[0] | (payload[1] << 8);
+            uint32_t blockLength = payload[2];
+            if (address + blockLength > deviceSize)
+            {
+                SendFrameAddressError(sequence);
+                return;
+            }
+            reply[0] = address & 0xFF;
+            reply[1] = address >> 8;
+            for (uint32_t i = 0; i < blockLength; i++)
+            {
+                reply[2 + i] = ReadValidatorByte((uint16_t)(address + i));
+            }
+            SendFrame(FRAME_READ_BLOCK, sequence, reply, (uint16_t)(2 + blockLength));
+            break;
+        }
+
+        case FRAME_RANGE_CRC:
+        {
+            if (currentState != STATE_VALIDATOR)
+            {
+                SendFrameError(sequence, "ERROR: CRC command only available in Validator mode");
+                return;
+            }
+            if (payloadLength != 4)
+            {
+                SendFrameError(sequence, "ERROR: Bad payload length");
+                return;
+            }
+            uint32_t address = payload[0] | (payload[1] << 8);
+            uint32_t rangeLength = payload[2] | (payload[3] << 8);
+            if (rangeLength == 0)
+            {
+                SendFrameError(sequence, "ERROR: Length must be at least 1");
+                return;
+            }
+            if (address >= deviceSize || rangeLength > deviceSize - address)
+            {
+                SendFrameAddressError(sequence);
+                return;
+            }
+            uint32_t crc32 = ComputeRangeCrc(address, rangeLength);
+            memcpy(reply, payload, 4);
+            reply[4] = crc32 & 0xFF;
+            reply[5] = (crc32 >> 8) & 0xFF;
+            reply[6] = (crc32 >> 16) & 0xFF;
+            reply[7] = crc32 >> 24;
+            SendFrame(FRAME_RANGE_CRC, sequence, reply, 8);
+            break;
+        }
+
+        case FRAME_EXIT:
+            SendFrame(FRAME_EXIT, sequence, NULL, 0);
+            framedMode = 0;
+            break;
+
+        default:
+            SendFrameError(sequence, "ERROR: Unknown command");
+            break;
+    }
+}
+
+
+static void SendFrame(uint8_t cmd, uint16_t sequence, const uint8_t* payload, uint16_t length)
+{
+    uint8_t body[FRAME_HEADER_SIZE + FRAME_MAX_PAYLOAD + FRAME_CRC_SIZE];
+    uint8_t encoded[sizeof(body) + 2];  // One COBS code byte per 254 bytes, plus the delimiter
+
+    if (length > FRAME_MAX_PAYLOAD)
+    {
+        length = FRAME_MAX_PAYLOAD;
+    }
+
+    body[0] = cmd;
+    body[1] = sequence & 0xFF;
+    body[2] = sequence >> 8;
+    if (length > 0)
+    {
+        memcpy(&body[FRAME_HEADER_SIZE], payload, length);
+    }
+    uint16_t bodyLength = FRAME_HEADER_SIZE + length;
+    uint16_t crc = Crc16(body, bodyLength);
+    body[bodyLength++] = crc & 0xFF;
+    body[bodyLength++] = crc >> 8;
+
+    // COBS: each zero becomes the distance to the next one, so 0x00 only ever ends a frame
+    uint16_t codeIndex = 0;
+    uint16_t out = 1;
+    uint8_t code = 1;
+    for (uint16_t i = 0; i < bodyLength; i++)
+    {
+        if (body[i] == 0)
+        {
+            encoded[codeIndex] = code;
+            codeIndex = out++;
+            code = 1;
+        }
+        else
+        {
+            encoded[out++] = body[i];
+            code++;
+            if (code == 0xFF)
+            {
+                encoded[codeIndex] = code;
+                codeIndex = out++;
+                code = 1;
+            }
+        }
+    }
+    encoded[codeIndex] = code;
+    encoded[out++] = 0;
+
+    QueueBytes(encoded, out);
+    FlushReplies();
+}
+
+
+static void SendFrameError(uint16_t sequence, const char* message)
+{
+    SendFrame(FRAME_ERROR, sequence, (const uint8_t*)message, (uint16_t)strlen(message));
+}
+
+
+static void SendFrameAddressError(uint16_t sequence)
+{
+    char error[48];
+    snprintf(error, sizeof(error), "ERROR: Address must be 0-%lu", deviceSize - 1);
+    SendFrameError(sequence, error);
+}
+
+
+static uint16_t Crc16(const uint8_t* data, uint16_t length)
+{
+    // CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), binascii.crc_hqx on the host
+    uint16_t crc = 0xFFFF;
+    for (uint16_t i = 0; i < length; i++)
+    {
+        crc ^= (uint16_t)data[i] << 8;
+        for (int bit = 0; bit < 8; bit++)
+        {
+            crc = (crc & 0x8000) ? (uint16_t)((crc << 1) ^ 0x1021) : (uint16_t)(crc << 1);
+        }
+    }
+    return crc;
+}
+
 /* USER CODE END PRIVATE_FUNCTIONS_IMPLEMENTATION */
 
 /**